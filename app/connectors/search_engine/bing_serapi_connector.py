@@ -1,24 +1,46 @@
 import os
-from typing import Any
+import asyncio
+from typing import Any, Optional
 import logging
 import re
-import json
 
-import serpapi
+import httpx
+from dotenv import load_dotenv
 from .connector import SearchConnectorBase
-from semantic_kernel.exceptions import ServiceInvalidRequestError
+from ...utils.http_client import get_http_client
+from semantic_kernel.exceptions import ServiceInvalidRequestError, ServiceResponseException
 
+load_dotenv()
 logger = logging.getLogger(__name__)
 
+SERPAPI_BASE_URL = os.getenv("SERPAPI_BASE_URL", "https://serpapi.com")
+SERPAPI_TIMEOUT_SECONDS = float(os.getenv("SERPAPI_TIMEOUT_SECONDS", "10"))
+SERPAPI_MAX_CONCURRENCY = int(os.getenv("SERPAPI_MAX_CONCURRENCY", "10"))
+
+# Shared by every connector instance so the bound holds across requests.
+_search_semaphore = asyncio.Semaphore(SERPAPI_MAX_CONCURRENCY)
+
 class BingSerApiConnector(SearchConnectorBase):
     """A Search engine connector that uses Serpapi to perform a Bing web search."""
-    
+
     __api_key: str
-    # __client: serpapi.Client
-    def __init__(self, api_key:str | None = None) -> None:
+    __base_url: str
+    __timeout: float
+    __client: Optional[httpx.AsyncClient]
+    def __init__(self,
+                 api_key:str | None = None,
+                 base_url:str | None = None,
+                 timeout:float | None = None,
+                 client:httpx.AsyncClient | None = None) -> None:
         """
         Initialize the connector with SerpApi API key.
         Loads from environment if not provided.
+
+        Args:
+            api_key (str, optional): The SerpApi API key. Defaults to SERPAPI_API_KEY.
+            base_url (str, optional): The SerpApi base URL. Defaults to SERPAPI_BASE_URL.
+            timeout (float, optional): Default per-call timeout in seconds. Defaults to SERPAPI_TIMEOUT_SECONDS.
+            client (httpx.AsyncClient, optional): HTTP client to use. Defaults to the shared pooled client.
         """
         if not api_key:
             from dotenv import load_dotenv
@@ -26,12 +48,22 @@ class BingSerApiConnector(SearchConnectorBase):
             self.__api_key = os.getenv("SERPAPI_API_KEY") or (lambda:(_ for _ in ()).throw(ValueError("SERPAPI_API_KEY is not set")))()
         else:
             self.__api_key = api_key
-            
-        # self.__client = serpapi.Client(api_key=self.__api_key)
-        
-    async def search_async(self, query: str, num_results: int = 2) -> dict[str, dict[str, Any]]:
+
+        self.__base_url = (base_url or SERPAPI_BASE_URL).rstrip("/")
+        self.__timeout = timeout or SERPAPI_TIMEOUT_SECONDS
+        self.__client = client
+
+    async def search_async(self, query: str, num_results: int = 2, timeout: float | None = None) -> dict[str, dict[str, Any]]:
         """
         Returns the search results of the query provided by pinging the Bing web search API.
+
+        Args:
+            query (str): The search query.
+            num_results (int, optional): Number of references to return. Defaults to 2.
+            timeout (float, optional): Timeout in seconds for this call. Defaults to the connector timeout.
+
+        Returns:
+            dict: The parsed search result with an answer and its references.
         """
         if not query:
             raise ServiceInvalidRequestError("query cannot be 'None' or empty.")
@@ -40,20 +72,20 @@ class BingSerApiConnector(SearchConnectorBase):
             raise ServiceInvalidRequestError("num_results value must be greater than 0.")
         if num_results >= 50:
             raise ServiceInvalidRequestError("num_results value must be less than 50.")
-        
+
         logger.info(
             f"Received request for bing web search with \
                 params:\nquery: {query}\nnum_results: {num_results}"
         )
-        
+
         params = {
             "engine": "bing",
             "q": query,
             "api_key": self.__api_key,
         }
-        
-        # Perform the search using serpapi
-        search_result = serpapi.search(params=params)
+
+        # Perform the search using the SerpApi HTTP API
+        search_result = await self.__get_async(params, timeout or self.__timeout)
         organic_results = search_result.get("organic_results", [])
         references = []
         answer = ""
@@ -67,23 +99,52 @@ class BingSerApiConnector(SearchConnectorBase):
                     "link": result.get("link"),
                     "snippet": result.get("snippet") or ""
                 }
-                for index, result in enumerate(search_result.get("organic_results", [])[:num_results], start=1) 
+                for index, result in enumerate(organic_results[:num_results], start=1)
             ]
-        
+
             # Build answer string with snippets and reference numbers
             answer = " ".join(f"{self.__clean_snippet(ref['snippet'])}[{ref['no']}]" for ref in references)
 
-        return json.dumps({
+        return {
             "organic_result": {
                 "answer": answer if answer else "No answer found.",
                 "references": references if references else []
             }
-        })
-        
+        }
+
+    async def __get_async(self, params: dict[str, Any], timeout: float) -> dict[str, Any]:
+        """
+        Call the SerpApi search endpoint without blocking the event loop.
+
+        Args:
+            params (dict): Query string parameters.
+            timeout (float): Timeout in seconds for the call.
+
+        Returns:
+            dict: The decoded JSON response.
+        """
+        client = self.__client or get_http_client()
+        try:
+            async with _search_semaphore:
+                response = await client.get(f"{self.__base_url}/search.json", params=params, timeout=timeout)
+            response.raise_for_status()
+            search_result = response.json()
+        except httpx.TimeoutException as e:
+            raise ServiceResponseException(f"Bing web search timed out after {timeout} seconds.") from e
+        except httpx.HTTPStatusError as e:
+            # the request URL carries the API key, so neither the message nor the cause may include it
+            raise ServiceResponseException(f"Bing web search failed with HTTP {e.response.status_code}.") from None
+        except httpx.HTTPError as e:
+            raise ServiceResponseException(f"Bing web search failed: {type(e).__name__}.") from None
+
+        if "error" in search_result:
+            raise ServiceResponseException(f"Bing web search failed: {search_result['error']}")
+        return search_result
+
     def __clean_snippet(self, snippet):
         """
         Remove reference numbers from snippet text.
         """
         if not isinstance(snippet, str):
             return ""
-        return re.sub(r"\[\d+\](\s*\.)?", "", snippet).strip()
\ No newline at end of file
+        return re.sub(r"\[\d+\](\s*\.)?", "", snippet).strip()
@@ -0,0 +1,148 @@
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from dotenv import load_dotenv
+
+from .connector import SearchConnectorBase
+from ...utils.query_normalizer import normalize_query
+from ...utils.telemetry import CACHE_LOOKUPS, CACHE_REFRESHES, CACHE_ERRORS, CACHE_ENTRIES
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+WEB_SEARCH_CACHE_SIZE = int(os.getenv("WEB_SEARCH_CACHE_SIZE", "256"))
+# Results are fresh for this long...
+WEB_SEARCH_CACHE_TTL_SECONDS = float(os.getenv("WEB_SEARCH_CACHE_TTL_SECONDS", "600"))
+# ...and are then still served for this long while a background search refreshes them.
+WEB_SEARCH_CACHE_STALE_SECONDS = float(os.getenv("WEB_SEARCH_CACHE_STALE_SECONDS", "3600"))
+
+_CacheKey = Tuple[str, int]
+CACHE_NAME = "web_search"
+
+class _CachedSearch:
+    __slots__ = ("result", "fetched_at")
+
+    def __init__(self, result: Dict[str, Dict[str, Any]], fetched_at: float) -> None:
+        self.result = result
+        self.fetched_at = fetched_at
+
+class CachedSearchConnector(SearchConnectorBase):
+    """
+    Search connector that serves repeated queries of any wrapped connector from an in-process cache.
+
+    Queries are keyed by their normalized text and the number of results. Fresh entries are returned
+    as is; stale entries are returned immediately while a single background search refreshes them;
+    expired entries and misses wait for the wrapped connector, with concurrent identical misses sharing
+    one search. The least recently used entry is evicted once WEB_SEARCH_CACHE_SIZE is reached.
+    Hits, stale hits, misses, refreshes, errors and entries are exported on /metrics as the
+    "web_search" cache.
+    """
+    __inner: "SearchConnectorBase"
+    __entries: "OrderedDict[_CacheKey, _CachedSearch]"
+    __pending: Dict[_CacheKey, "asyncio.Task"]
+    __waiters: Dict[_CacheKey, int]
+
+    def __init__(self, inner: SearchConnectorBase, max_entries: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None, stale_seconds: Optional[float] = None) -> None:
+        """
+        Wrap a search connector with the cache.
+
+        Args:
+            inner (SearchConnectorBase): The connector to cache.
+            max_entries (int, optional): Maximum number of cached queries. Defaults to WEB_SEARCH_CACHE_SIZE.
+            ttl_seconds (float, optional): Time results stay fresh. Defaults to WEB_SEARCH_CACHE_TTL_SECONDS.
+            stale_seconds (float, optional): Time stale results are still served. Defaults to WEB_SEARCH_CACHE_STALE_SECONDS.
+        """
+        self.__inner = inner
+        self.__entries = OrderedDict()
+        self.__pending = {}
+        self.__waiters = {}
+        self.__max_entries = max_entries or WEB_SEARCH_CACHE_SIZE
+        self.__ttl_seconds = WEB_SEARCH_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.__stale_seconds = WEB_SEARCH_CACHE_STALE_SECONDS if stale_seconds is None else stale_seconds
+
+    async def search_async(self, query: str, num_results: int = 1, **kwargs: Any) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns the search results of the query, from the cache when possible.
+
+        Args:
+            query (str): The search query.
+            num_results (int, optional): Number of results to return. Defaults to 1.
+            **kwargs: Additional arguments passed to the wrapped connector.
+
+        Returns:
+            dict: The search results.
+        """
+        key = (normalize_query(query), num_results)
+        entry = self.__entries.get(key)
+        age = time.monotonic() - entry.fetched_at if entry else None
+
+        if entry and age <= self.__ttl_seconds:
+            CACHE_LOOKUPS.labels(CACHE_NAME, "hits").inc()
+            self.__entries.move_to_end(key)
+            return entry.result
+
+        if entry and age <= self.__ttl_seconds + self.__stale_seconds:
+            CACHE_LOOKUPS.labels(CACHE_NAME, "stale_hits").inc()
+            self.__entries.move_to_end(key)
+            if key not in self.__pending:
+                CACHE_REFRESHES.labels(CACHE_NAME).inc()
+                self.__fetch(key, query, num_results, kwargs)
+            return entry.result
+
+        CACHE_LOOKUPS.labels(CACHE_NAME, "misses").inc()
+        task = self.__fetch(key, query, num_results, kwargs)
+        self.__waiters[key] = self.__waiters.get(key, 0) + 1
+        try:
+            # shielded so a caller that gives up does not cancel the search other callers still wait for
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self.__waiters[key] == 1:
+                # nobody else needs the result: stop the paid search too
+                task.cancel()
+            raise
+        finally:
+            self.__waiters[key] -= 1
+            if not self.__waiters[key]:
+                del self.__waiters[key]
+
+    def clear(self) -> None:
+        """
+        Drop every cached result.
+        """
+        self.__entries.clear()
+        CACHE_ENTRIES.labels(CACHE_NAME).set(0)
+
+    def __fetch(self, key: _CacheKey, query: str, num_results: int, kwargs: Dict[str, Any]) -> "asyncio.Task":
+        """
+        Start a search of the wrapped connector, or join the one already running for the key.
+
+        Returns:
+            asyncio.Task: The search, which stores its result in the cache.
+        """
+        task = self.__pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self.__search_and_store_async(key, query, num_results, kwargs))
+            self.__pending[key] = task
+            task.add_done_callback(lambda done: self.__fetch_done(key, done))
+        return task
+
+    async def __search_and_store_async(self, key: _CacheKey, query: str, num_results: int,
+                                       kwargs: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        result = await self.__inner.search_async(query, num_results=num_results, **kwargs)
+        self.__entries[key] = _CachedSearch(result, time.monotonic())
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.__max_entries:
+            self.__entries.popitem(last=False)
+        CACHE_ENTRIES.labels(CACHE_NAME).set(len(self.__entries))
+        return result
+
+    def __fetch_done(self, key: _CacheKey, task: "asyncio.Task") -> None:
+        self.__pending.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            # a failed refresh keeps serving the stale result until it expires
+            CACHE_ERRORS.labels(CACHE_NAME).inc()
+            logger.warning(f"Web search for '{key[0]}' failed: {task.exception()}")
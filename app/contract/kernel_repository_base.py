@@ -6,6 +6,8 @@ from semantic_kernel.contents import ChatHistory
 from semantic_kernel.functions.function_result import FunctionResult
 from semantic_kernel.contents.streaming_content_mixin import StreamingContentMixin
 
+from ..models.query_plan_model import QueryPlan
+
 
 
 class KernelRepositoryBase(ABC):
@@ -20,18 +22,20 @@ class KernelRepositoryBase(ABC):
     async def ask_async(
         self, 
         query: str,
-        kb_results:Iterable[Optional[Dict[str, Any]]] | None, 
-        web_results:Dict[str, Dict[str, Any]] | None,
-        stream:bool = False
+        kb_results:Iterable[Optional[Dict[str, Any]]] | str | None, 
+        web_results:Dict[str, Dict[str, Any]] | str | None,
+        stream:bool = False,
+        history:str = ""
     ) -> AsyncGenerator[list[StreamingContentMixin] | FunctionResult | list[FunctionResult], Any] | str:
         """
         Asynchronously asks a question to the kernel and returns the response.
 
         Args:
             query (str): The user query.
-            kb_results (Iterable[Optional[Dict[str, Any]]] | None): Knowledge base results.
-            web_results (Dict[str, Dict[str, Any]] | None): Web search results.
+            kb_results (Iterable[Optional[Dict[str, Any]]] | str | None): Knowledge base results, raw or rendered.
+            web_results (Dict[str, Dict[str, Any]] | str | None): Web search results, raw or rendered.
             stream (bool, optional): Whether to stream the response. Defaults to False.
+            history (str, optional): The rendered conversation history. Defaults to "".
 
         Returns:
             AsyncGenerator or str: The response from the kernel.
@@ -66,6 +70,38 @@ class KernelRepositoryBase(ABC):
         """
         pass
     
+    @abstractmethod
+    async def plan_query_async(self, query:str, chat_history: ChatHistory)->QueryPlan:
+        """
+        Asynchronously plans the retrieval of a query in a single call: knowledge base sub-queries,
+        a self-contained web search query and whether the history can answer it.
+
+        Args:
+            query (str): The user query.
+            chat_history (ChatHistory): The conversation history.
+
+        Returns:
+            QueryPlan: The validated plan.
+
+        Raises:
+            ValueError: If the model output is not a valid plan.
+        """
+        pass
+    
+    @abstractmethod
+    def check_history_stream_async(self, query:str, chat_history: ChatHistory) -> AsyncGenerator[str, None]:
+        """
+        Streams the check of the conversation history for relevant context.
+
+        Args:
+            query (str): The user query.
+            chat_history (ChatHistory): The conversation history.
+
+        Yields:
+            str: The text chunks of the history check, as the model produces them.
+        """
+        pass
+    
     @abstractmethod
     async def check_history_async(self, query:str, chat_history: ChatHistory) -> str:
         """
@@ -78,4 +114,17 @@ class KernelRepositoryBase(ABC):
         Returns:
             str: The result of the history check.
         """
+        pass
+    
+    @abstractmethod
+    async def summarize_conversation_async(self, transcript: str) -> str:
+        """
+        Asynchronously summarizes a conversation transcript.
+
+        Args:
+            transcript (str): The conversation transcript.
+
+        Returns:
+            str: The summary.
+        """
         pass
\ No newline at end of file
@@ -1,6 +1,8 @@
 from abc import abstractmethod, ABC
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+
+from numpy import ndarray
 
 from ..models.knowledge_base_model import PodCastKnowledgeBaseModel
 
@@ -17,6 +19,42 @@ class MemoryRepositoryBase(ABC):
         """
         pass
     
+    @abstractmethod
+    async def embed_texts_async(self, texts: List[str]) -> ndarray:
+        """
+        Generate the embeddings of several texts in one request asynchronously.
+
+        Args:
+            texts (List[str]): The texts to embed.
+
+        Returns:
+            ndarray: One embedding per text, in order.
+        """
+        pass
+    
+    @abstractmethod
+    async def save_memory_batch_async(self, metadata: List[PodCastKnowledgeBaseModel], embeddings: ndarray, collection:str=INDEX_NAME) -> None:
+        """
+        Save several already embedded memories (knowledge base entries) in one upsert asynchronously.
+
+        Args:
+            metadata (List[PodCastKnowledgeBaseModel]): The metadata to save.
+            embeddings (ndarray): The embedding of each entry, in order.
+            collection (str, optional): The collection/index name. Defaults to INDEX_NAME.
+        """
+        pass
+    
+    @abstractmethod
+    async def delete_memory_batch_async(self, ids: List[str], collection:str=INDEX_NAME) -> None:
+        """
+        Delete several memories (knowledge base entries) asynchronously.
+
+        Args:
+            ids (List[str]): The ids of the entries to delete.
+            collection (str, optional): The collection/index name. Defaults to INDEX_NAME.
+        """
+        pass
+    
     @abstractmethod
     async def search_memory_async(self, query:str,collection:str=INDEX_NAME,min_relevance_score:float=0.6)->Optional[Dict[str, Any]]:
         """
@@ -32,6 +70,38 @@ class MemoryRepositoryBase(ABC):
         """
         pass
     
+    @abstractmethod
+    async def search_memory_batch_async(self, queries:List[str],collection:str=INDEX_NAME,min_relevance_score:float=0.6)->List[Optional[Dict[str, Any]]]:
+        """
+        Search the memory (knowledge base) for several queries at once asynchronously.
+
+        Args:
+            queries (List[str]): The search queries.
+            collection (str, optional): The collection/index name. Defaults to INDEX_NAME.
+            min_relevance_score (float, optional): Minimum relevance score for results. Defaults to 0.6.
+
+        Returns:
+            List[Optional[Dict[str, Any]]]: The search result of each query, in order, or None where nothing matched.
+        """
+        pass
+    
+    @abstractmethod
+    async def search_memory_top_k_batch_async(self, queries:List[str],limit:int=5,collection:str=INDEX_NAME,min_relevance_score:float=0.6)->List[List[Dict[str, Any]]]:
+        """
+        Search the memory (knowledge base) for the top k results of several queries at once asynchronously.
+
+        Args:
+            queries (List[str]): The search queries.
+            limit (int, optional): Maximum number of results per query. Defaults to 5.
+            collection (str, optional): The collection/index name. Defaults to INDEX_NAME.
+            min_relevance_score (float, optional): Minimum relevance score for results. Defaults to 0.6.
+
+        Returns:
+            List[List[Dict[str, Any]]]: The results of each query, in order and best first. Every result also
+                carries its "embedding".
+        """
+        pass
+    
     @abstractmethod
     async def initialize_knowledge_base_async(self) -> None:
         """
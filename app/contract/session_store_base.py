@@ -0,0 +1,74 @@
+from abc import abstractmethod, ABC
+from typing import List, Optional
+
+from semantic_kernel.contents import ChatHistory, ChatMessageContent
+
+
+class SessionStoreBase(ABC):
+    @abstractmethod
+    async def load_async(self, session_id: str) -> Optional[ChatHistory]:
+        """
+        Load the chat history of a session.
+
+        Args:
+            session_id (str): The session id.
+
+        Returns:
+            Optional[ChatHistory]: A copy of the session history, or None if the session is unknown or expired.
+        """
+        pass
+
+    @abstractmethod
+    async def get_version_async(self, session_id: str) -> Optional[int]:
+        """
+        Get the version of a session, a counter that changes with every write to it.
+
+        Args:
+            session_id (str): The session id.
+
+        Returns:
+            Optional[int]: The session version, or None if the session is unknown or expired.
+        """
+        pass
+
+    @abstractmethod
+    async def append_async(self, session_id: str, messages: List[ChatMessageContent]) -> int:
+        """
+        Append messages to a session, creating it if needed.
+
+        Args:
+            session_id (str): The session id.
+            messages (List[ChatMessageContent]): The new messages, in order.
+
+        Returns:
+            int: The version of the session after the append.
+        """
+        pass
+
+    @abstractmethod
+    async def replace_head_async(self, session_id: str, head_length: int, messages: List[ChatMessageContent],
+                                 expected_version: Optional[int] = None) -> bool:
+        """
+        Replace the oldest messages of a session, keeping any message appended after them.
+
+        Args:
+            session_id (str): The session id.
+            head_length (int): Number of oldest messages to replace.
+            messages (List[ChatMessageContent]): The messages that take their place.
+            expected_version (int, optional): Only replace the head if the session is still at this version,
+                i.e. head_length was computed from its current messages. Defaults to replacing unconditionally.
+
+        Returns:
+            bool: True if the head was replaced, False if the session is unknown or changed since expected_version.
+        """
+        pass
+
+    @abstractmethod
+    async def delete_async(self, session_id: str) -> None:
+        """
+        Delete a session.
+
+        Args:
+            session_id (str): The session id.
+        """
+        pass
@@ -1,4 +1,8 @@
+import os
 import logging
+from functools import lru_cache
+from typing import Optional
+from dotenv import load_dotenv
 
 from fastapi import Depends
 
@@ -6,17 +10,41 @@ from fastapi import Depends
 from .services.george_qa_service import GeorgeQAService
 from .repository.kernel_repository import KernelRepository
 from .repository.knowledge_base_repository import KnowledgeBaseRepository
+from .repository.local_knowledge_base_repository import LocalKnowledgeBaseRepository
+from .contract.memory_repository_base import MemoryRepositoryBase
+from .contract.session_store_base import SessionStoreBase
+from .repository.memory_session_repository import MemorySessionRepository
+from .repository.sqlite_session_repository import SqliteSessionRepository
 from .services.chat_history_service import ChatHistoryService
 from .services.knowledge_base_service import KnowledgeBaseService
+from .services.answer_cache_service import AnswerCacheService, ANSWER_CACHE_SIZE
+from .services.ingestion_job_service import IngestionJobService
+from .services.history_compaction_service import HistoryCompactionService
+from .connectors.search_engine.connector import SearchConnectorBase
 from .connectors.search_engine.bing_serapi_connector import BingSerApiConnector
+from .connectors.search_engine.cached_search_connector import CachedSearchConnector, WEB_SEARCH_CACHE_SIZE
+load_dotenv()
 logger = logging.getLogger(__name__)
 
+# Knowledge base backend: "azure" (Azure Cognitive Search) or "local" (in-process memory-mapped vector store)
+KB_BACKEND = os.getenv("KB_BACKEND", "azure").lower()
+# Conversation session store: "sqlite" (in-memory LRU in front of a local SQLite database) or "memory" (in-process only)
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "sqlite").lower()
+
 # Provides an instance of KernelRepository for dependency injection
 def get_kernel_repository():
     return KernelRepository()
 
-# Provides an instance of KnowledgeBaseRepository for dependency injection
-def get_knowledge_base_repository():
+# Provides the knowledge base repository selected by KB_BACKEND for dependency injection
+def get_knowledge_base_repository() -> MemoryRepositoryBase:
+    """
+    Provides the knowledge base repository selected by KB_BACKEND.
+
+    Returns:
+        MemoryRepositoryBase: The local or the Azure Cognitive Search knowledge base repository.
+    """
+    if KB_BACKEND == "local":
+        return LocalKnowledgeBaseRepository()
     return KnowledgeBaseRepository()
 
 # Provides an instance of BingSerApiConnector for dependency injection
@@ -29,13 +57,77 @@ def get_bing_serapi_connector():
     """
     return BingSerApiConnector()
 
+# Provides the shared web search connector, cached unless WEB_SEARCH_CACHE_SIZE is 0
+@lru_cache(maxsize=1)
+def get_search_connector() -> SearchConnectorBase:
+    """
+    Provides the shared web search connector; the cache is shared by every request of the process.
+
+    Returns:
+        SearchConnectorBase: The Bing search connector, wrapped with the web search cache unless it is disabled.
+    """
+    connector = get_bing_serapi_connector()
+    return CachedSearchConnector(connector) if WEB_SEARCH_CACHE_SIZE > 0 else connector
+
+# Provides the shared AnswerCacheService for dependency injection, unless ANSWER_CACHE_SIZE is 0
+def get_answer_cache_service() -> Optional[AnswerCacheService]:
+    """
+    Provides the shared AnswerCacheService for dependency injection.
+
+    Returns:
+        Optional[AnswerCacheService]: The answer cache instance, or None if ANSWER_CACHE_SIZE is 0.
+    """
+    return AnswerCacheService() if ANSWER_CACHE_SIZE > 0 else None
+
+# Provides the shared IngestionJobService for dependency injection
+def get_ingestion_job_service():
+    """
+    Provides the shared IngestionJobService for dependency injection.
+
+    Returns:
+        IngestionJobService: The background ingestion job service.
+    """
+    return IngestionJobService()
+
+# Provides the conversation session store selected by SESSION_BACKEND
+def get_session_store() -> SessionStoreBase:
+    """
+    Provides the conversation session store selected by SESSION_BACKEND.
+
+    Returns:
+        SessionStoreBase: The in-memory session store, backed by SQLite unless SESSION_BACKEND is "memory".
+    """
+    if SESSION_BACKEND == "memory":
+        return MemorySessionRepository()
+    return MemorySessionRepository(backend=SqliteSessionRepository())
+
+# Provides an instance of ChatHistoryService for dependency injection
+def get_chat_history():
+    """
+    Provides an instance of ChatHistoryService, backed by the session store, for dependency injection.
+
+    Returns:
+        ChatHistoryService: The chat history service instance.
+    """
+    return ChatHistoryService(get_session_store())
+
+# Provides the shared HistoryCompactionService for dependency injection
+def get_history_compaction_service():
+    """
+    Provides the shared HistoryCompactionService for dependency injection.
+
+    Returns:
+        HistoryCompactionService: The conversation history compaction service.
+    """
+    return HistoryCompactionService(get_kernel_repository(), get_chat_history())
+
 # Provides an instance of KnowledgeBaseService, initialized with a KnowledgeBaseRepository
-def get_knowledge_base_service(kb: KnowledgeBaseRepository = Depends(get_knowledge_base_repository)):
+def get_knowledge_base_service(kb: MemoryRepositoryBase = Depends(get_knowledge_base_repository)):
     """
     Provides an instance of KnowledgeBaseService, initialized with a KnowledgeBaseRepository.
 
     Args:
-        kb (KnowledgeBaseRepository): The knowledge base repository.
+        kb (MemoryRepositoryBase): The knowledge base repository.
 
     Returns:
         KnowledgeBaseService: The knowledge base service instance.
@@ -46,37 +138,33 @@ def get_knowledge_base_service(kb: KnowledgeBaseRepository = Depends(get_knowled
 # Provides an instance of GeorgeQAService, initialized with a KernelRepository
 def get_george_ask_service(kernel: KernelRepository = Depends(get_kernel_repository),
                            knowledge_base: KnowledgeBaseRepository = Depends(get_knowledge_base_service),
-                           search_connector: BingSerApiConnector = Depends(get_bing_serapi_connector)):
+                           search_connector: SearchConnectorBase = Depends(get_search_connector),
+                           answer_cache: Optional[AnswerCacheService] = Depends(get_answer_cache_service),
+                           chat_history_service: ChatHistoryService = Depends(get_chat_history),
+                           history_compaction: HistoryCompactionService = Depends(get_history_compaction_service)):
     """
-    Provides an instance of GeorgeQAService, initialized with a KernelRepository, KnowledgeBaseRepository, and BingSerApiConnector.
+    Provides an instance of GeorgeQAService, initialized with a KernelRepository, KnowledgeBaseRepository, SearchConnectorBase, AnswerCacheService, ChatHistoryService and HistoryCompactionService.
 
     Args:
         kernel (KernelRepository): The kernel repository.
         knowledge_base (KnowledgeBaseRepository): The knowledge base repository.
-        search_connector (BingSerApiConnector): The Bing search connector.
+        search_connector (SearchConnectorBase): The (cached) web search connector.
+        answer_cache (AnswerCacheService, optional): The answer cache, None when it is disabled.
+        chat_history_service (ChatHistoryService): The chat history service backed by the session store.
+        history_compaction (HistoryCompactionService): The conversation history compaction service.
 
     Returns:
         GeorgeQAService: The Q&A service instance.
     """
     logger.info("Initializing George Q and A Service")
-    return GeorgeQAService(kernel,knowledge_base,search_connector)
-    
-# Provides an instance of ChatHistoryService for dependency injection
-def get_chat_history():
-    """
-    Provides an instance of ChatHistoryService for dependency injection.
-
-    Returns:
-        ChatHistoryService: The chat history service instance.
-    """
-    return ChatHistoryService()
+    return GeorgeQAService(kernel,knowledge_base,search_connector,answer_cache,chat_history_service,history_compaction)
 
-# Provides an instance of KnowledgeBaseService with a new KnowledgeBaseRepository
+# Provides an instance of KnowledgeBaseService with the configured knowledge base repository
 def get_memory_service():
     """
-    Provides an instance of KnowledgeBaseService with a new KnowledgeBaseRepository.
+    Provides an instance of KnowledgeBaseService with the knowledge base repository selected by KB_BACKEND.
 
     Returns:
         KnowledgeBaseService: The knowledge base service instance.
     """
-    return KnowledgeBaseService(KnowledgeBaseRepository())
\ No newline at end of file
+    return KnowledgeBaseService(get_knowledge_base_repository())
\ No newline at end of file
@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from ..utils.telemetry import render_metrics
+
+
+router = APIRouter()
+
+@router.get('/metrics', include_in_schema=False)
+async def metrics() -> Response:
+    """
+    Expose the pipeline stage and request latency histograms, the model usage and the cache counters to Prometheus.
+
+    Returns:
+        Response: The metrics in the Prometheus text format.
+    """
+    content, media_type = render_metrics()
+    return Response(content=content, media_type=media_type)
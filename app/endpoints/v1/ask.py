@@ -1,8 +1,9 @@
 import logging
 import asyncio
 import json
+from typing import Dict, Optional
 
-from fastapi import APIRouter, Query, HTTPException, Request, Depends
+from fastapi import APIRouter, Query, HTTPException, Request, Depends, Security
 from fastapi.responses import StreamingResponse
 
 from semantic_kernel.contents import ChatHistory
@@ -11,8 +12,8 @@ from ...models.request_body import RequestBody
 from ...services.george_qa_service import GeorgeQAService
 from ...services.chat_history_service import ChatHistoryService
 from ...dependencies import get_george_ask_service, get_chat_history
-from ...utils.limiter import limiter
-from ...utils.security import get_api_key
+from ...utils.limiter import limiter, ASK_RATE_LIMIT
+from ...utils.security import get_api_key, api_key_header
 
 
 api = "George API Q&A"
@@ -20,34 +21,40 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/askgeorge")
 
 @router.post('/ask/stream', tags=[api])
-@limiter.limit("5/hour")
+@limiter.limit(ASK_RATE_LIMIT)
 async def ask_streaming(
     request: Request,
     request_body: RequestBody,
     george_service: GeorgeQAService = Depends(get_george_ask_service),
     history: ChatHistoryService = Depends(get_chat_history),
+    api_key: Optional[str] = Security(api_key_header),
 ) -> StreamingResponse:
     """
     Handles a streaming Q&A request to George. Streams the response as server-sent events.
 
     Args:
         request (Request): The incoming HTTP request.
-        request_body (RequestBody): The request payload containing the query and chat history.
+        request_body (RequestBody): The request payload containing the query and either a session id or the chat history.
         george_service (GeorgeQAService): Service for handling Q&A logic.
         history (ChatHistoryService): Service for managing chat history.
+        api_key (str, optional): The API key of the client, if any; the token usage is accounted to it.
 
     Returns:
         StreamingResponse: The streaming response with the answer.
     """
     try:
-        # Load or initialize chat history
-        chat_history: ChatHistory = (
-            history.load_chat_history(request_body.chat_history)
-            if request_body.chat_history else ChatHistory()
-        )
+        # Load the server-side session, or the history uploaded by a legacy client, or start a new one
+        if request_body.session_id:
+            chat_history: ChatHistory = await history.load_session_async(request_body.session_id)
+        else:
+            chat_history: ChatHistory = (
+                history.load_chat_history(request_body.chat_history)
+                if request_body.chat_history else ChatHistory()
+            )
 
         return StreamingResponse(
-            content=george_service.ask_streaming_async(request_body.query, chat_history),
+            content=george_service.ask_streaming_async(request_body.query, chat_history, request_body.session_id,
+                                                       api_key=api_key, include_usage=request_body.include_usage),
             media_type="text/event-stream"
         )
 
@@ -56,4 +63,34 @@ async def ask_streaming(
         raise HTTPException(status_code=400, detail=f"Invalid input: {e}")
     except Exception as e:
         logger.error(f"Failed to process query for /ask/stream: {e} | Request: {request_body.model_dump()}")
-        raise HTTPException(status_code=500, detail="Failed to process query")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to process query")
+
+@router.post('/sessions', tags=[api])
+async def create_session(history: ChatHistoryService = Depends(get_chat_history)) -> Dict[str, str]:
+    """
+    Starts a conversation session whose history is kept on the server.
+
+    Args:
+        history (ChatHistoryService): Service for managing chat history.
+
+    Returns:
+        Dict[str, str]: The new session id, to be sent with each question of the conversation.
+    """
+    return {"session_id": history.new_session_id()}
+
+@router.delete('/sessions/{session_id}', tags=[api], status_code=204)
+async def delete_session(session_id: str, history: ChatHistoryService = Depends(get_chat_history)) -> None:
+    """
+    Ends a conversation session and deletes its history.
+
+    Args:
+        session_id (str): The session id.
+        history (ChatHistoryService): Service for managing chat history.
+    """
+    try:
+        await history.delete_session_async(session_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to delete session {session_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to delete session")
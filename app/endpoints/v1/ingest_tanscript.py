@@ -1,38 +1,170 @@
 import logging
 
-from fastapi import APIRouter,HTTPException, Request, Depends
+from fastapi import APIRouter,HTTPException, Request, Depends, Query
 
 from ...services.knowledge_base_service import KnowledgeBaseService
-from ...dependencies import get_knowledge_base_service
+from ...services.ingestion_job_service import IngestionJobService
+from ...dependencies import get_knowledge_base_service, get_ingestion_job_service
 from ...utils.security import get_api_key
+from ...utils.transcript_upload_parser import iter_uploaded_segments
 
 
 api = "George API Q&A"
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/ingest")
 
-@router.post('/transcripts',tags=[api])
+@router.post('/transcripts',tags=[api], status_code=202)
 async def ingest(
     request:Request,
     kb_service: KnowledgeBaseService = Depends(get_knowledge_base_service),
-    api_key: str = Depends(get_api_key)
+    job_service: IngestionJobService = Depends(get_ingestion_job_service),
+    api_key: str = Depends(get_api_key),
+    full: bool = Query(False, description="Re-ingest every segment even if it did not change.")
 ):
     """
-    Endpoint to ingest transcripts into the knowledge base.
+    Endpoint to submit a background ingestion of the transcripts into the knowledge base.
+
+    Only new and changed segments are written and removed ones are deleted, unless a full re-ingest is requested.
+    Progress is available from the job status endpoint.
 
     Args:
         request (Request): The incoming HTTP request.
         kb_service (KnowledgeBaseService): Service for ingesting transcripts.
+        job_service (IngestionJobService): Service running the ingestion jobs.
+        full (bool): Re-ingest every segment even if it did not change.
+
+    Returns:
+        dict: Accepted message, status code and the queued job.
+    """
+    try:
+        job = job_service.submit(kb_service, full=full)
+        return {
+            "message": "Accepted",
+            "status_code": 202,
+            "job": job.model_dump()
+        }
+    except Exception as e:
+        logger.error(f"Failed to process: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to process query: {e}")
+
+@router.get('/jobs',tags=[api])
+async def list_jobs(
+    job_service: IngestionJobService = Depends(get_ingestion_job_service),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Endpoint to list the ingestion jobs, newest first.
+
+    Args:
+        job_service (IngestionJobService): Service running the ingestion jobs.
+
+    Returns:
+        dict: The tracked jobs.
+    """
+    return {"jobs": [job.model_dump() for job in job_service.list()]}
+
+@router.get('/jobs/{job_id}',tags=[api])
+async def get_job(
+    job_id: str,
+    job_service: IngestionJobService = Depends(get_ingestion_job_service),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Endpoint to get the status of an ingestion job: per-transcript progress, segments/s, errors and ETA.
+
+    Args:
+        job_id (str): The job id.
+        job_service (IngestionJobService): Service running the ingestion jobs.
+
+    Returns:
+        dict: The job.
+    """
+    job = job_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return {"job": job.model_dump()}
+
+@router.post('/jobs/{job_id}/cancel',tags=[api])
+async def cancel_job(
+    job_id: str,
+    job_service: IngestionJobService = Depends(get_ingestion_job_service),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Endpoint to cancel a queued or running ingestion job.
+
+    Args:
+        job_id (str): The job id.
+        job_service (IngestionJobService): Service running the ingestion jobs.
+
+    Returns:
+        dict: The job.
+    """
+    try:
+        return {"job": job_service.cancel(job_id).model_dump()}
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.post('/jobs/{job_id}/resume',tags=[api])
+async def resume_job(
+    job_id: str,
+    job_service: IngestionJobService = Depends(get_ingestion_job_service),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Endpoint to resume a cancelled or failed ingestion job. Segments saved before it stopped are skipped.
+
+    Args:
+        job_id (str): The job id.
+        job_service (IngestionJobService): Service running the ingestion jobs.
+
+    Returns:
+        dict: The job.
+    """
+    try:
+        return {"job": job_service.resume(job_id).model_dump()}
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.post('/transcripts/upload',tags=[api])
+async def ingest_upload(
+    request:Request,
+    kb_service: KnowledgeBaseService = Depends(get_knowledge_base_service),
+    api_key: str = Depends(get_api_key),
+    full: bool = Query(False, description="Re-ingest every uploaded segment even if it did not change.")
+):
+    """
+    Endpoint to ingest uploaded transcripts into the knowledge base.
+
+    The body is NDJSON (one transcript or one segment per line), sent as the raw body with an
+    ``application/x-ndjson`` content type or as the file parts of a ``multipart/form-data`` form.
+    It is parsed while it is received and fed straight into ingestion, so memory use does not grow
+    with the upload size. Segments not in the upload are left untouched.
+
+    Args:
+        request (Request): The incoming HTTP request carrying the transcripts.
+        kb_service (KnowledgeBaseService): Service for ingesting transcripts.
+        full (bool): Re-ingest every uploaded segment even if it did not change.
 
     Returns:
-        dict: Success message and status code.
+        dict: Success message, status code and the ingestion report with the added/updated/skipped diff.
     """
     try:
-        await kb_service.ingest_transcripts_async()
+        segments = iter_uploaded_segments(request.stream(), request.headers.get("content-type", ""))
+        report = await kb_service.ingest_segments_async(segments, full=full)
         return {
             "message": "Success",
-            "status_code": 200
+            "status_code": 200,
+            "report": report.model_dump()
         }
+    except ValueError as e:
+        # segments before the invalid line are already ingested and recorded in the manifest
+        logger.error(f"Invalid transcript upload: {e}")
+        raise HTTPException(status_code=400, detail=f"Invalid transcript upload: {e}")
     except Exception as e:
         logger.error(f"Failed to process: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to process query: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to process upload: {e}")
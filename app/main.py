@@ -1,9 +1,11 @@
 import os
 import time
 import logging
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
 from fastapi import FastAPI, Request
+from opentelemetry import context, trace
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from slowapi.errors import RateLimitExceeded
@@ -11,10 +13,14 @@ from slowapi import _rate_limit_exceeded_handler
 
 from .utils.get_client_ip import get_client_ip
 from .utils.limiter import limiter
+from .utils.http_client import close_http_client
+from .utils.telemetry import configure_tracing, shutdown_tracing, start_span, observe_response_body, REQUEST_DURATION
+from .services.ingestion_job_service import IngestionJobService
 from .endpoints.v1.ask import router as george_router
 from .endpoints.v1.ingest_tanscript import router as ingest_router
+from .endpoints.metrics import router as metrics_router
 from .repository.kernel_repository import KernelRepository
-from .repository.knowledge_base_repository import KnowledgeBaseRepository
+from .dependencies import get_knowledge_base_repository, get_history_compaction_service
 
 # -------------------- Logging & Environment Setup --------------------
 logging.basicConfig(
@@ -23,15 +29,30 @@ logging.basicConfig(
     datefmt="%Y-%m-%d %H:%M:%S",
     force=True
 )
+# httpx logs every request URL at INFO, and the SerpApi URL carries the API key
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logging.getLogger("httpcore").setLevel(logging.WARNING)
 logger = logging.getLogger(__name__)
 
 load_dotenv()
 environment = os.getenv("ENVIRONMENT", "production")
 cors_origins = os.getenv("CORS_ORIGINS", "")
 logger.info(f"Environment: {environment}")
+configure_tracing()
 
 # -------------------- FastAPI App Initialization --------------------
-app = FastAPI(title="GEORGE API", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Release shared resources when the application shuts down.
+    """
+    yield
+    await IngestionJobService().shutdown()
+    await get_history_compaction_service().shutdown()
+    await close_http_client()
+    shutdown_tracing()
+
+app = FastAPI(title="GEORGE API", version="0.1.0", lifespan=lifespan)
 
 # -------------------- CORS Configuration --------------------
 allowed_origins = ["*"] if environment == "development" else [origin.strip() for origin in cors_origins.split(",") if origin.strip()]
@@ -50,26 +71,42 @@ app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 # -------------------- Repository Singletons --------------------
 KernelRepository()
-KnowledgeBaseRepository()
+get_knowledge_base_repository()
 
 # -------------------- Middleware --------------------
 @app.middleware("http")
 async def log_request(request: Request, call_next):
     """
-    Middleware to log each HTTP request with client IP and processing time.
+    Middleware to log each HTTP request with client IP and processing time, and to record its latency
+    until the last byte of the (possibly streamed) body.
     """
     start_time = time.time()
+    started_at = time.perf_counter()
     client_ip = get_client_ip(request)
     logger.info(f"Request from {client_ip} to {request.url}")
+    span = start_span(f"{request.method} {request.url.path}", **{"http.method": request.method, "http.target": request.url.path})
+    # made current only around call_next, so the pipeline stages become children of the request span
+    token = context.attach(trace.set_span_in_context(span))
 
     try:
         response = await call_next(request)
     except Exception as e:
         logger.error(f"Error processing request from {client_ip}: {e}")
         response = JSONResponse(content={"message": "Internal Server Error"}, status_code=500)
+    finally:
+        context.detach(token)
 
     process_time = time.time() - start_time
     logger.info(f"Request from {client_ip} processed in {process_time:.4f} seconds")
+    # unmatched paths share one label so scanners cannot blow up the metric cardinality
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    span.set_attribute("http.status_code", response.status_code)
+    if hasattr(response, "body_iterator"):
+        response.body_iterator = observe_response_body(response.body_iterator, started_at, request.method, route,
+                                                       response.status_code, span)
+    else:
+        REQUEST_DURATION.labels(request.method, route, str(response.status_code)).observe(time.perf_counter() - started_at)
+        span.end()
     return response
 
 @app.middleware("http")
@@ -96,3 +133,4 @@ async def global_exception_handler(request: Request, exc: Exception):
 # -------------------- Routers --------------------
 app.include_router(george_router)
 app.include_router(ingest_router)
+app.include_router(metrics_router)
@@ -0,0 +1,8 @@
+from typing import Any, Dict, List
+
+from pydantic import BaseModel
+
+class CachedAnswer(BaseModel):
+    message: str
+    kb_results: List[Dict[str, Any]] = []
+    web_search_results: Dict[str, Any] = {}
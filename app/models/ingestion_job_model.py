@@ -0,0 +1,33 @@
+from enum import Enum
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
+
+from .ingestion_report_model import IngestionReport
+
+class IngestionJobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+class TranscriptProgress(BaseModel):
+    total: int = 0
+    done: int = 0
+
+class IngestionJob(BaseModel):
+    id: str
+    status: IngestionJobStatus = IngestionJobStatus.QUEUED
+    full: bool = False
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    attempts: int = 0
+    transcripts: Dict[str, TranscriptProgress] = Field(default_factory=dict)
+    total_segments: int = 0
+    processed_segments: int = 0
+    segments_per_second: float = 0.0
+    eta_seconds: Optional[float] = None
+    error_count: int = 0
+    errors: List[str] = Field(default_factory=list)
+    report: IngestionReport = Field(default_factory=IngestionReport)
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+
+class IngestionReport(BaseModel):
+    added: int = 0
+    updated: int = 0
+    skipped: int = 0
+    deleted: int = 0
+    segments: int = 0
+    embedding_batches: int = 0
+    upsert_batches: int = 0
+    seconds: float = 0.0
+    segments_per_second: float = 0.0
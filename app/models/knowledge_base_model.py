@@ -4,7 +4,7 @@ from pydantic import BaseModel
     
 class PodCastKnowledgeBaseModel(BaseModel):
     id: str
-    score: float
+    score: float = 0.0
     podcast_title: str
     content: str
     time_stamp: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,20 @@
+from typing import Dict
+
+from pydantic import BaseModel
+
+class SectionUsage(BaseModel):
+    budget: int = 0
+    used: int = 0
+    items: int = 0
+    dropped: int = 0
+    truncated: int = 0
+
+class PromptBudgetReport(BaseModel):
+    budget: int = 0
+    used: int = 0
+    sections: Dict[str, SectionUsage] = {}
+
+class PromptSections(BaseModel):
+    knowledge_base: str = ""
+    web_search: str = ""
+    history: str = ""
@@ -0,0 +1,21 @@
+from typing import List
+from pydantic import BaseModel, field_validator
+
+class QueryPlan(BaseModel):
+    recomposed_queries: List[str]
+    web_query: str
+
+    @field_validator("recomposed_queries")
+    @classmethod
+    def _non_empty_queries(cls, queries: List[str]) -> List[str]:
+        queries = [query.strip() for query in queries if query and query.strip()]
+        if not queries:
+            raise ValueError("recomposed_queries must contain at least one sub-query")
+        return queries
+
+    @field_validator("web_query")
+    @classmethod
+    def _non_empty_web_query(cls, web_query: str) -> str:
+        if not web_query.strip():
+            raise ValueError("web_query must not be empty")
+        return web_query.strip()
@@ -1,5 +1,10 @@
+from typing import Optional
 from pydantic import BaseModel
 
 class RequestBody(BaseModel):
     query: str
-    chat_history:str
\ No newline at end of file
+    # Legacy clients send the full rendered history; clients with a session send only its id
+    chat_history: Optional[str] = None
+    session_id: Optional[str] = None
+    # Add the token usage of the answer to the final response
+    include_usage: bool = False
@@ -1,9 +1,13 @@
 from pydantic import BaseModel
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+
+from .token_usage_model import TokenUsageReport
 
 class ResponseBody(BaseModel):
     name:str
     message:str
     kb_results: List[Dict[str, Any] | None]
     web_search_results: Any | Dict[str, Dict[str, Any]]
-    chat_history:str
\ No newline at end of file
+    chat_history:Optional[str] = None
+    session_id:Optional[str] = None
+    usage:Optional[TokenUsageReport] = None
@@ -0,0 +1,22 @@
+from enum import Enum
+from typing import Optional
+from pydantic import BaseModel
+
+class Route(str, Enum):
+    GREETING = "greeting"
+    CAPABILITIES = "capabilities"
+    DATETIME = "datetime"
+    RETRIEVAL = "retrieval"
+    HISTORY_AND_RETRIEVAL = "history_and_retrieval"
+
+class RoutingDecision(BaseModel):
+    route: Route
+    # how the route was chosen: the name of the matching rule or "classifier"
+    reason: str
+    score: Optional[float] = None
+    # set for routes answered locally from a template
+    answer: Optional[str] = None
+
+    @property
+    def check_history(self) -> bool:
+        return self.route == Route.HISTORY_AND_RETRIEVAL
@@ -0,0 +1,16 @@
+from typing import Dict
+
+from pydantic import BaseModel
+
+class StageTokenUsage(BaseModel):
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    # calls whose usage was counted locally because the service did not report it
+    estimated_calls: int = 0
+
+class TokenUsageReport(BaseModel):
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    stages: Dict[str, StageTokenUsage] = {}
@@ -22,4 +22,4 @@ class WebSearchEnginePlugin:
         num_results: Annotated[int, "The number of search results to return"] = 2
     ):
         """Returns the search results of the query provided."""
-        return await self.__connector.search(query,num_results)
\ No newline at end of file
+        return await self.__connector.search_async(query,num_results)
\ No newline at end of file
@@ -0,0 +1,113 @@
+import os
+import json
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator
+from dotenv import load_dotenv
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows development machines run a single worker
+    fcntl = None
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+INGEST_MANIFEST_PATH = os.getenv("INGEST_MANIFEST_PATH", ".cache/ingest_manifest.jsonl")
+
+class IngestManifestRepository:
+    """
+    Persistent record of the segments in the index and the content hash they were ingested with.
+
+    The manifest is an append-only JSON-lines log (``{"id": ..., "hash": ...}`` for an upsert,
+    ``{"id": ..., "deleted": true}`` for a removal), so every saved batch can be recorded cheaply
+    while an ingestion runs. ``compact`` rewrites it to one line per live segment.
+    """
+    __path: Path
+    __hashes: Dict[str, str]
+
+    def __init__(self, path: str | Path | None = None) -> None:
+        """
+        Open the manifest.
+
+        Args:
+            path (str | Path, optional): Location of the manifest file. Defaults to INGEST_MANIFEST_PATH.
+        """
+        self.__path = Path(path or INGEST_MANIFEST_PATH)
+        self.__path.parent.mkdir(parents=True, exist_ok=True)
+        self.__hashes = {}
+
+    def load(self) -> Dict[str, str]:
+        """
+        Load the manifest from disk.
+
+        Returns:
+            Dict[str, str]: Content hash of each ingested segment id.
+        """
+        self.__hashes = {}
+        if self.__path.exists():
+            with self.__lock(), open(self.__path, "r", encoding="utf-8") as manifest:
+                for line in manifest:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    if entry.get("deleted"):
+                        self.__hashes.pop(entry["id"], None)
+                    else:
+                        self.__hashes[entry["id"]] = entry["hash"]
+        logger.info(f"Loaded ingest manifest with {len(self.__hashes)} segments from {self.__path}")
+        return dict(self.__hashes)
+
+    def record_upserts(self, hashes: Dict[str, str]) -> None:
+        """
+        Record segments that were written to the index.
+
+        Args:
+            hashes (Dict[str, str]): Content hash of each written segment id.
+        """
+        self.__append({"id": segment_id, "hash": content_hash} for segment_id, content_hash in hashes.items())
+        self.__hashes.update(hashes)
+
+    def record_deletes(self, ids: Iterable[str]) -> None:
+        """
+        Record segments that were removed from the index.
+
+        Args:
+            ids (Iterable[str]): The removed segment ids.
+        """
+        ids = list(ids)
+        self.__append({"id": segment_id, "deleted": True} for segment_id in ids)
+        for segment_id in ids:
+            self.__hashes.pop(segment_id, None)
+
+    def compact(self) -> None:
+        """
+        Rewrite the manifest to a single entry per live segment.
+        """
+        temporary_path = self.__path.with_suffix(self.__path.suffix + ".tmp")
+        with self.__lock():
+            with open(temporary_path, "w", encoding="utf-8") as manifest:
+                manifest.writelines(json.dumps({"id": segment_id, "hash": content_hash}) + "\n"
+                                    for segment_id, content_hash in self.__hashes.items())
+            os.replace(temporary_path, self.__path)
+
+    def __append(self, entries: Iterable[Dict]) -> None:
+        lines = [json.dumps(entry) + "\n" for entry in entries]
+        if not lines:
+            return
+        with self.__lock(), open(self.__path, "a", encoding="utf-8") as manifest:
+            manifest.writelines(lines)
+            manifest.flush()
+
+    @contextmanager
+    def __lock(self) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        with open(self.__path.with_suffix(self.__path.suffix + ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -1,4 +1,5 @@
 from typing import AsyncGenerator, Iterable, Optional, Any, Dict
+import re
 import logging
 from pathlib import Path
 import json
@@ -12,8 +13,12 @@ from semantic_kernel.contents.streaming_content_mixin import StreamingContentMix
 
 from ..utils.singleton_decorator import singleton
 from ..utils.prompt_template_config import Config, get_prompt_template_config
+from ..utils.token_counter import count_tokens
+from ..utils.usage_tracker import record_usage, record_reported_usage, record_result_usage
 from ..services.oai_services import get_completion_service, get_embedding_service
 from ..contract.kernel_repository_base import KernelRepositoryBase
+from ..models.query_plan_model import QueryPlan
+from ..services.chat_history_service import ChatHistoryService
 current_path = Path(__file__).resolve().parent
 plugin_dir = current_path / "../plugins/"
 
@@ -52,18 +57,20 @@ class KernelRepository(KernelRepositoryBase):
     async def ask_async(
         self, 
         query: str,
-        kb_results:Iterable[Optional[Dict[str, Any]]] | None, 
-        web_results:Dict[str, Dict[str, Any]] | None,
-        stream:bool = False)->AsyncGenerator[list[StreamingContentMixin] | FunctionResult | list[FunctionResult], Any] | str:
+        kb_results:Iterable[Optional[Dict[str, Any]]] | str | None, 
+        web_results:Dict[str, Dict[str, Any]] | str | None,
+        stream:bool = False,
+        history:str = "")->AsyncGenerator[list[StreamingContentMixin] | FunctionResult | list[FunctionResult], Any] | str:
         """
         Ask a question to the kernel and get the response.
         """
         try:
             args = KernelArguments(query=query,
                                    knowledge_base=kb_results,
-                                   web_search=web_results)
+                                   web_search=web_results,
+                                   history=history)
             if stream:
-                return self.__ask_stream_async(args)
+                return self.__track_stream_async("qa", self.__ask_stream_async(args), args)
             
             return str(await self.__ask_async(args))
         
@@ -77,7 +84,7 @@ class KernelRepository(KernelRepositoryBase):
         try:
             args = KernelArguments()
             args["query"] = query
-            args["history"] = chat_history
+            args["history"] = ChatHistoryService.render_transcript(chat_history)
             result = await self.__breakdown_query_async(args)
             return str(result)
         except Exception as e:
@@ -89,23 +96,93 @@ class KernelRepository(KernelRepositoryBase):
         """
         try:
             result = await self.__regenerate_query_async(KernelArguments(query=query,
-                                   history=chat_history))
+                                   history=ChatHistoryService.render_transcript(chat_history)))
             return str(result)
         except Exception as e:
             raise e
         
+    async def plan_query_async(self, query:str, chat_history: ChatHistory) -> QueryPlan:
+        """
+        Plan the knowledge base sub-queries and the web search query in a single call.
+        """
+        try:
+            result = await self.__plan_query_async(KernelArguments(query=query,
+                                   history=ChatHistoryService.render_transcript(chat_history)))
+            # tolerate a markdown code fence around the JSON object
+            output = re.sub(r"^```(?:json)?\s*|\s*```$", "", str(result).strip())
+            return QueryPlan.model_validate_json(output)
+        except Exception as e:
+            raise e
+        
     async def check_history_async(self, query:str, chat_history: ChatHistory) -> str:
         """
         Check the conversation history.
         """
         try:
             args = KernelArguments()
-            args["history"] = chat_history
+            args["history"] = ChatHistoryService.render_transcript(chat_history)
             args["query"] = query
             result = await self.__check_history_async(args)
             return str(result)
         except Exception as e:
             raise e
+        
+    async def check_history_stream_async(self, query:str, chat_history: ChatHistory) -> AsyncGenerator[str, None]:
+        """
+        Stream the check of the conversation history.
+        """
+        args = KernelArguments(query=query, history=ChatHistoryService.render_transcript(chat_history))
+        stream = self.__track_stream_async("check_history",
+                                           self.__kernel.invoke_stream(self.__orchestrator['CheckHistory'], args), args)
+        try:
+            async for chunk in stream:
+                yield str(chunk[0])
+        finally:
+            # closed here, in the consumer's task, when the consumer stops early
+            await stream.aclose()
+        
+    async def summarize_conversation_async(self, transcript: str) -> str:
+        """
+        Summarize a conversation transcript with the ConversationSummaryPlugin.
+        """
+        try:
+            result = await self.__kernel.invoke(plugin_name="summarizer", function_name="SummarizeConversation",
+                                                arguments=KernelArguments(input=transcript))
+            # the plugin returns its arguments with the summary under its return key
+            summary = str(result.value["summary"])
+            # the plugin makes its model calls internally and does not pass their usage on
+            record_usage("summarize", count_tokens(transcript), count_tokens(summary), estimated=True)
+            return summary
+        except Exception as e:
+            raise e
+    
+    async def __track_stream_async(self, stage: str, stream: AsyncGenerator[Any, Any],
+                                   args: KernelArguments) -> AsyncGenerator[Any, None]:
+        """
+        Forward a streaming kernel result and record its token usage once it ends or is closed.
+
+        Args:
+            stage (str): The pipeline stage that made the call.
+            stream (AsyncGenerator): The streaming kernel result.
+            args (KernelArguments): The arguments of the call, to count the prompt locally if the
+                stream is closed before the service reports its usage in the last chunk.
+
+        Yields:
+            Any: The chunks of the stream.
+        """
+        usage_metadata: list[Dict[str, Any]] = []
+        completion = ""
+        try:
+            async for chunk in stream:
+                if isinstance(chunk, list) and chunk:
+                    completion += str(chunk[0])
+                    if chunk[0].metadata.get("usage"):
+                        usage_metadata.append(chunk[0].metadata)
+                yield chunk
+        finally:
+            await stream.aclose()
+            prompt = "\n".join(str(value) for value in args.values() if value)
+            record_reported_usage(stage, usage_metadata, prompt, completion)
     async def __check_history_async(self, args: KernelArguments) -> FunctionResult:
         """
         Asynchronously checks the conversation history using the orchestrator plugin.
@@ -117,7 +194,9 @@ class KernelRepository(KernelRepositoryBase):
             FunctionResult: The result of the history check.
         """
         try:
-            return await self.__kernel.invoke(self.__orchestrator['CheckHistory'], args)
+            result = await self.__kernel.invoke(self.__orchestrator['CheckHistory'], args)
+            record_result_usage("check_history", result)
+            return result
         except Exception as e:
             raise e
     
@@ -132,7 +211,26 @@ class KernelRepository(KernelRepositoryBase):
             FunctionResult: The regenerated query result.
         """
         try:
-            return await self.__kernel.invoke(self.__query_plugin['RegenerateQuery'], args)
+            result = await self.__kernel.invoke(self.__query_plugin['RegenerateQuery'], args)
+            record_result_usage("regenerate", result)
+            return result
+        except Exception as e:
+            raise e
+    
+    async def __plan_query_async(self, args: KernelArguments) -> FunctionResult:
+        """
+        Asynchronously plans the query using the QueryStructuringPlugin.
+
+        Args:
+            args (KernelArguments): Arguments containing query and history.
+
+        Returns:
+            FunctionResult: The plan result.
+        """
+        try:
+            result = await self.__kernel.invoke(self.__query_plugin['PlanQuery'], args)
+            record_result_usage("plan", result)
+            return result
         except Exception as e:
             raise e
     
@@ -147,7 +245,9 @@ class KernelRepository(KernelRepositoryBase):
             FunctionResult: The breakdown result.
         """
         try:
-            return await self.__kernel.invoke(self.__query_plugin['BreakDownQuery'], args)
+            result = await self.__kernel.invoke(self.__query_plugin['BreakDownQuery'], args)
+            record_result_usage("breakdown", result)
+            return result
         except Exception as e:
             raise e
     
@@ -155,7 +255,9 @@ class KernelRepository(KernelRepositoryBase):
         self, 
         args: "KernelArguments") -> FunctionResult:
         try:
-            return await self.__kernel.invoke(self.__orchestrator['QA'],args)
+            result = await self.__kernel.invoke(self.__orchestrator['QA'],args)
+            record_result_usage("qa", result)
+            return result
         except Exception as e:
             raise e
 
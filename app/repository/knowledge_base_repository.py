@@ -1,13 +1,19 @@
 import logging
 import json
-from typing import Optional, Any, Dict
+import asyncio
+from typing import Optional, Any, Dict, List
 
+from numpy import ndarray
 from semantic_kernel.memory import SemanticTextMemory
+from semantic_kernel.memory.memory_record import MemoryRecord
+from semantic_kernel.memory.memory_store_base import MemoryStoreBase
+from semantic_kernel.connectors.ai.embedding_generator_base import EmbeddingGeneratorBase
 
 from ..services.memory_store_service import get_memory_store
-from ..services.oai_services import get_embedding_service
+from ..services.oai_services import get_cached_embedding_service
 from ..models.knowledge_base_model import PodCastKnowledgeBaseModel
 from ..utils.singleton_decorator import singleton
+from ..utils.telemetry import stage_span
 from ..contract.memory_repository_base import MemoryRepositoryBase
 logger = logging.getLogger(__name__)
 
@@ -15,13 +21,18 @@ INDEX_NAME = "georgekb"
 
 @singleton
 class KnowledgeBaseRepository(MemoryRepositoryBase):
-    def __init__(self):
+    def __init__(self, storage: MemoryStoreBase | None = None, embedding_service: EmbeddingGeneratorBase | None = None):
         """
         Initialize the knowledge base repository with memory store and embedding service.
+
+        Args:
+            storage (MemoryStoreBase, optional): The memory store. Defaults to Azure Cognitive Search.
+            embedding_service (EmbeddingGeneratorBase, optional): The embedding service. Defaults to the cached Azure OpenAI service.
         """
-        self.__knowledge_base = get_memory_store()
+        self.__knowledge_base = storage or get_memory_store()
+        self.__embedding_service = embedding_service or get_cached_embedding_service()
         self.__memory = SemanticTextMemory(storage=self.__knowledge_base,
-                                           embeddings_generator=get_embedding_service())
+                                           embeddings_generator=self.__embedding_service)
         
     async def save_memory_async(self, metadata: PodCastKnowledgeBaseModel):
         """
@@ -41,6 +52,49 @@ class KnowledgeBaseRepository(MemoryRepositoryBase):
             additional_metadata=json.dumps(additional_metadata)
         )
     
+    async def embed_texts_async(self, texts: List[str]) -> ndarray:
+        """
+        Generate the embeddings of several texts in one request asynchronously.
+
+        Args:
+            texts (List[str]): The texts to embed.
+
+        Returns:
+            ndarray: One embedding per text, in order.
+        """
+        return await self.__embedding_service.generate_embeddings(texts)
+    
+    async def save_memory_batch_async(self, metadata: List[PodCastKnowledgeBaseModel], embeddings: ndarray, collection:str=INDEX_NAME):
+        """
+        Save several already embedded memories (knowledge base entries) in one upsert asynchronously.
+
+        Args:
+            metadata (List[PodCastKnowledgeBaseModel]): The metadata to save.
+            embeddings (ndarray): The embedding of each entry, in order.
+            collection (str, optional): The collection/index name. Defaults to INDEX_NAME.
+        """
+        records = [
+            MemoryRecord.local_record(
+                id=item.id,
+                text=item.content,
+                description=item.podcast_title,
+                additional_metadata=json.dumps({"time_stamp": item.time_stamp}),
+                embedding=embedding)
+            for item, embedding in zip(metadata, embeddings)
+        ]
+        await self.__knowledge_base.upsert_batch(collection, records)
+    
+    async def delete_memory_batch_async(self, ids: List[str], collection:str=INDEX_NAME):
+        """
+        Delete several memories (knowledge base entries) asynchronously.
+
+        Args:
+            ids (List[str]): The ids of the entries to delete.
+            collection (str, optional): The collection/index name. Defaults to INDEX_NAME.
+        """
+        # The Azure store's remove_batch encodes every key twice, so remove them one by one in a single burst
+        await asyncio.gather(*(self.__knowledge_base.remove(collection, id) for id in ids))
+    
     async def search_memory_async(self, query:str,collection:str=INDEX_NAME,min_relevance_score:float=0.6)->Optional[Dict[str, Any]]:
         """
         Search the memory (knowledge base) asynchronously.
@@ -53,21 +107,86 @@ class KnowledgeBaseRepository(MemoryRepositoryBase):
         Returns:
             Optional[Dict[str, Any]]: The search result or None.
         """
-        result = await self.__memory.search(
-            collection=collection,
-            query=query,
-            min_relevance_score=min_relevance_score)
+        return (await self.search_memory_batch_async([query], collection, min_relevance_score))[0]
+    
+    async def search_memory_batch_async(self, queries:List[str],collection:str=INDEX_NAME,min_relevance_score:float=0.6)->List[Optional[Dict[str, Any]]]:
+        """
+        Search the memory (knowledge base) for several queries at once asynchronously.
+
+        All queries are embedded in a single embedding request and their vector searches are sent
+        as one concurrent burst.
+
+        Args:
+            queries (List[str]): The search queries.
+            collection (str, optional): The collection/index name. Defaults to INDEX_NAME.
+            min_relevance_score (float, optional): Minimum relevance score for results. Defaults to 0.6.
+
+        Returns:
+            List[Optional[Dict[str, Any]]]: The search result of each query, in order, or None where nothing matched.
+        """
+        matches = await self.__search_batch_async(queries, 1, collection, min_relevance_score, with_embeddings=False)
+        return [self.__to_result(*match[0]) if match else None for match in matches]
+    
+    async def search_memory_top_k_batch_async(self, queries:List[str],limit:int=5,collection:str=INDEX_NAME,min_relevance_score:float=0.6)->List[List[Dict[str, Any]]]:
+        """
+        Search the memory (knowledge base) for the top k results of several queries at once asynchronously.
+
+        Args:
+            queries (List[str]): The search queries.
+            limit (int, optional): Maximum number of results per query. Defaults to 5.
+            collection (str, optional): The collection/index name. Defaults to INDEX_NAME.
+            min_relevance_score (float, optional): Minimum relevance score for results. Defaults to 0.6.
+
+        Returns:
+            List[List[Dict[str, Any]]]: The results of each query, in order and best first. Every result also
+                carries its "embedding".
+        """
+        matches = await self.__search_batch_async(queries, limit, collection, min_relevance_score, with_embeddings=True)
+        return [[dict(self.__to_result(record, score), embedding=record.embedding) for record, score in match]
+                for match in matches]
+    
+    async def __search_batch_async(self, queries:List[str], limit:int, collection:str, min_relevance_score:float,
+                                   with_embeddings:bool) -> List[List[Any]]:
+        """
+        Embed all queries in a single embedding request and send their vector searches as one concurrent burst.
+
+        Returns:
+            List[List[Tuple[MemoryRecord, float]]]: The matched records and scores of each query.
+        """
+        if not queries:
+            return []
         
-        if result:
-            metadata = json.loads(result[0].additional_metadata or "{}")
-            return {
-                "id": result[0].id,
-                "podcast_title": result[0].description,  # Assuming this maps correctly
-                "score": result[0].relevance,
-                "content": result[0].text,
-                "time_stamp": metadata.get("time_stamp")
-            }
-        return None
+        with stage_span("embedding", queries=len(queries)):
+            embeddings = await self.__embedding_service.generate_embeddings(queries)
+        with stage_span("vector_search", queries=len(queries)):
+            return await asyncio.gather(*(
+                self.__knowledge_base.get_nearest_matches(
+                    collection_name=collection,
+                    embedding=embedding,
+                    limit=limit,
+                    min_relevance_score=min_relevance_score,
+                    with_embeddings=with_embeddings)
+                for embedding in embeddings))
+    
+    def __to_result(self, record: MemoryRecord, score: float) -> Dict[str, Any]:
+        """
+        Convert a memory record into a knowledge base result.
+
+        Args:
+            record (MemoryRecord): The matched record.
+            score (float): The relevance score of the match.
+
+        Returns:
+            Dict[str, Any]: The knowledge base result.
+        """
+        metadata = json.loads(record.additional_metadata or "{}")
+        return {
+            "id": record.id,
+            "podcast_title": record.description,  # Assuming this maps correctly
+            "score": score,
+            "content": record.text,
+            "time_stamp": metadata.get("time_stamp")
+        }
         
     async def initialize_knowledge_base_async(self):
         """
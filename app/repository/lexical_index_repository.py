@@ -0,0 +1,260 @@
+import os
+import re
+import json
+import math
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from dotenv import load_dotenv
+
+from ..models.knowledge_base_model import PodCastKnowledgeBaseModel
+from ..utils.singleton_decorator import singleton
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows development machines run a single worker
+    fcntl = None
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+LEXICAL_INDEX_PATH = os.getenv("LEXICAL_INDEX_PATH", ".cache/lexical_index.jsonl")
+# A lexical match is confident when its segment contains this share of the query's IDF weight...
+LEXICAL_CONFIDENT_COVERAGE = float(os.getenv("LEXICAL_CONFIDENT_COVERAGE", "0.8"))
+# ...and outscores the runner-up by this factor.
+LEXICAL_CONFIDENT_MARGIN = float(os.getenv("LEXICAL_CONFIDENT_MARGIN", "1.5"))
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+STOP_WORDS = frozenset("""
+a an and are as at be but by can did do does for from had has have how i if in into is it its me my
+of on or our so than that the their them then there these they this to was we were what when where
+which who whom why will with would you your about tell say said talk talked episode podcast
+""".split())
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lower-case word tokens without stop words.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        List[str]: The tokens, in order.
+    """
+    return [token for token in re.findall(r"\w+", text.lower()) if token not in STOP_WORDS]
+
+@singleton
+class LexicalIndexRepository:
+    """
+    In-process BM25 inverted index over the content of the ingested segments.
+
+    Segments are persisted in an append-only JSON-lines log (``{"id", "podcast_title", "time_stamp",
+    "content"}`` for an upsert, ``{"id", "deleted": true}`` for a removal) that ingestion appends to and
+    every worker replays into its in-memory postings, picking up new entries by re-reading the log tail.
+    """
+    __path: Path
+    __documents: Dict[str, Dict[str, Any]]
+    __terms: Dict[str, Counter]
+    __postings: Dict[str, Dict[str, int]]
+
+    def __init__(self, path: str | Path | None = None) -> None:
+        """
+        Open the index.
+
+        Args:
+            path (str | Path, optional): Location of the index log. Defaults to LEXICAL_INDEX_PATH.
+        """
+        self.__path = Path(path or LEXICAL_INDEX_PATH)
+        self.__path.parent.mkdir(parents=True, exist_ok=True)
+        self.__mutex = threading.RLock()
+        self.__reset()
+
+    def __len__(self) -> int:
+        self.__refresh()
+        return len(self.__documents)
+
+    def contains(self, segment_id: str) -> bool:
+        """
+        Check whether a segment is indexed.
+
+        Args:
+            segment_id (str): The segment id.
+
+        Returns:
+            bool: True if the segment is indexed.
+        """
+        self.__refresh()
+        return segment_id in self.__documents
+
+    def add(self, segments: Iterable[PodCastKnowledgeBaseModel]) -> None:
+        """
+        Index segments, replacing earlier versions with the same id.
+
+        Args:
+            segments (Iterable[PodCastKnowledgeBaseModel]): The segments to index.
+        """
+        self.__append(segment.model_dump(exclude={"score"}) for segment in segments)
+
+    def remove(self, ids: Iterable[str]) -> None:
+        """
+        Remove segments from the index.
+
+        Args:
+            ids (Iterable[str]): The segment ids.
+        """
+        self.__append({"id": segment_id, "deleted": True} for segment_id in ids)
+
+    def search(self, query: str, limit: int = 5, min_coverage: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Rank segments against the query with BM25.
+
+        Args:
+            query (str): The search query.
+            limit (int, optional): Maximum number of results. Defaults to 5.
+            min_coverage (float, optional): Minimum share of the query's IDF weight a segment must contain,
+                from 0 to 1. Defaults to 0.0.
+
+        Returns:
+            List[Dict[str, Any]]: The best matching segments, best first, with their BM25 score.
+        """
+        self.__refresh()
+        with self.__mutex:
+            scores: Dict[str, float] = {}
+            matched_weights: Dict[str, float] = {}
+            average_length = self.__total_length / len(self.__documents) if self.__documents else 0.0
+            query_terms = set(tokenize(query))
+            total_weight = sum(self.__idf(term) for term in query_terms)
+            for term in query_terms:
+                postings = self.__postings.get(term)
+                if not postings:
+                    continue
+                idf = self.__idf(term)
+                for segment_id, frequency in postings.items():
+                    length_norm = 1 - BM25_B + BM25_B * self.__lengths[segment_id] / average_length
+                    scores[segment_id] = scores.get(segment_id, 0.0) + \
+                        idf * frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * length_norm)
+                    matched_weights[segment_id] = matched_weights.get(segment_id, 0.0) + idf
+
+            if min_coverage > 0:
+                scores = {segment_id: score for segment_id, score in scores.items()
+                          if matched_weights[segment_id] >= min_coverage * total_weight}
+            best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+            return [dict(self.__documents[segment_id], score=score) for segment_id, score in best]
+
+    def is_confident(self, query: str, results: List[Dict[str, Any]]) -> bool:
+        """
+        Decide whether the top lexical result answers the query on its own.
+
+        The top segment must contain most of the query's IDF weight (so rare, specific terms such as
+        names or model versions matter most) and clearly outscore the runner-up.
+
+        Args:
+            query (str): The search query.
+            results (List[Dict[str, Any]]): The results of ``search`` for the query.
+
+        Returns:
+            bool: True if the top result is a confident match.
+        """
+        if not results:
+            return False
+        if len(results) > 1 and results[0]["score"] < LEXICAL_CONFIDENT_MARGIN * results[1]["score"]:
+            return False
+
+        with self.__mutex:
+            query_terms = set(tokenize(query))
+            total_weight = sum(self.__idf(term) for term in query_terms)
+            top_terms = self.__terms.get(results[0]["id"], Counter())
+            matched_weight = sum(self.__idf(term) for term in query_terms if term in top_terms)
+        return total_weight > 0 and matched_weight / total_weight >= LEXICAL_CONFIDENT_COVERAGE
+
+    def compact(self) -> None:
+        """
+        Rewrite the index log to a single entry per indexed segment.
+        """
+        temporary_path = self.__path.with_suffix(self.__path.suffix + ".tmp")
+        with self.__lock():
+            self.__refresh(locked=True)
+            with self.__mutex:
+                with open(temporary_path, "w", encoding="utf-8") as log_file:
+                    log_file.writelines(json.dumps(document, ensure_ascii=False) + "\n"
+                                        for document in self.__documents.values())
+                os.replace(temporary_path, self.__path)
+                # the new log is re-read from the start on the next refresh
+                self.__reset()
+
+    def __idf(self, term: str) -> float:
+        frequency = len(self.__postings.get(term, ()))
+        return math.log(1 + (len(self.__documents) - frequency + 0.5) / (frequency + 0.5))
+
+    def __append(self, entries: Iterable[Dict[str, Any]]) -> None:
+        lines = [json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries]
+        if not lines:
+            return
+        with self.__lock(), open(self.__path, "a", encoding="utf-8") as log_file:
+            log_file.writelines(lines)
+            log_file.flush()
+
+    def __refresh(self, locked: bool = False) -> None:
+        if not self.__path.exists():
+            return
+        stat = self.__path.stat()
+        if stat.st_ino == self.__inode and stat.st_size == self.__offset:
+            return
+
+        with self.__mutex, (self.__lock() if not locked else nullcontext()):
+            stat = self.__path.stat()
+            if stat.st_ino != self.__inode:
+                self.__reset()
+                self.__inode = stat.st_ino
+            with open(self.__path, "r", encoding="utf-8") as log_file:
+                log_file.seek(self.__offset)
+                lines = log_file.read().splitlines()
+                self.__offset = log_file.tell()
+            for line in lines:
+                self.__apply(json.loads(line))
+        logger.info(f"Lexical index {self.__path} has {len(self.__documents)} segments")
+
+    def __apply(self, entry: Dict[str, Any]) -> None:
+        segment_id = entry["id"]
+        for term, frequency in self.__terms.pop(segment_id, Counter()).items():
+            postings = self.__postings[term]
+            del postings[segment_id]
+            if not postings:
+                del self.__postings[term]
+        self.__total_length -= self.__lengths.pop(segment_id, 0)
+        self.__documents.pop(segment_id, None)
+        if entry.get("deleted"):
+            return
+
+        terms = Counter(tokenize(entry["content"]))
+        for term, frequency in terms.items():
+            self.__postings.setdefault(term, {})[segment_id] = frequency
+        self.__terms[segment_id] = terms
+        self.__lengths[segment_id] = sum(terms.values())
+        self.__total_length += self.__lengths[segment_id]
+        self.__documents[segment_id] = entry
+
+    def __reset(self) -> None:
+        self.__documents = {}
+        self.__terms = {}
+        self.__postings = {}
+        self.__lengths: Dict[str, int] = {}
+        self.__total_length = 0
+        self.__offset = 0
+        self.__inode: Optional[int] = None
+
+    @contextmanager
+    def __lock(self) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        with open(self.__path.with_suffix(self.__path.suffix + ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
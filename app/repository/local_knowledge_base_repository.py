@@ -0,0 +1,192 @@
+import os
+import asyncio
+import logging
+from pathlib import Path
+from typing import Optional, Any, Dict, List
+from dotenv import load_dotenv
+
+from numpy import ndarray
+from semantic_kernel.connectors.ai.embedding_generator_base import EmbeddingGeneratorBase
+
+from ..services.oai_services import get_cached_embedding_service
+from ..models.knowledge_base_model import PodCastKnowledgeBaseModel
+from ..utils.local_vector_store import LocalVectorStore
+from ..utils.ivf_index import IVFIndex
+from ..utils.singleton_decorator import singleton
+from ..utils.telemetry import stage_span
+from ..contract.memory_repository_base import MemoryRepositoryBase, INDEX_NAME
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+LOCAL_KB_DIR = os.getenv("LOCAL_KB_DIR", ".cache/knowledge_base")
+# Approximate nearest-neighbour index of large collections: "ivf" or "none" (always scan every row).
+LOCAL_KB_ANN = os.getenv("LOCAL_KB_ANN", "ivf").lower()
+
+@singleton
+class LocalKnowledgeBaseRepository(MemoryRepositoryBase):
+    """
+    Knowledge base held in local memory-mapped vector stores, one per collection, searched in-process.
+    """
+    __directory: Path
+    __stores: Dict[str, LocalVectorStore]
+
+    def __init__(self, directory: str | Path | None = None, embedding_service: EmbeddingGeneratorBase | None = None):
+        """
+        Initialize the local knowledge base repository.
+
+        Args:
+            directory (str | Path, optional): Directory holding the collections. Defaults to LOCAL_KB_DIR.
+            embedding_service (EmbeddingGeneratorBase, optional): The embedding service. Defaults to the cached Azure OpenAI service.
+        """
+        self.__directory = Path(directory or LOCAL_KB_DIR)
+        self.__embedding_service = embedding_service or get_cached_embedding_service()
+        self.__stores = {}
+
+    async def save_memory_async(self, metadata: PodCastKnowledgeBaseModel):
+        """
+        Save a memory (knowledge base entry) asynchronously.
+
+        Args:
+            metadata (PodCastKnowledgeBaseModel): The metadata to save.
+        """
+        await self.save_memory_batch_async([metadata], await self.embed_texts_async([metadata.content]))
+
+    async def embed_texts_async(self, texts: List[str]) -> ndarray:
+        """
+        Generate the embeddings of several texts in one request asynchronously.
+
+        Args:
+            texts (List[str]): The texts to embed.
+
+        Returns:
+            ndarray: One embedding per text, in order.
+        """
+        return await self.__embedding_service.generate_embeddings(texts)
+
+    async def save_memory_batch_async(self, metadata: List[PodCastKnowledgeBaseModel], embeddings: ndarray, collection:str=INDEX_NAME):
+        """
+        Save several already embedded memories (knowledge base entries) in one upsert asynchronously.
+
+        Args:
+            metadata (List[PodCastKnowledgeBaseModel]): The metadata to save.
+            embeddings (ndarray): The embedding of each entry, in order.
+            collection (str, optional): The collection/index name. Defaults to INDEX_NAME.
+        """
+        records = [item.model_dump(exclude={"score"}) for item in metadata]
+        await asyncio.to_thread(self.__store(collection).upsert, records, embeddings)
+
+    async def delete_memory_batch_async(self, ids: List[str], collection:str=INDEX_NAME):
+        """
+        Delete several memories (knowledge base entries) asynchronously.
+
+        Args:
+            ids (List[str]): The ids of the entries to delete.
+            collection (str, optional): The collection/index name. Defaults to INDEX_NAME.
+        """
+        await asyncio.to_thread(self.__store(collection).delete, ids)
+
+    async def search_memory_async(self, query:str,collection:str=INDEX_NAME,min_relevance_score:float=0.6)->Optional[Dict[str, Any]]:
+        """
+        Search the memory (knowledge base) asynchronously.
+
+        Args:
+            query (str): The search query.
+            collection (str, optional): The collection/index name. Defaults to INDEX_NAME.
+            min_relevance_score (float, optional): Minimum relevance score for results. Defaults to 0.6.
+
+        Returns:
+            Optional[Dict[str, Any]]: The search result or None.
+        """
+        return (await self.search_memory_batch_async([query], collection, min_relevance_score))[0]
+
+    async def search_memory_batch_async(self, queries:List[str],collection:str=INDEX_NAME,min_relevance_score:float=0.6)->List[Optional[Dict[str, Any]]]:
+        """
+        Search the memory (knowledge base) for several queries at once asynchronously.
+
+        All queries are embedded in a single embedding request and scored in one vectorized pass, over the
+        whole collection or, on large collections, over the candidates of its IVF index.
+
+        Args:
+            queries (List[str]): The search queries.
+            collection (str, optional): The collection/index name. Defaults to INDEX_NAME.
+            min_relevance_score (float, optional): Minimum relevance score for results. Defaults to 0.6.
+
+        Returns:
+            List[Optional[Dict[str, Any]]]: The search result of each query, in order, or None where nothing matched.
+        """
+        store = self.__store(collection)
+        matches = await self.__search_batch_async(store, queries, 1, min_relevance_score)
+        return [self.__to_result(store, *match[0]) if match else None for match in matches]
+
+    async def search_memory_top_k_batch_async(self, queries:List[str],limit:int=5,collection:str=INDEX_NAME,min_relevance_score:float=0.6)->List[List[Dict[str, Any]]]:
+        """
+        Search the memory (knowledge base) for the top k results of several queries at once asynchronously.
+
+        Args:
+            queries (List[str]): The search queries.
+            limit (int, optional): Maximum number of results per query. Defaults to 5.
+            collection (str, optional): The collection/index name. Defaults to INDEX_NAME.
+            min_relevance_score (float, optional): Minimum relevance score for results. Defaults to 0.6.
+
+        Returns:
+            List[List[Dict[str, Any]]]: The results of each query, in order and best first. Every result also
+                carries its "embedding".
+        """
+        store = self.__store(collection)
+        matches = await self.__search_batch_async(store, queries, limit, min_relevance_score)
+        rows = [row for match in matches for row, _ in match]
+        embeddings = iter(await asyncio.to_thread(store.vectors, rows) if rows else [])
+        return [[dict(self.__to_result(store, row, score), embedding=next(embeddings)) for row, score in match]
+                for match in matches]
+
+    async def __search_batch_async(self, store: LocalVectorStore, queries:List[str], limit:int,
+                                   min_relevance_score:float) -> List[List[Any]]:
+        """
+        Embed all queries in a single embedding request and score them in one vectorized pass.
+
+        Returns:
+            List[List[Tuple[int, float]]]: The matched rows and scores of each query.
+        """
+        if not queries:
+            return []
+
+        with stage_span("embedding", queries=len(queries)):
+            embeddings = await self.__embedding_service.generate_embeddings(queries)
+        with stage_span("vector_search", queries=len(queries)):
+            return await asyncio.to_thread(store.search, embeddings, limit, min_relevance_score)
+
+    def __to_result(self, store: LocalVectorStore, row: int, score: float) -> Dict[str, Any]:
+        """
+        Convert a matched row into a knowledge base result.
+
+        Args:
+            store (LocalVectorStore): The collection the row belongs to.
+            row (int): The matched row.
+            score (float): The relevance score of the match.
+
+        Returns:
+            Dict[str, Any]: The knowledge base result.
+        """
+        record = store.record(row)
+        return {
+            "id": record["id"],
+            "podcast_title": record["podcast_title"],
+            "score": score,
+            "content": record["content"],
+            "time_stamp": record["time_stamp"]
+        }
+
+    async def initialize_knowledge_base_async(self):
+        """
+        Initialize the knowledge base asynchronously.
+        """
+        store = self.__store(INDEX_NAME)
+        logger.info(f"Local knowledge base {INDEX_NAME} has {len(store)} segments.")
+
+    def __store(self, collection: str) -> LocalVectorStore:
+        if collection not in self.__stores:
+            directory = self.__directory / collection
+            ann = IVFIndex(directory / "ivf.npz") if LOCAL_KB_ANN == "ivf" else None
+            self.__stores[collection] = LocalVectorStore(directory, ann=ann)
+        return self.__stores[collection]
@@ -0,0 +1,186 @@
+import os
+import time
+import logging
+from collections import OrderedDict
+from typing import List, Optional
+from dotenv import load_dotenv
+
+from semantic_kernel.contents import ChatHistory, ChatMessageContent
+
+from ..contract.session_store_base import SessionStoreBase
+from ..utils.singleton_decorator import singleton
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "1024"))
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "86400"))
+
+class _CachedSession:
+    __slots__ = ("messages", "version", "touched_at")
+
+    def __init__(self, messages: List[ChatMessageContent], version: int, touched_at: float) -> None:
+        self.messages = messages
+        self.version = version
+        self.touched_at = touched_at
+
+@singleton
+class MemorySessionRepository(SessionStoreBase):
+    """
+    In-process session store: an LRU of recently used sessions whose entries expire after an idle TTL.
+
+    With a persistent backend it acts as a write-through cache in front of it, so sessions survive
+    restarts and are shared between workers. Every read checks the session version in the backend
+    first, so a session another worker wrote to is reloaded rather than served stale; without a
+    backend, evicted sessions are gone.
+    """
+    __sessions: "OrderedDict[str, _CachedSession]"
+    __backend: Optional["SessionStoreBase"]
+
+    def __init__(self, backend: Optional[SessionStoreBase] = None,
+                 max_sessions: Optional[int] = None, ttl_seconds: Optional[float] = None) -> None:
+        """
+        Initialize the session store.
+
+        Args:
+            backend (SessionStoreBase, optional): Persistent store behind the cache.
+            max_sessions (int, optional): Sessions kept in memory. Defaults to SESSION_CACHE_SIZE.
+            ttl_seconds (float, optional): Idle time after which a session leaves memory. Defaults to SESSION_TTL_SECONDS.
+        """
+        self.__sessions = OrderedDict()
+        self.__backend = backend
+        self.__max_sessions = max_sessions or SESSION_CACHE_SIZE
+        self.__ttl_seconds = ttl_seconds or SESSION_TTL_SECONDS
+
+    async def get_version_async(self, session_id: str) -> Optional[int]:
+        """
+        Get the version of a session, a counter that changes with every write to it.
+
+        Args:
+            session_id (str): The session id.
+
+        Returns:
+            Optional[int]: The session version, or None if the session is unknown or expired.
+        """
+        if self.__backend is not None:
+            return await self.__backend.get_version_async(session_id)
+        session = self.__get(session_id)
+        return session.version if session else None
+
+    async def load_async(self, session_id: str) -> Optional[ChatHistory]:
+        """
+        Load the chat history of a session.
+
+        Args:
+            session_id (str): The session id.
+
+        Returns:
+            Optional[ChatHistory]: A copy of the session history, or None if the session is unknown or expired.
+        """
+        session = self.__get(session_id)
+        if self.__backend is not None:
+            # the version is read before the messages, so a reloaded copy is never older than its version
+            version = await self.__backend.get_version_async(session_id)
+            if version is None:
+                # expired, or deleted by another worker
+                self.__sessions.pop(session_id, None)
+                return None
+            if session is None or session.version != version:
+                history = await self.__backend.load_async(session_id)
+                if history is None:
+                    self.__sessions.pop(session_id, None)
+                    return None
+                session = self.__put(session_id, list(history.messages), version)
+        return ChatHistory(messages=list(session.messages)) if session else None
+
+    async def append_async(self, session_id: str, messages: List[ChatMessageContent]) -> int:
+        """
+        Append messages to a session, creating it if needed.
+
+        Args:
+            session_id (str): The session id.
+            messages (List[ChatMessageContent]): The new messages, in order.
+
+        Returns:
+            int: The version of the session after the append.
+        """
+        session = self.__get(session_id)
+        if self.__backend is None:
+            if session is None:
+                return self.__put(session_id, list(messages), 1).version
+            session.messages.extend(messages)
+            session.version += 1
+            return session.version
+
+        version = await self.__backend.append_async(session_id, messages)
+        if session is not None:
+            if session.version == version - 1:
+                session.messages.extend(messages)
+                session.version = version
+            else:
+                # another worker wrote in between; the session is reloaded in full on its next use
+                self.__sessions.pop(session_id, None)
+        return version
+
+    async def replace_head_async(self, session_id: str, head_length: int, messages: List[ChatMessageContent],
+                                 expected_version: Optional[int] = None) -> bool:
+        """
+        Replace the oldest messages of a session, keeping any message appended after them.
+
+        Args:
+            session_id (str): The session id.
+            head_length (int): Number of oldest messages to replace.
+            messages (List[ChatMessageContent]): The messages that take their place.
+            expected_version (int, optional): Only replace the head if the session is still at this version.
+                Defaults to replacing unconditionally.
+
+        Returns:
+            bool: True if the head was replaced, False if the session is unknown or changed since expected_version.
+        """
+        session = self.__get(session_id)
+        if self.__backend is None:
+            if session is None or (expected_version is not None and session.version != expected_version):
+                return False
+            session.messages[:head_length] = messages
+            session.version += 1
+            return True
+
+        replaced = await self.__backend.replace_head_async(session_id, head_length, messages, expected_version)
+        if replaced and session is not None and expected_version is not None and session.version == expected_version:
+            session.messages[:head_length] = messages
+            session.version = expected_version + 1
+        else:
+            # the cached copy can no longer be patched safely
+            self.__sessions.pop(session_id, None)
+        return replaced
+
+    async def delete_async(self, session_id: str) -> None:
+        """
+        Delete a session.
+
+        Args:
+            session_id (str): The session id.
+        """
+        self.__sessions.pop(session_id, None)
+        if self.__backend is not None:
+            await self.__backend.delete_async(session_id)
+
+    def __get(self, session_id: str) -> Optional[_CachedSession]:
+        session = self.__sessions.get(session_id)
+        if session is None:
+            return None
+        now = time.monotonic()
+        if session.touched_at < now - self.__ttl_seconds:
+            del self.__sessions[session_id]
+            return None
+        session.touched_at = now
+        self.__sessions.move_to_end(session_id)
+        return session
+
+    def __put(self, session_id: str, messages: List[ChatMessageContent], version: int) -> _CachedSession:
+        session = _CachedSession(messages, version, time.monotonic())
+        self.__sessions[session_id] = session
+        self.__sessions.move_to_end(session_id)
+        while len(self.__sessions) > self.__max_sessions:
+            self.__sessions.popitem(last=False)
+        return session
@@ -0,0 +1,218 @@
+import os
+import time
+import sqlite3
+import asyncio
+import logging
+from pathlib import Path
+from typing import List, Optional
+from dotenv import load_dotenv
+
+from semantic_kernel.contents import ChatHistory, ChatMessageContent, AuthorRole
+
+from ..contract.session_store_base import SessionStoreBase
+from ..utils.singleton_decorator import singleton
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", ".cache/sessions.sqlite3")
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "86400"))
+PURGE_INTERVAL_SECONDS = 60
+
+@singleton
+class SqliteSessionRepository(SessionStoreBase):
+    """
+    Persistent session store in a local SQLite database shared by every worker on the host.
+
+    Every message is one row, so appending a turn writes only that turn. Each session carries a version
+    that every write increments, so caches in the workers can tell when their copy is stale. Sessions
+    idle for longer than SESSION_TTL_SECONDS are purged.
+    """
+    __path: Path
+
+    def __init__(self, path: str | Path | None = None, ttl_seconds: Optional[float] = None) -> None:
+        """
+        Open (or create) the session database.
+
+        Args:
+            path (str | Path, optional): Location of the database file. Defaults to SESSION_DB_PATH.
+            ttl_seconds (float, optional): Idle time after which a session expires. Defaults to SESSION_TTL_SECONDS.
+        """
+        self.__path = Path(path or SESSION_DB_PATH)
+        self.__path.parent.mkdir(parents=True, exist_ok=True)
+        self.__ttl_seconds = ttl_seconds or SESSION_TTL_SECONDS
+        self.__purged_at = 0.0
+        with self.__connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    updated_at REAL NOT NULL,
+                    version INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE TABLE IF NOT EXISTS messages (
+                    session_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    PRIMARY KEY (session_id, seq)
+                );
+            """)
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(sessions)")}
+            if "version" not in columns:
+                # databases created before sessions were versioned
+                connection.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    async def load_async(self, session_id: str) -> Optional[ChatHistory]:
+        """
+        Load the chat history of a session.
+
+        Args:
+            session_id (str): The session id.
+
+        Returns:
+            Optional[ChatHistory]: The session history, or None if the session is unknown or expired.
+        """
+        return await asyncio.to_thread(self.__load, session_id)
+
+    async def get_version_async(self, session_id: str) -> Optional[int]:
+        """
+        Get the version of a session, a counter that changes with every write to it.
+
+        Args:
+            session_id (str): The session id.
+
+        Returns:
+            Optional[int]: The session version, or None if the session is unknown or expired.
+        """
+        return await asyncio.to_thread(self.__get_version, session_id)
+
+    async def append_async(self, session_id: str, messages: List[ChatMessageContent]) -> int:
+        """
+        Append messages to a session, creating it if needed.
+
+        Args:
+            session_id (str): The session id.
+            messages (List[ChatMessageContent]): The new messages, in order.
+
+        Returns:
+            int: The version of the session after the append.
+        """
+        return await asyncio.to_thread(self.__append, session_id, messages)
+
+    async def replace_head_async(self, session_id: str, head_length: int, messages: List[ChatMessageContent],
+                                 expected_version: Optional[int] = None) -> bool:
+        """
+        Replace the oldest messages of a session, keeping any message appended after them.
+
+        Args:
+            session_id (str): The session id.
+            head_length (int): Number of oldest messages to replace.
+            messages (List[ChatMessageContent]): The messages that take their place.
+            expected_version (int, optional): Only replace the head if the session is still at this version.
+                Defaults to replacing unconditionally.
+
+        Returns:
+            bool: True if the head was replaced, False if the session is unknown or changed since expected_version.
+        """
+        return await asyncio.to_thread(self.__replace_head, session_id, head_length, messages, expected_version)
+
+    async def delete_async(self, session_id: str) -> None:
+        """
+        Delete a session.
+
+        Args:
+            session_id (str): The session id.
+        """
+        await asyncio.to_thread(self.__delete, session_id)
+
+    def __load(self, session_id: str) -> Optional[ChatHistory]:
+        with self.__connect() as connection:
+            session = connection.execute("SELECT updated_at FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if session is None or session[0] < time.time() - self.__ttl_seconds:
+                return None
+            rows = connection.execute("SELECT role, content FROM messages WHERE session_id = ? ORDER BY seq",
+                                      (session_id,)).fetchall()
+        return ChatHistory(messages=[ChatMessageContent(role=AuthorRole(role), content=content) for role, content in rows])
+
+    def __get_version(self, session_id: str) -> Optional[int]:
+        with self.__connect() as connection:
+            session = connection.execute("SELECT updated_at, version FROM sessions WHERE session_id = ?",
+                                         (session_id,)).fetchone()
+        if session is None or session[0] < time.time() - self.__ttl_seconds:
+            return None
+        return session[1]
+
+    def __append(self, session_id: str, messages: List[ChatMessageContent]) -> int:
+        now = time.time()
+        with self.__connect() as connection:
+            # take the write lock up front so concurrent workers never read the same next seq
+            connection.execute("BEGIN IMMEDIATE")
+            next_seq = connection.execute("SELECT COALESCE(MAX(seq) + 1, 0) FROM messages WHERE session_id = ?",
+                                          (session_id,)).fetchone()[0]
+            connection.executemany("INSERT INTO messages (session_id, seq, role, content) VALUES (?, ?, ?, ?)",
+                                   [(session_id, next_seq + i, message.role.value, message.content or "")
+                                    for i, message in enumerate(messages)])
+            version = connection.execute("INSERT INTO sessions (session_id, updated_at, version) VALUES (?, ?, 1) "
+                                         "ON CONFLICT(session_id) DO UPDATE SET updated_at = excluded.updated_at, "
+                                         "version = version + 1 RETURNING version",
+                                         (session_id, now)).fetchone()[0]
+            if now - self.__purged_at > PURGE_INTERVAL_SECONDS:
+                self.__purge(connection, now)
+        return version
+
+    def __replace_head(self, session_id: str, head_length: int, messages: List[ChatMessageContent],
+                       expected_version: Optional[int]) -> bool:
+        with self.__connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            if expected_version is not None:
+                session = connection.execute("SELECT version FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+                if session is None or session[0] != expected_version:
+                    return False
+            head = connection.execute("SELECT seq FROM messages WHERE session_id = ? ORDER BY seq LIMIT ?",
+                                      (session_id, head_length)).fetchall()
+            if not head:
+                return False
+            last_seq = head[-1][0]
+            connection.execute("DELETE FROM messages WHERE session_id = ? AND seq <= ?", (session_id, last_seq))
+            # the replacement takes the sequence numbers just before the kept messages
+            first_seq = last_seq - len(messages) + 1
+            connection.executemany("INSERT INTO messages (session_id, seq, role, content) VALUES (?, ?, ?, ?)",
+                                   [(session_id, first_seq + i, message.role.value, message.content or "")
+                                    for i, message in enumerate(messages)])
+            connection.execute("UPDATE sessions SET version = version + 1 WHERE session_id = ?", (session_id,))
+        return True
+
+    def __delete(self, session_id: str) -> None:
+        with self.__connect() as connection:
+            connection.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            connection.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def __purge(self, connection: sqlite3.Connection, now: float) -> None:
+        self.__purged_at = now
+        expired_before = now - self.__ttl_seconds
+        connection.execute("DELETE FROM messages WHERE session_id IN "
+                           "(SELECT session_id FROM sessions WHERE updated_at < ?)", (expired_before,))
+        purged = connection.execute("DELETE FROM sessions WHERE updated_at < ?", (expired_before,)).rowcount
+        if purged:
+            logger.info(f"Purged {purged} expired sessions")
+
+    def __connect(self) -> sqlite3.Connection:
+        # one short-lived connection per operation, so it is safe to use from the worker threads
+        return _ClosingConnection(sqlite3.connect(self.__path, timeout=30))
+
+class _ClosingConnection:
+    """
+    Context manager that commits (or rolls back) and then closes a SQLite connection.
+    """
+    def __init__(self, connection: sqlite3.Connection) -> None:
+        self.__connection = connection
+
+    def __enter__(self) -> sqlite3.Connection:
+        return self.__connection.__enter__()
+
+    def __exit__(self, *exc_info) -> None:
+        try:
+            self.__connection.__exit__(*exc_info)
+        finally:
+            self.__connection.close()
@@ -0,0 +1,162 @@
+import os
+import time
+import logging
+from collections import OrderedDict
+from typing import Optional, List
+from dotenv import load_dotenv
+
+import numpy as np
+from semantic_kernel.connectors.ai.embedding_generator_base import EmbeddingGeneratorBase
+
+from ..models.cached_answer_model import CachedAnswer
+from ..services.oai_services import get_cached_embedding_service
+from ..services.knowledge_base_service import get_index_generation
+from ..utils.singleton_decorator import singleton
+from ..utils.query_normalizer import normalize_query
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+# Cosine similarity above which two questions share an answer; 0 disables the semantic match.
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))
+
+class AnswerCacheKey:
+    """
+    Lookup key of a question: its normalized text and, when semantic matching is enabled, its unit embedding.
+    """
+    __slots__ = ("text", "embedding")
+
+    def __init__(self, text: str, embedding: Optional[np.ndarray]) -> None:
+        self.text = text
+        self.embedding = embedding
+
+class _AnswerCacheEntry:
+    __slots__ = ("answer", "embedding", "created_at")
+
+    def __init__(self, answer: CachedAnswer, embedding: Optional[np.ndarray], created_at: float) -> None:
+        self.answer = answer
+        self.embedding = embedding
+        self.created_at = created_at
+
+@singleton
+class AnswerCacheService:
+    """
+    In-process cache of complete answers to standalone questions, matched by normalized text or embedding similarity.
+
+    Entries expire after ANSWER_CACHE_TTL_SECONDS, the least recently used entry is evicted once
+    ANSWER_CACHE_SIZE is reached, and the whole cache is dropped whenever ingestion changes the index.
+    """
+    __entries: "OrderedDict[str, _AnswerCacheEntry]"
+    __embedding_service: "EmbeddingGeneratorBase"
+
+    def __init__(self, embedding_service: Optional[EmbeddingGeneratorBase] = None):
+        """
+        Initialize the answer cache.
+
+        Args:
+            embedding_service (EmbeddingGeneratorBase, optional): Service used to embed questions.
+                Defaults to the cached Azure OpenAI embedding service.
+        """
+        self.__entries = OrderedDict()
+        self.__embedding_service = embedding_service or get_cached_embedding_service()
+        self.__index_generation = get_index_generation()
+        self.__matrix: Optional[np.ndarray] = None
+        self.__matrix_keys: List[str] = []
+
+    async def get_key_async(self, query: str) -> AnswerCacheKey:
+        """
+        Build the lookup key of a question.
+
+        Args:
+            query (str): The user query.
+
+        Returns:
+            AnswerCacheKey: The key to use with get and put.
+        """
+        text = normalize_query(query)
+        if ANSWER_CACHE_SIMILARITY <= 0 or text in self.__entries:
+            return AnswerCacheKey(text, None)
+
+        embedding = (await self.__embedding_service.generate_embeddings([text]))[0]
+        embedding = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(embedding)
+        return AnswerCacheKey(text, embedding / norm if norm else embedding)
+
+    def get(self, key: AnswerCacheKey) -> Optional[CachedAnswer]:
+        """
+        Find a cached answer for the question.
+
+        Args:
+            key (AnswerCacheKey): The question key.
+
+        Returns:
+            Optional[CachedAnswer]: The cached answer or None.
+        """
+        self.__evict_stale()
+
+        entry_key = key.text if key.text in self.__entries else self.__find_similar(key.embedding)
+        if entry_key is None:
+            logger.info(f"Answer cache miss: {key.text}")
+            return None
+
+        self.__entries.move_to_end(entry_key)
+        logger.info(f"Answer cache hit: '{key.text}' -> '{entry_key}'")
+        return self.__entries[entry_key].answer
+
+    def put(self, key: AnswerCacheKey, answer: CachedAnswer) -> None:
+        """
+        Cache the answer to a question.
+
+        Args:
+            key (AnswerCacheKey): The question key.
+            answer (CachedAnswer): The answer to cache.
+        """
+        self.__evict_stale()
+        existing = self.__entries.get(key.text)
+        embedding = key.embedding if key.embedding is not None or existing is None else existing.embedding
+        self.__entries[key.text] = _AnswerCacheEntry(answer, embedding, time.monotonic())
+        self.__entries.move_to_end(key.text)
+        while len(self.__entries) > ANSWER_CACHE_SIZE:
+            self.__entries.popitem(last=False)
+        self.__matrix = None
+
+    def clear(self) -> None:
+        """
+        Drop every cached answer.
+        """
+        self.__entries.clear()
+        self.__matrix = None
+
+    def __evict_stale(self) -> None:
+        generation = get_index_generation()
+        if generation != self.__index_generation:
+            logger.info("Knowledge base changed, clearing answer cache.")
+            self.__index_generation = generation
+            self.clear()
+            return
+
+        expired_before = time.monotonic() - ANSWER_CACHE_TTL_SECONDS
+        expired = [k for k, entry in self.__entries.items() if entry.created_at < expired_before]
+        for k in expired:
+            del self.__entries[k]
+        if expired:
+            self.__matrix = None
+
+    def __find_similar(self, embedding: Optional[np.ndarray]) -> Optional[str]:
+        if embedding is None or not self.__entries:
+            return None
+
+        if self.__matrix is None:
+            self.__matrix_keys = [k for k, entry in self.__entries.items() if entry.embedding is not None]
+            self.__matrix = (np.vstack([self.__entries[k].embedding for k in self.__matrix_keys])
+                             if self.__matrix_keys else np.empty((0, embedding.shape[0]), dtype=np.float32))
+        if not self.__matrix_keys:
+            return None
+
+        similarities = self.__matrix @ embedding
+        best = int(np.argmax(similarities))
+        if similarities[best] < ANSWER_CACHE_SIMILARITY:
+            return None
+        return self.__matrix_keys[best]
@@ -1,13 +1,135 @@
+import re
+import uuid
 import logging
+from typing import List, Optional
 
-from semantic_kernel.contents import ChatHistory
+from semantic_kernel.contents import ChatHistory, ChatMessageContent, AuthorRole
+
+from ..contract.session_store_base import SessionStoreBase
 
 logger = logging.getLogger(__name__)
 
+SESSION_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
 class ChatHistoryService:
     """
     Service for managing chat history operations.
     """
+    __session_store: Optional["SessionStoreBase"]
+
+    def __init__(self, session_store: Optional[SessionStoreBase] = None) -> None:
+        """
+        Initialize the chat history service.
+
+        Args:
+            session_store (SessionStoreBase, optional): Server-side store of conversation sessions.
+        """
+        self.__session_store = session_store
+
+    @staticmethod
+    def new_session_id() -> str:
+        """
+        Generate a new, unguessable session id.
+
+        Returns:
+            str: The session id.
+        """
+        return uuid.uuid4().hex
+
+    async def load_session_async(self, session_id: str) -> ChatHistory:
+        """
+        Load the chat history of a session; an unknown or expired session starts an empty history.
+
+        Args:
+            session_id (str): The session id.
+
+        Returns:
+            ChatHistory: The session's chat history.
+
+        Raises:
+            ValueError: If the session id is malformed.
+        """
+        self.__validate(session_id)
+        history = await self.__store().load_async(session_id)
+        return history if history is not None else ChatHistory()
+
+    async def append_turn_async(self, session_id: str, user_query: str, assistant_response: str) -> None:
+        """
+        Append one question and its answer to a session.
+
+        Args:
+            session_id (str): The session id.
+            user_query (str): The user's query.
+            assistant_response (str): The assistant's response.
+
+        Raises:
+            ValueError: If the session id is malformed.
+        """
+        self.__validate(session_id)
+        await self.__store().append_async(session_id, [
+            ChatMessageContent(role=AuthorRole.USER, content=user_query),
+            ChatMessageContent(role=AuthorRole.ASSISTANT, content=assistant_response),
+        ])
+
+    async def get_session_version_async(self, session_id: str) -> Optional[int]:
+        """
+        Get the version of a session, a counter that changes with every write to it.
+
+        Args:
+            session_id (str): The session id.
+
+        Returns:
+            Optional[int]: The session version, or None if the session is unknown or expired.
+
+        Raises:
+            ValueError: If the session id is malformed.
+        """
+        self.__validate(session_id)
+        return await self.__store().get_version_async(session_id)
+
+    async def replace_head_async(self, session_id: str, head_length: int, messages: List[ChatMessageContent],
+                                 expected_version: Optional[int] = None) -> bool:
+        """
+        Replace the oldest messages of a session, such as older turns by their summary.
+
+        Args:
+            session_id (str): The session id.
+            head_length (int): Number of oldest messages to replace.
+            messages (List[ChatMessageContent]): The messages that take their place.
+            expected_version (int, optional): Only replace the head if the session is still at this version.
+                Defaults to replacing unconditionally.
+
+        Returns:
+            bool: True if the head was replaced, False if the session is unknown or changed since expected_version.
+
+        Raises:
+            ValueError: If the session id is malformed.
+        """
+        self.__validate(session_id)
+        return await self.__store().replace_head_async(session_id, head_length, messages, expected_version)
+
+    async def delete_session_async(self, session_id: str) -> None:
+        """
+        Delete a session and its history.
+
+        Args:
+            session_id (str): The session id.
+
+        Raises:
+            ValueError: If the session id is malformed.
+        """
+        self.__validate(session_id)
+        await self.__store().delete_async(session_id)
+
+    def __store(self) -> SessionStoreBase:
+        if self.__session_store is None:
+            raise RuntimeError("ChatHistoryService has no session store configured.")
+        return self.__session_store
+
+    @staticmethod
+    def __validate(session_id: str) -> None:
+        if not SESSION_ID_PATTERN.fullmatch(session_id or ""):
+            raise ValueError("Invalid session id.")
     
     @staticmethod
     def load_chat_history(history:str)->ChatHistory:
@@ -35,6 +157,32 @@ class ChatHistoryService:
         """
         return ChatHistory.to_prompt(chat_history)
     
+    @staticmethod
+    def render_transcript(chat_history: ChatHistory) -> str:
+        """
+        Render a chat history as a plain-text transcript, one "Role: content" line per message.
+
+        Args:
+            chat_history (ChatHistory): The chat history object.
+
+        Returns:
+            str: The transcript.
+        """
+        return "\n".join(ChatHistoryService.render_message(message) for message in chat_history.messages)
+    
+    @staticmethod
+    def render_message(message: ChatMessageContent) -> str:
+        """
+        Render one message as a "Role: content" transcript entry.
+
+        Args:
+            message (ChatMessageContent): The message.
+
+        Returns:
+            str: The transcript entry; it spans several lines if the content does.
+        """
+        return f"{message.role.value.capitalize()}: {message.content}"
+    
     @staticmethod
     def initialize_chat()->ChatHistory:
         """
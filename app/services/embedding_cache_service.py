@@ -0,0 +1,128 @@
+import os
+import re
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv
+
+import numpy as np
+from pydantic import PrivateAttr
+from semantic_kernel.connectors.ai.embedding_generator_base import EmbeddingGeneratorBase
+from semantic_kernel.connectors.ai.prompt_execution_settings import PromptExecutionSettings
+
+from ..utils.persistent_embedding_store import PersistentEmbeddingStore
+from ..utils.telemetry import CACHE_LOOKUPS, CACHE_ENTRIES
+from ..utils.token_counter import count_tokens
+from ..utils.usage_tracker import record_usage
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "4096"))
+# Directory of the on-disk tier shared by all workers; empty keeps the cache in-process only.
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", ".cache/embeddings")
+
+class CachedEmbeddingService(EmbeddingGeneratorBase):
+    """
+    Embedding generator that serves repeated texts from a content-hash keyed cache.
+
+    Lookups go through an in-process LRU first, then a persistent memory-mapped store on disk, and only
+    the remaining texts are sent to the wrapped service in a single request.
+    """
+    _inner: EmbeddingGeneratorBase = PrivateAttr()
+    _memory: "OrderedDict[str, np.ndarray]" = PrivateAttr()
+    _disk: Optional[PersistentEmbeddingStore] = PrivateAttr()
+    _stats: Dict[str, int] = PrivateAttr()
+
+    def __init__(self, inner: EmbeddingGeneratorBase, cache_dir: Optional[str] = None) -> None:
+        """
+        Wrap an embedding service with the cache.
+
+        Args:
+            inner (EmbeddingGeneratorBase): The embedding service to cache.
+            cache_dir (str, optional): Directory of the on-disk tier. Defaults to EMBEDDING_CACHE_DIR.
+        """
+        super().__init__(ai_model_id=inner.ai_model_id, service_id=inner.service_id)
+        self._inner = inner
+        self._memory = OrderedDict()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+        cache_dir = EMBEDDING_CACHE_DIR if cache_dir is None else cache_dir
+        model_dir = re.sub(r"[^\w.-]", "_", inner.ai_model_id)
+        self._disk = PersistentEmbeddingStore(os.path.join(cache_dir, model_dir)) if cache_dir else None
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Hit and miss counters of the cache; /metrics exports them as george_cache_lookups of the "embedding" cache.
+
+        Returns:
+            Dict[str, int]: memory_hits, disk_hits and misses since start-up.
+        """
+        return dict(self._stats)
+
+    async def generate_embeddings(
+        self,
+        texts: List[str],
+        settings: Optional[PromptExecutionSettings] = None,
+        **kwargs: Any,
+    ) -> np.ndarray:
+        """
+        Returns embeddings for the given texts, generating only the ones that are not cached.
+
+        Args:
+            texts (List[str]): The texts to embed.
+            settings (PromptExecutionSettings, optional): Settings passed to the wrapped service.
+            **kwargs: Additional arguments passed to the wrapped service.
+
+        Returns:
+            np.ndarray: One embedding per text, in order.
+        """
+        keys = [self.__key(text) for text in texts]
+        found: Dict[str, np.ndarray] = {}
+
+        for key in keys:
+            if key in self._memory and key not in found:
+                self._memory.move_to_end(key)
+                found[key] = self._memory[key]
+                self.__count("memory_hits")
+
+        if self._disk is not None and len(found) < len(set(keys)):
+            missing = [key for key in dict.fromkeys(keys) if key not in found]
+            from_disk = await asyncio.to_thread(self._disk.get_many, missing)
+            self.__count("disk_hits", len(from_disk))
+            for key, embedding in from_disk.items():
+                found[key] = embedding
+                self.__remember(key, embedding)
+
+        to_generate = {key: text for key, text in zip(keys, texts) if key not in found}
+        if to_generate:
+            self.__count("misses", len(to_generate))
+            generated = await self._inner.generate_embeddings(list(to_generate.values()), settings, **kwargs)
+            # the service reports usage per client, not per call, so the embedded texts are counted locally
+            record_usage("embedding", sum(count_tokens(text) for text in to_generate.values()), estimated=True)
+            new_items = [(key, np.asarray(embedding, dtype=np.float32)) for key, embedding in zip(to_generate, generated)]
+            for key, embedding in new_items:
+                found[key] = embedding
+                self.__remember(key, embedding)
+            if self._disk is not None:
+                await asyncio.to_thread(self._disk.put_many, new_items)
+
+        logger.info(f"Embedding cache: {len(texts)} texts, {len(to_generate)} generated, stats: {self._stats}")
+        return np.array([found[key] for key in keys])
+
+    def __count(self, result: str, amount: int = 1) -> None:
+        self._stats[result] += amount
+        CACHE_LOOKUPS.labels("embedding", result).inc(amount)
+
+    def __remember(self, key: str, embedding: np.ndarray) -> None:
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+        while len(self._memory) > EMBEDDING_CACHE_SIZE:
+            self._memory.popitem(last=False)
+        CACHE_ENTRIES.labels("embedding").set(len(self._memory))
+
+    def __key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.ai_model_id}\0{text}".encode("utf-8")).hexdigest()
@@ -1,18 +1,48 @@
-import logging
+import os
 import json
+import time
 import asyncio
-from typing import Optional, Any, Dict, Tuple
+import hashlib
+import logging
+from typing import AsyncGenerator, Awaitable, Optional, Any, Dict, Tuple
+from dotenv import load_dotenv
 
 from semantic_kernel.contents import ChatHistory
+from semantic_kernel.contents.streaming_content_mixin import StreamingContentMixin
 
 from ..services.knowledge_base_service import KnowledgeBaseService 
+from ..services.answer_cache_service import AnswerCacheService, AnswerCacheKey
+from ..services.chat_history_service import ChatHistoryService
+from ..services.history_compaction_service import HistoryCompactionService
+from ..services.prompt_budget_service import PromptBudgetService
+from ..services.query_router_service import QueryRouterService
+from ..models.cached_answer_model import CachedAnswer
+from ..models.query_plan_model import QueryPlan
 from ..models.knowledge_base_model import PodCastKnowledgeBaseModel
 from ..models.web_search_result_model import WebSearchResult
 from ..contract.kernel_repository_base import KernelRepositoryBase
 from ..connectors.search_engine.bing_serapi_connector import SearchConnectorBase
+from ..utils.stage_scheduler import StageScheduler
+from ..utils.stream_coalescer import StreamCoalescer
+from ..utils.single_flight import StreamSingleFlight
+from ..utils.query_normalizer import normalize_query
+from ..utils.prefix_detector import detect_marker_prefix_async
+from ..utils.telemetry import stage_span, record_stage
+from ..utils.usage_tracker import UsageTracker, track_usage
 
+load_dotenv()
 logger = logging.getLogger(__name__)
 
+# Coalesce concurrent identical questions (same normalized query and history) into one pipeline run.
+QA_SINGLE_FLIGHT = os.getenv("QA_SINGLE_FLIGHT", "true").lower() == "true"
+# How the retrieval queries are planned: "combined" (one PlanQuery call, falling back to the separate calls
+# when its output is invalid) or "separate" (BreakDownQuery and RegenerateQuery).
+QUERY_PLANNER = os.getenv("QUERY_PLANNER", "combined").lower()
+NO_ANSWER = "NO ANSWER"
+
+# Shared by every service instance so requests coalesce across the whole process.
+_in_flight = StreamSingleFlight()
+
 class GeorgeQAService:
     """
     Service for handling Q&A logic using knowledge base, web search, and chat history.
@@ -20,10 +50,19 @@ class GeorgeQAService:
     __kernel: "KernelRepositoryBase"
     __memory_service: "KnowledgeBaseService"
     __search_connector: "SearchConnectorBase"
+    __coalescer: "StreamCoalescer"
+    __prompt_budget: "PromptBudgetService"
+    __router: "QueryRouterService"
+    __answer_cache: Optional["AnswerCacheService"]
+    __chat_history_service: Optional["ChatHistoryService"]
+    __history_compaction: Optional["HistoryCompactionService"]
     
     def __init__(self, kernel: KernelRepositoryBase, 
                  memory_service: KnowledgeBaseService,
-                 search_connector: SearchConnectorBase) -> None:
+                 search_connector: SearchConnectorBase,
+                 answer_cache: Optional[AnswerCacheService] = None,
+                 chat_history_service: Optional[ChatHistoryService] = None,
+                 history_compaction: Optional[HistoryCompactionService] = None) -> None:
         """
         Initialize the GeorgeQAService with kernel, memory service, and search connector.
 
@@ -31,83 +70,251 @@ class GeorgeQAService:
             kernel (KernelRepositoryBase): The kernel repository instance.
             memory_service (KnowledgeBaseService): The knowledge base service.
             search_connector (SearchConnectorBase): The web search connector.
+            answer_cache (AnswerCacheService, optional): Cache of answers to standalone questions.
+            chat_history_service (ChatHistoryService, optional): Persists the turns of server-side sessions.
+            history_compaction (HistoryCompactionService, optional): Keeps long conversation histories bounded.
         """
         self.__kernel = kernel
         self.__memory_service = memory_service
         self.__search_connector = search_connector
+        self.__answer_cache = answer_cache
+        self.__chat_history_service = chat_history_service
+        self.__history_compaction = history_compaction
+        self.__coalescer = StreamCoalescer()
+        self.__prompt_budget = PromptBudgetService()
+        self.__router = QueryRouterService()
         
-    async def ask_streaming_async(self, query:str, chat_history:ChatHistory):
+    async def ask_streaming_async(self, query:str, chat_history:ChatHistory, session_id:Optional[str] = None,
+                                  api_key:Optional[str] = None, include_usage:bool = False):
         """
         Stream the answer to a question in chunks.
 
         Args:
             query (str): The user query.
             chat_history (ChatHistory): The conversation history.
+            session_id (str, optional): The server-side session the history belongs to. The new turn is
+                appended to the session and the history is not sent back to the client.
+            api_key (str, optional): The API key of the client; the token usage is accounted to it.
+            include_usage (bool, optional): Add the token usage of the answer to the final response.
 
         Yields:
             str: Chunks of the response or final response JSON.
         """
         try:
-            # Streaming response content
-            message_accumulator = ""
+            answer: Optional[CachedAnswer] = None
+            # Every model call of the pipeline started from here is accounted to this request. A question
+            # joining an identical one in flight, or answered from a cache, makes no model calls of its own.
+            usage = UsageTracker(api_key)
+            track_usage(usage)
             
-            result_from_history = await self.__kernel.check_history_async(query, chat_history)
+            # Identical questions asked at the same time share one run of the pipeline
+            answer_stream = (_in_flight.stream(self.__flight_key(query, chat_history),
+                                               lambda: self.__answer_async(query, chat_history))
+                             if QA_SINGLE_FLIGHT else self.__answer_async(query, chat_history))
+            async for item in answer_stream:
+                if isinstance(item, CachedAnswer):
+                    answer = item
+                else:
+                    yield item
             
-            if result_from_history.lower() != "no answer":
-                logger.warning(f"Agent Response - result from history: {result_from_history}")
-                for chunk in result_from_history.split(" "):
-                    message_accumulator += f"{chunk} "
-                    yield f"{chunk} "
-                    # logger.warning(f"Chunk: {chunk}")
-                    await asyncio.sleep(0.1)
-
-                chat_history = self.__add_to_chat_history(chat_history, query, result_from_history)
-                final_response = self.__final_response(message = message_accumulator.strip(), chat_history=chat_history)
-                
-                await asyncio.sleep(0.1)  # ensure async yield
-                yield f"\n<|END_OF_RESPONSE|>\n{json.dumps(final_response)}"
-                logger.info(f"Final Response - result from history: \n<|END_OF_RESPONSE|>\n{json.dumps(final_response)}")
+            # add the user query and assistant response to the chat history
+            # This is done by the ChatHistoryService in the kernel.
+            chat_history = await self.__record_turn_async(chat_history, session_id, query, answer.message)
+            final_response = self.__final_response(answer.message, answer.kb_results,
+                                                   answer.web_search_results, chat_history, session_id)
+            report = usage.report()
+            logger.info(f"Token usage ({usage.api_key}): {report.model_dump()}")
+            if include_usage:
+                final_response["usage"] = report.model_dump()
+            # Yield the final JSON string to client
+            yield f"\n<|END_OF_RESPONSE|>\n{json.dumps(final_response)}"
+            
+        except Exception as e:
+            logger.error(f"Encountered Error: {e}")
+            raise e
+    
+    async def __answer_async(self, query:str, chat_history:ChatHistory) -> AsyncGenerator[str | CachedAnswer, None]:
+        """
+        Run the Q&A pipeline: stream the frames of the answer, then the complete answer.
+
+        This part only depends on the query and the history, so it can be shared by identical requests;
+        recording the turn and building the final response is left to each request.
+
+        Args:
+            query (str): The user query.
+            chat_history (ChatHistory): The conversation history.
+
+        Yields:
+            str | CachedAnswer: The frames of the answer, then the answer with its sources.
+        """
+        # Streaming response content
+        message_accumulator = ""
+        
+        # Greetings and questions about George are answered locally, without any model call
+        decision = self.__router.route(query, chat_history)
+        if decision.answer is not None:
+            logger.info(f"Agent Response - from {decision.route.value} template: {decision.answer}")
+            yield decision.answer
+            yield CachedAnswer(message=decision.answer)
+            return  # 🚨 Important: do not continue to OpenAI call!
+        
+        # A standalone question does not depend on the conversation, so it may already have a cached answer
+        cache_key: Optional[AnswerCacheKey] = None
+        if self.__answer_cache and not chat_history.messages:
+            cache_key = await self.__answer_cache.get_key_async(query)
+            cached_answer = self.__answer_cache.get(cache_key)
+            
+            if cached_answer:
+                logger.info(f"Agent Response - from answer cache: {cached_answer.message}")
+                yield cached_answer.message
+                yield cached_answer
                 return  # 🚨 Important: do not continue to OpenAI call!
+        
+        # The prompts only see the summary and the latest turns of a long conversation
+        prompt_history = self.__history_compaction.window(chat_history) if self.__history_compaction else chat_history
+        
+        async with StageScheduler() as stages:
+            # Planning and the KB search only need the query and the incoming history, so they run while
+            # CheckHistory decides and are dropped if the history answers.
+            # Without a history there is nothing to answer from, so the first turn goes straight to retrieval.
+            # One planning call produces the queries of both searches
+            plan_task = stages.start("plan", self.plan_query_async(query, prompt_history))
+            stages.start("kb", self.__search_kb_async(plan_task))
+            
+            if decision.check_history:
+                # Streamed and consumed by the task running this pipeline: the request's own streaming task or,
+                # with QA_SINGLE_FLIGHT, the flight's background task shared by every identical request. Its
+                # first tokens tell whether the history can answer. The flight key includes the history, so
+                # all subscribers of a flight get the same decision; closing the stream on NO ANSWER only
+                # moves the shared run on to retrieval, and a run whose last subscriber left is cancelled,
+                # which closes the completion through the finally below.
+                history_stream = self.__kernel.check_history_stream_async(query, prompt_history)
+                try:
+                    with stage_span("check_history"):
+                        no_answer, result_from_history = await detect_marker_prefix_async(history_stream, NO_ANSWER)
+                    
+                    if not no_answer:
+                        stages.cancel("plan", "kb")
+                        # Forward the history answer live, starting with the tokens read to detect it.
+                        # Read directly rather than through the coalescer, so no other task is reading the
+                        # stream when the finally below closes it.
+                        yield result_from_history
+                        async for frame in history_stream:
+                            result_from_history += frame
+                            yield frame
+                        logger.warning(f"Agent Response - result from history: {result_from_history}")
+                        yield CachedAnswer(message=result_from_history)
+                        return  # 🚨 Important: do not continue to OpenAI call!
+                finally:
+                    # stops the CheckHistory completion as soon as it spelled NO ANSWER
+                    await history_stream.aclose()
             
-            kb_results, web_search_results = await self.__get_information_async(query, chat_history)
+            kb_results = await stages.result("kb")
             
             if not kb_results or len(kb_results) == 0:
                 fallback_message = "I am sorry, but I do not have enough information to answer that."
                 logger.info(f"Agent Response - info not sufficient: {fallback_message}")
-                for chunk in fallback_message.split(" "):
-                    message_accumulator += f"{chunk} "
-                    yield f"{chunk} "
-                    # logger.info(f"Chunk: {chunk}")
-                    await asyncio.sleep(0.1)
-                
-                # add the user query and assistant response to the chat history
-                # This is done by the ChatHistoryService in the kernel.
-                chat_history = self.__add_to_chat_history(chat_history, query, fallback_message)
-                final_response = self.__final_response(message = message_accumulator, chat_history=chat_history)
+                yield fallback_message
                 
-                await asyncio.sleep(0.1)  # ensure async yield
-                yield f"\n<|END_OF_RESPONSE|>\n{json.dumps(final_response)}"
+                answer = CachedAnswer(message=fallback_message)
+                self.__cache_answer(cache_key, answer)
+                yield answer
                 return  # 🚨 Important: do not continue to OpenAI call!
             
-            result = await self.__kernel.ask_async(query, kb_results, web_search_results, stream=True)
+            # The paid web search only runs for questions the knowledge base can answer
+            web_search_results = await self.__search_web_async(plan_task)
         
-            async for chunk in result:
-                message_accumulator += str(chunk[0])
-                # logger.info(f"Chunk: {str(chunk[0])}")
-                yield str(chunk[0])
-                await asyncio.sleep(0.1)
-            
-            # add the user query and assistant response to the chat history
-            # This is done by the ChatHistoryService in the kernel.
-            chat_history = self.__add_to_chat_history(chat_history, query, message_accumulator)
-            logger.info(f"Agent Response - using RAG: {message_accumulator}")
-            final_response = self.__final_response(message_accumulator, kb_results, web_search_results, chat_history)
-            # Yield the final JSON string to client
-            yield f"\n<|END_OF_RESPONSE|>\n{json.dumps(final_response)}"
-            
-        except Exception as e:
-            logger.error(f"Encountered Error: {e}")
-            raise e
+        # Fit the retrieved context and the history into the prompt budget
+        sections, budget_report = self.__prompt_budget.assemble(kb_results, web_search_results, prompt_history)
+        logger.info(f"Prompt budget usage: {budget_report.model_dump()}")
+        with stage_span("qa_last_token"):
+            qa_started_at = time.perf_counter()
+            first_token = True
+            result = await self.__kernel.ask_async(query, sections.knowledge_base, sections.web_search,
+                                                   stream=True, history=sections.history)
+        
+            # Forward tokens as soon as the model produces them, merging bursts into fewer frames
+            async for frame in self.__coalescer.coalesce(self.__stream_text(result)):
+                if first_token:
+                    record_stage("qa_first_token", qa_started_at)
+                    first_token = False
+                message_accumulator += frame
+                yield frame
+        
+        logger.info(f"Agent Response - using RAG: {message_accumulator}")
+        answer = CachedAnswer(message=message_accumulator,
+                              kb_results=kb_results,
+                              web_search_results=web_search_results)
+        self.__cache_answer(cache_key, answer)
+        yield answer
+    
+    @staticmethod
+    def __flight_key(query:str, chat_history:ChatHistory) -> Tuple[str, str]:
+        """
+        Identify a question for request coalescing: its normalized text and a fingerprint of the history.
+
+        Args:
+            query (str): The user query.
+            chat_history (ChatHistory): The conversation history.
+
+        Returns:
+            Tuple[str, str]: The coalescing key.
+        """
+        fingerprint = hashlib.sha256(ChatHistoryService.render_transcript(chat_history).encode("utf-8")).hexdigest()
+        return normalize_query(query), fingerprint
+    
+    async def __stream_text(self, result: AsyncGenerator[list[StreamingContentMixin], Any]) -> AsyncGenerator[str, None]:
+        """
+        Extract the text of each streamed model chunk.
+
+        Args:
+            result (AsyncGenerator): The streaming kernel result.
+
+        Yields:
+            str: The text of each chunk.
+        """
+        async for chunk in result:
+            yield str(chunk[0])
+    
+    def __cache_answer(self, cache_key: Optional[AnswerCacheKey], answer: CachedAnswer) -> None:
+        """
+        Store an answer in the answer cache when the question was cacheable.
+
+        Args:
+            cache_key (Optional[AnswerCacheKey]): The key of the question, None if it is not cacheable.
+            answer (CachedAnswer): The answer to store.
+        """
+        if self.__answer_cache and cache_key:
+            self.__answer_cache.put(cache_key, answer)
+    
+    async def __record_turn_async(self, chat_history:ChatHistory, session_id:Optional[str],
+                                  user_query:str, assistant_response:str) -> ChatHistory:
+        """
+        Add the turn to the chat history and compact the history once it grew too long.
+
+        A server-side session gets the turn appended to the session store and is compacted in the
+        background. A client-held history has no session to compact later, so its older turns are summarized
+        now: the answer has been streamed already, and the client gets the compacted history back.
+
+        Args:
+            chat_history (ChatHistory): The conversation history.
+            session_id (Optional[str]): The session id, None for a client-held history.
+            user_query (str): The user's query.
+            assistant_response (str): The assistant's response.
+
+        Returns:
+            ChatHistory: Updated chat history.
+        """
+        chat_history = self.__add_to_chat_history(chat_history, user_query, assistant_response)
+        if session_id and self.__chat_history_service:
+            await self.__chat_history_service.append_turn_async(session_id, user_query, assistant_response)
+            # summarize older turns in the background, after the answer is complete
+            if self.__history_compaction and self.__history_compaction.needs_compaction(chat_history):
+                self.__history_compaction.schedule(session_id)
+        elif not session_id and self.__history_compaction and self.__history_compaction.needs_compaction(chat_history):
+            with stage_span("compact_history"):
+                chat_history = await self.__history_compaction.compact_history_async(chat_history)
+        return chat_history
     
     def __add_to_chat_history(self, chat_history:ChatHistory, user_query:str, assistant_response:str) -> ChatHistory:
         """
@@ -129,7 +336,8 @@ class GeorgeQAService:
                         message:str, 
                         kb_results:list[Dict[str, Any] | None] = [], 
                         web_search_results: Any | Dict[str, Dict[str, Any]] = {}, 
-                        chat_history:ChatHistory = None) -> dict[str, Any]:
+                        chat_history:ChatHistory = None,
+                        session_id:Optional[str] = None) -> dict[str, Any]:
         """
         Create the final response dictionary to be returned to the client.
 
@@ -138,64 +346,86 @@ class GeorgeQAService:
             kb_results (list, optional): Knowledge base results.
             web_search_results (dict, optional): Web search results.
             chat_history (ChatHistory, optional): The conversation history.
+            session_id (str, optional): The server-side session; its history stays on the server.
 
         Returns:
             dict: The response dictionary.
         """
-        return {
+        response = {
             "name": "George",
             "message": message,
             "kb_results": kb_results,
             "web_search_results": web_search_results,
-            "chat_history": chat_history.to_prompt() if chat_history else None
+            "chat_history": chat_history.to_prompt() if chat_history and not session_id else None
         }
+        if session_id:
+            response["session_id"] = session_id
+        return response
+    
+    async def __search_kb_async(self, plan:Awaitable[QueryPlan]) -> list[Dict[str, Any]]:
+        """
+        Retrieve unique knowledge base results for the planned sub-queries.
+
+        Args:
+            plan (Awaitable[QueryPlan]): The query plan.
+
+        Returns:
+            list: Knowledge base results, unique by (podcast_title, time_stamp).
+        """
+        # The query is broken down into smaller queries for better results by the planner
+        # shielded so cancelling this search does not cancel the plan the web search also needs
+        re_queries = (await asyncio.shield(plan)).recomposed_queries
+        
+        # Retrieve stored knowledge base results for all re-composed queries in one batch,
+        # merged and de-duplicated by the KnowledgeBaseService.
+        kb_results = await self.__memory_service.search_kb_batch_async(re_queries)
+        logger.info(f"KB Results: {kb_results}")
+        return kb_results
     
-    async def __get_information_async(self, query:str, chat_history:ChatHistory):
+    async def __search_web_async(self, plan:Awaitable[QueryPlan]) -> Dict[str, Dict[str, Any]]:
         """
-        Get information from knowledge base and web search.
+        Search the web with the planned self-contained query.
+
+        Args:
+            plan (Awaitable[QueryPlan]): The query plan.
+
+        Returns:
+            dict: The web search results.
+        """
+        re_generate_query = (await asyncio.shield(plan)).web_query
+        # Perform web search using the Bing web search API
+        # This is done by the WebSearchEnginePlugin in the kernel.
+        with stage_span("web_search"):
+            web_search_results = await self.__search_connector.search_async(re_generate_query, num_results=3)
+        logger.info(f"Web Search Results: {web_search_results}")
+        return web_search_results
+    
+    async def plan_query_async(self, query:str, chat_history:ChatHistory) -> QueryPlan:
+        """
+        Plan the knowledge base sub-queries and the web search query.
+
+        With the combined planner a single PlanQuery call returns both; if its output is not a valid
+        plan, the separate BreakDownQuery and RegenerateQuery calls are made instead.
 
         Args:
             query (str): The user query.
             chat_history (ChatHistory): The conversation history.
 
         Returns:
-            Tuple: (kb_results, web_search_results)
+            QueryPlan: The query plan.
         """
-        # Break down the query into smaller queries for better results
-        # This is done by the QueryStructuringPlugin in the kernel.
-        re_queries = await self.breakdown_query_async(query,chat_history)
+        if QUERY_PLANNER == "combined":
+            try:
+                with stage_span("plan"):
+                    plan = await self.__kernel.plan_query_async(query, chat_history)
+                logger.info(f"Query plan: {plan.model_dump()}")
+                return plan
+            except ValueError as e:
+                logger.warning(f"Invalid query plan, falling back to separate calls: {e}")
         
-        # Retrieve stored knowledge base results for each re-composed query
-        # This is done by the KnowledgeBaseService in the kernel.
-        kb_results = await asyncio.gather(*(self.__memory_service.search_kb_async(query) for query in re_queries['recomposed_queries']))
-
-        # Remove duplicates using (podcast_title, time_stamp) as the unique key
-        if(kb_results):
-            seen = set()
-            unique_kb_results = []
-            for item in kb_results:
-                if item:
-                    key = (item.get("podcast_title"), item.get("time_stamp"))
-                    if key not in seen:
-                        unique_kb_results.append(item)
-                        seen.add(key)
-            kb_results = unique_kb_results
-            logger.info(f"KB Results: {kb_results}")
-            
-            web_search_results = {}
-            
-            if len(kb_results) > 0:
-                re_generate_query = await self.regenerate_query_async(query, chat_history)
-                # Perform web search using the Bing web search API
-                # This is done by the WebSearchEnginePlugin in the kernel.
-                web_search_results = await self.__search_connector.search_async(re_generate_query, num_results=3)
-                logger.info(f"Web Search Results: {web_search_results}")
-        
-        ## Convert the results to the appropriate models
-        if not isinstance(web_search_results, dict):
-            web_search_results = json.loads(web_search_results)
-    
-        return kb_results, web_search_results
+        re_queries, re_generate_query = await asyncio.gather(self.breakdown_query_async(query, chat_history),
+                                                             self.regenerate_query_async(query, chat_history))
+        return QueryPlan(recomposed_queries=re_queries['recomposed_queries'], web_query=re_generate_query)
             
     async def breakdown_query_async(self, query:str, chat_history:ChatHistory)-> dict[str, str]:
         """
@@ -209,7 +439,8 @@ class GeorgeQAService:
             dict: The breakdown result.
         """
         try:
-            return json.loads((await self.__kernel.breakdown_query_async(query,chat_history)))
+            with stage_span("breakdown"):
+                return json.loads((await self.__kernel.breakdown_query_async(query,chat_history)))
         except Exception as e:
             logger.error(f"Encountered Error: {e}")
             raise e
@@ -226,7 +457,8 @@ class GeorgeQAService:
             str: The regenerated query.
         """
         try:
-            return await self.__kernel.regenerate_query_async(query,chat_history)
+            with stage_span("regenerate"):
+                return await self.__kernel.regenerate_query_async(query,chat_history)
         except Exception as e:
             logger.error(f"Encountered Error: {e}")
             raise e
\ No newline at end of file
@@ -0,0 +1,186 @@
+import os
+import asyncio
+import logging
+from typing import Dict, Optional, Tuple
+from dotenv import load_dotenv
+
+from semantic_kernel.contents import ChatHistory, ChatMessageContent, AuthorRole
+
+from ..contract.kernel_repository_base import KernelRepositoryBase
+from ..services.chat_history_service import ChatHistoryService
+from ..utils.token_counter import count_tokens
+from ..utils.singleton_decorator import singleton
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# Once a conversation's transcript exceeds this many tokens, its older turns are summarized.
+HISTORY_COMPACT_THRESHOLD_TOKENS = int(os.getenv("HISTORY_COMPACT_THRESHOLD_TOKENS", "1500"))
+# Most recent question/answer turns that are always kept verbatim.
+HISTORY_KEEP_TURNS = int(os.getenv("HISTORY_KEEP_TURNS", "3"))
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+
+@singleton
+class HistoryCompactionService:
+    """
+    Keeps conversation histories bounded by folding older turns into a rolling summary.
+
+    The summary is a single system message at the start of the history, produced by the kernel's
+    ConversationSummaryPlugin from the previous summary and the turns it replaces, while the last
+    HISTORY_KEEP_TURNS turns stay verbatim. Sessions are compacted in the background once a response
+    has been recorded and client-held histories once it has streamed, so summarization never delays
+    an answer; until then the prompts see the ``window`` of the history.
+    """
+    __kernel: "KernelRepositoryBase"
+    __chat_history_service: "ChatHistoryService"
+    __tasks: Dict[str, "asyncio.Task"]
+
+    def __init__(self, kernel: KernelRepositoryBase, chat_history_service: ChatHistoryService) -> None:
+        """
+        Initialize the compaction service.
+
+        Args:
+            kernel (KernelRepositoryBase): The kernel repository that summarizes conversations.
+            chat_history_service (ChatHistoryService): The chat history service backed by the session store.
+        """
+        self.__kernel = kernel
+        self.__chat_history_service = chat_history_service
+        self.__tasks = {}
+
+    def needs_compaction(self, chat_history: ChatHistory) -> bool:
+        """
+        Check whether a history is over the token threshold and has turns that can be summarized.
+
+        Args:
+            chat_history (ChatHistory): The conversation history.
+
+        Returns:
+            bool: True if the history should be compacted.
+        """
+        head_length, _ = self.__split(chat_history)
+        return head_length > 0 and \
+            count_tokens(ChatHistoryService.render_transcript(chat_history)) > HISTORY_COMPACT_THRESHOLD_TOKENS
+
+    def window(self, chat_history: ChatHistory) -> ChatHistory:
+        """
+        Bound the history sent to the prompts: over the threshold, only the summary and the last turns are kept.
+
+        This is what the prompts see of a history whose compaction has not run yet: a session waiting for its
+        background compaction, or a client-held history, which ``compact_history_async`` summarizes once the
+        answer has streamed. Either way the dropped turns are folded into the summary rather than lost.
+
+        Args:
+            chat_history (ChatHistory): The conversation history.
+
+        Returns:
+            ChatHistory: The history itself, or a bounded copy of it.
+        """
+        if not self.needs_compaction(chat_history):
+            return chat_history
+        head_length, summary = self.__split(chat_history)
+        kept = chat_history.messages[head_length:]
+        return ChatHistory(messages=([summary] if summary else []) + list(kept))
+
+    async def compact_history_async(self, chat_history: ChatHistory) -> ChatHistory:
+        """
+        Fold the older turns of a client-held history into its summary.
+
+        Client-held histories have no session to compact in the background, so their head is summarized once
+        the answer has streamed, and the compacted history is what the client gets back. If summarization
+        fails, the history is returned as it was and compacted again after the next turn.
+
+        Args:
+            chat_history (ChatHistory): The conversation history.
+
+        Returns:
+            ChatHistory: The history itself, or a copy whose older turns are replaced by the summary.
+        """
+        try:
+            compaction = await self.compact_async(chat_history)
+        except Exception as e:
+            logger.error(f"Failed to compact the conversation history: {e}")
+            return chat_history
+        if compaction is None:
+            return chat_history
+        head_length, summary = compaction
+        logger.info(f"Compacted {head_length} messages of a client-held history into a summary")
+        return ChatHistory(messages=[summary] + list(chat_history.messages[head_length:]))
+
+    def schedule(self, session_id: str) -> None:
+        """
+        Compact a session in the background, unless a compaction of it is already running.
+
+        Args:
+            session_id (str): The session id.
+        """
+        if session_id in self.__tasks:
+            return
+        task = asyncio.ensure_future(self.__compact_session_async(session_id))
+        self.__tasks[session_id] = task
+        task.add_done_callback(lambda _: self.__tasks.pop(session_id, None))
+
+    async def compact_async(self, chat_history: ChatHistory) -> Optional[Tuple[int, ChatMessageContent]]:
+        """
+        Summarize the turns of a history that precede the last HISTORY_KEEP_TURNS.
+
+        Args:
+            chat_history (ChatHistory): The conversation history.
+
+        Returns:
+            Optional[Tuple[int, ChatMessageContent]]: The number of leading messages the summary replaces and
+                the summary message, or None if the history does not need compaction.
+        """
+        if not self.needs_compaction(chat_history):
+            return None
+        head_length, _ = self.__split(chat_history)
+        head = ChatHistory(messages=list(chat_history.messages[:head_length]))
+        summary = await self.__kernel.summarize_conversation_async(ChatHistoryService.render_transcript(head))
+        return head_length, ChatMessageContent(role=AuthorRole.SYSTEM, content=SUMMARY_PREFIX + summary.strip())
+
+    async def shutdown(self) -> None:
+        """
+        Cancel running compactions.
+        """
+        tasks = list(self.__tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def __compact_session_async(self, session_id: str) -> None:
+        try:
+            # read before the history, so head_length is only applied to the messages it was computed from
+            version = await self.__chat_history_service.get_session_version_async(session_id)
+            if version is None:
+                return
+            chat_history = await self.__chat_history_service.load_session_async(session_id)
+            compaction = await self.compact_async(chat_history)
+            if compaction is None:
+                return
+            head_length, summary = compaction
+            if not await self.__chat_history_service.replace_head_async(session_id, head_length, [summary], version):
+                # written to meanwhile (e.g. compacted by another worker); retried after the next turn
+                logger.info(f"Session {session_id} changed while it was summarized, skipping compaction")
+                return
+            logger.info(f"Compacted {head_length} messages of session {session_id} into a summary")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # the history stays as it was and is compacted again after the next turn
+            logger.error(f"Failed to compact session {session_id}: {e}")
+
+    @staticmethod
+    def __split(chat_history: ChatHistory) -> Tuple[int, Optional[ChatMessageContent]]:
+        """
+        Split a history into its compactable head and the turns kept verbatim.
+
+        Returns:
+            Tuple[int, Optional[ChatMessageContent]]: The head length (0 if nothing but the current summary
+                precedes the kept turns) and the current summary message, if any.
+        """
+        messages = chat_history.messages
+        summary = messages[0] if messages and messages[0].role == AuthorRole.SYSTEM \
+            and (messages[0].content or "").startswith(SUMMARY_PREFIX) else None
+        head_length = max(len(messages) - 2 * HISTORY_KEEP_TURNS, 0)
+        if head_length <= (1 if summary else 0):
+            return 0, summary
+        return head_length, summary
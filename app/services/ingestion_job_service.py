@@ -0,0 +1,225 @@
+import os
+import time
+import uuid
+import asyncio
+import logging
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+
+from ..models.ingestion_job_model import IngestionJob, IngestionJobStatus, TranscriptProgress
+from ..models.ingestion_report_model import IngestionReport
+from ..models.knowledge_base_model import PodCastKnowledgeBaseModel
+from ..services.knowledge_base_service import KnowledgeBaseService
+from ..utils.singleton_decorator import singleton
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# Jobs that may ingest at the same time; the rest wait in the queue so ingestion never takes over the event loop.
+INGEST_JOB_WORKERS = int(os.getenv("INGEST_JOB_WORKERS", "1"))
+INGEST_JOB_HISTORY = int(os.getenv("INGEST_JOB_HISTORY", "100"))
+MAX_JOB_ERRORS_KEPT = 20
+
+_FINISHED = (IngestionJobStatus.COMPLETED, IngestionJobStatus.FAILED, IngestionJobStatus.CANCELLED)
+
+@singleton
+class IngestionJobService:
+    """
+    Runs catalog ingestions as background jobs on a bounded pool of workers.
+
+    Jobs are tracked in-process with per-transcript progress, throughput, ETA and errors. A cancelled
+    or failed job can be resumed: the ingest manifest already records every saved batch, so the new
+    attempt skips the segments that were written before it stopped.
+    """
+    __jobs: Dict[str, IngestionJob]
+    __services: Dict[str, KnowledgeBaseService]
+    __running: Dict[str, "asyncio.Task"]
+    __workers: List["asyncio.Task"]
+
+    def __init__(self, workers: Optional[int] = None):
+        """
+        Initialize the job service.
+
+        Args:
+            workers (int, optional): Number of jobs that run at the same time. Defaults to INGEST_JOB_WORKERS.
+        """
+        self.__jobs = {}
+        self.__services = {}
+        self.__running = {}
+        self.__workers = []
+        self.__worker_count = workers or INGEST_JOB_WORKERS
+        self.__queue: Optional[asyncio.Queue] = None
+
+    def submit(self, kb_service: KnowledgeBaseService, full: bool = False) -> IngestionJob:
+        """
+        Queue an ingestion of the transcript catalog.
+
+        Args:
+            kb_service (KnowledgeBaseService): Service that performs the ingestion.
+            full (bool, optional): Re-ingest every segment even if unchanged. Defaults to False.
+
+        Returns:
+            IngestionJob: The queued job.
+        """
+        job = IngestionJob(id=uuid.uuid4().hex, full=full, created_at=time.time())
+        self.__jobs[job.id] = job
+        self.__services[job.id] = kb_service
+        self.__prune_history()
+        self.__enqueue(job)
+        logger.info(f"Ingestion job {job.id} queued (full={full})")
+        return job.model_copy(deep=True)
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        """
+        Get the current state of a job.
+
+        Args:
+            job_id (str): The job id.
+
+        Returns:
+            Optional[IngestionJob]: A snapshot of the job, or None if it is unknown.
+        """
+        job = self.__jobs.get(job_id)
+        return job.model_copy(deep=True) if job else None
+
+    def list(self) -> List[IngestionJob]:
+        """
+        List the tracked jobs, newest first.
+
+        Returns:
+            List[IngestionJob]: Snapshots of the jobs.
+        """
+        return [job.model_copy(deep=True) for job in sorted(self.__jobs.values(), key=lambda job: job.created_at, reverse=True)]
+
+    def cancel(self, job_id: str) -> IngestionJob:
+        """
+        Cancel a queued or running job.
+
+        Args:
+            job_id (str): The job id.
+
+        Returns:
+            IngestionJob: A snapshot of the job.
+
+        Raises:
+            KeyError: If the job is unknown.
+            ValueError: If the job already finished.
+        """
+        job = self.__jobs[job_id]
+        if job.status in _FINISHED:
+            raise ValueError(f"Job {job_id} is already {job.status.value}.")
+
+        task = self.__running.get(job_id)
+        if task is not None:
+            task.cancel()
+        else:
+            job.status = IngestionJobStatus.CANCELLED
+            job.finished_at = time.time()
+        logger.info(f"Ingestion job {job_id} cancelled")
+        return job.model_copy(deep=True)
+
+    def resume(self, job_id: str) -> IngestionJob:
+        """
+        Queue a cancelled or failed job again; segments saved by earlier attempts are skipped.
+
+        Args:
+            job_id (str): The job id.
+
+        Returns:
+            IngestionJob: A snapshot of the job.
+
+        Raises:
+            KeyError: If the job is unknown.
+            ValueError: If the job is not cancelled or failed.
+        """
+        job = self.__jobs[job_id]
+        if job.status not in (IngestionJobStatus.CANCELLED, IngestionJobStatus.FAILED) or job_id in self.__running:
+            raise ValueError(f"Job {job_id} is {job.status.value} and cannot be resumed.")
+
+        job.status = IngestionJobStatus.QUEUED
+        job.finished_at = None
+        self.__enqueue(job)
+        logger.info(f"Ingestion job {job_id} resumed")
+        return job.model_copy(deep=True)
+
+    async def shutdown(self) -> None:
+        """
+        Cancel running jobs and stop the workers.
+        """
+        tasks = [*self.__running.values(), *self.__workers]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.__workers = []
+        self.__queue = None
+
+    def __enqueue(self, job: IngestionJob) -> None:
+        if self.__queue is None:
+            # created lazily so the queue and workers bind to the running event loop
+            self.__queue = asyncio.Queue()
+            self.__workers = [asyncio.ensure_future(self.__worker()) for _ in range(self.__worker_count)]
+        self.__queue.put_nowait(job.id)
+
+    async def __worker(self) -> None:
+        while True:
+            job_id = await self.__queue.get()
+            job = self.__jobs.get(job_id)
+            if job is None or job.status != IngestionJobStatus.QUEUED:
+                continue
+
+            task = asyncio.ensure_future(self.__run(job))
+            self.__running[job_id] = task
+            try:
+                # waited on rather than awaited so cancelling the job does not cancel the worker
+                await asyncio.wait({task})
+            finally:
+                self.__running.pop(job_id, None)
+
+    async def __run(self, job: IngestionJob) -> None:
+        kb_service = self.__services[job.id]
+        job.status = IngestionJobStatus.RUNNING
+        job.started_at = time.time()
+        job.attempts += 1
+        job.report = IngestionReport()
+        job.transcripts = {title: TranscriptProgress(total=total)
+                           for title, total in kb_service.count_transcript_segments().items()}
+        job.total_segments = sum(progress.total for progress in job.transcripts.values())
+        job.processed_segments = 0
+        job.eta_seconds = None
+
+        def on_progress(segments: List[PodCastKnowledgeBaseModel]) -> None:
+            for segment in segments:
+                job.transcripts.setdefault(segment.podcast_title, TranscriptProgress()).done += 1
+            job.processed_segments += len(segments)
+            self.__update_rate(job)
+
+        try:
+            await kb_service.ingest_transcripts_async(full=job.full, report=job.report, on_progress=on_progress)
+            job.status = IngestionJobStatus.COMPLETED
+            logger.info(f"Ingestion job {job.id} completed: {job.report.model_dump()}")
+        except asyncio.CancelledError:
+            job.status = IngestionJobStatus.CANCELLED
+            logger.info(f"Ingestion job {job.id} stopped after {job.processed_segments} segments")
+        except Exception as e:
+            job.status = IngestionJobStatus.FAILED
+            job.error_count += 1
+            job.errors = (job.errors + [str(e)])[-MAX_JOB_ERRORS_KEPT:]
+            logger.error(f"Ingestion job {job.id} failed: {e}")
+        finally:
+            job.finished_at = time.time()
+            job.eta_seconds = 0.0 if job.status == IngestionJobStatus.COMPLETED else None
+
+    @staticmethod
+    def __update_rate(job: IngestionJob) -> None:
+        elapsed = time.time() - job.started_at
+        if elapsed <= 0:
+            return
+        job.segments_per_second = round(job.processed_segments / elapsed, 2)
+        remaining = max(job.total_segments - job.processed_segments, 0)
+        job.eta_seconds = round(remaining / job.segments_per_second, 2) if job.segments_per_second else None
+
+    def __prune_history(self) -> None:
+        finished = sorted((job for job in self.__jobs.values() if job.status in _FINISHED), key=lambda job: job.created_at)
+        for job in finished[:max(len(self.__jobs) - INGEST_JOB_HISTORY, 0)]:
+            del self.__jobs[job.id]
+            self.__services.pop(job.id, None)
@@ -0,0 +1,163 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Awaitable, AsyncIterable, Callable, Iterable, List, Optional, Tuple
+from dotenv import load_dotenv
+
+import numpy as np
+from numpy import ndarray
+
+from ..models.knowledge_base_model import PodCastKnowledgeBaseModel
+from ..models.ingestion_report_model import IngestionReport
+from ..contract.memory_repository_base import MemoryRepositoryBase
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+INGEST_EMBED_BATCH_SIZE = int(os.getenv("INGEST_EMBED_BATCH_SIZE", "16"))
+INGEST_EMBED_CONCURRENCY = int(os.getenv("INGEST_EMBED_CONCURRENCY", "4"))
+INGEST_UPSERT_BATCH_SIZE = int(os.getenv("INGEST_UPSERT_BATCH_SIZE", "64"))
+INGEST_UPSERT_CONCURRENCY = int(os.getenv("INGEST_UPSERT_CONCURRENCY", "2"))
+# Batches buffered between two stages; bounds memory when upstream is faster than downstream.
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "8"))
+
+_END = None
+
+class IngestionPipeline:
+    """
+    Pipelined bulk ingestion: segments -> batched embedding requests -> bulk index upserts.
+
+    Each stage runs concurrently with the others and hands work on through bounded queues, so
+    embedding of the next batches overlaps with the upserts of previous ones.
+    """
+    __kb: "MemoryRepositoryBase"
+
+    def __init__(self,
+                 kb: MemoryRepositoryBase,
+                 embed_batch_size: Optional[int] = None,
+                 embed_concurrency: Optional[int] = None,
+                 upsert_batch_size: Optional[int] = None,
+                 upsert_concurrency: Optional[int] = None) -> None:
+        """
+        Initialize the pipeline.
+
+        Args:
+            kb (MemoryRepositoryBase): The memory repository to ingest into.
+            embed_batch_size (int, optional): Segments per embedding request. Defaults to INGEST_EMBED_BATCH_SIZE.
+            embed_concurrency (int, optional): Concurrent embedding requests. Defaults to INGEST_EMBED_CONCURRENCY.
+            upsert_batch_size (int, optional): Segments per index upsert. Defaults to INGEST_UPSERT_BATCH_SIZE.
+            upsert_concurrency (int, optional): Concurrent index upserts. Defaults to INGEST_UPSERT_CONCURRENCY.
+        """
+        self.__kb = kb
+        self.__embed_batch_size = embed_batch_size or INGEST_EMBED_BATCH_SIZE
+        self.__embed_concurrency = embed_concurrency or INGEST_EMBED_CONCURRENCY
+        self.__upsert_batch_size = upsert_batch_size or INGEST_UPSERT_BATCH_SIZE
+        self.__upsert_concurrency = upsert_concurrency or INGEST_UPSERT_CONCURRENCY
+
+    async def run_async(self,
+                        segments: AsyncIterable[PodCastKnowledgeBaseModel] | Iterable[PodCastKnowledgeBaseModel],
+                        on_batch_saved: Optional[Callable[[List[PodCastKnowledgeBaseModel]], Awaitable[None] | None]] = None,
+                        report: Optional[IngestionReport] = None) -> IngestionReport:
+        """
+        Ingest segments into the knowledge base.
+
+        Args:
+            segments (AsyncIterable | Iterable[PodCastKnowledgeBaseModel]): The segments to ingest.
+            on_batch_saved (Callable, optional): Called with every batch once it is written to the index.
+            report (IngestionReport, optional): Report to fill in. Defaults to a new report.
+
+        Returns:
+            IngestionReport: Counts and throughput of the run.
+        """
+        report = report or IngestionReport()
+        embed_queue: asyncio.Queue = asyncio.Queue(INGEST_QUEUE_SIZE)
+        embedded_queue: asyncio.Queue = asyncio.Queue(INGEST_QUEUE_SIZE)
+        upsert_queue: asyncio.Queue = asyncio.Queue(INGEST_QUEUE_SIZE)
+        started_at = time.perf_counter()
+
+        async def embed_worker():
+            while (batch := await embed_queue.get()) is not _END:
+                embeddings = await self.__kb.embed_texts_async([segment.content for segment in batch])
+                report.embedding_batches += 1
+                await embedded_queue.put((batch, embeddings))
+
+        async def embed_stage():
+            await asyncio.gather(*(embed_worker() for _ in range(self.__embed_concurrency)))
+            await embedded_queue.put(_END)
+
+        async def upsert_worker():
+            while (item := await upsert_queue.get()) is not _END:
+                batch, embeddings = item
+                await self.__kb.save_memory_batch_async(batch, embeddings)
+                report.upsert_batches += 1
+                report.segments += len(batch)
+                if on_batch_saved:
+                    result = on_batch_saved(batch)
+                    if asyncio.iscoroutine(result):
+                        await result
+                logger.info(f"Ingested {report.segments} segments")
+
+        tasks = [
+            asyncio.ensure_future(self.__chunk_stage(segments, embed_queue)),
+            asyncio.ensure_future(embed_stage()),
+            asyncio.ensure_future(self.__regroup_stage(embedded_queue, upsert_queue)),
+            *(asyncio.ensure_future(upsert_worker()) for _ in range(self.__upsert_concurrency)),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # one failing stage stops the whole run instead of leaving the others blocked on their queues
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        report.seconds = round(time.perf_counter() - started_at, 4)
+        report.segments_per_second = round(report.segments / report.seconds, 2) if report.seconds else 0.0
+        logger.info(f"Ingestion finished: {report.model_dump()}")
+        return report
+
+    async def __chunk_stage(self, segments: AsyncIterable[PodCastKnowledgeBaseModel] | Iterable[PodCastKnowledgeBaseModel],
+                            embed_queue: asyncio.Queue) -> None:
+        """
+        Group segments into embedding batches.
+        """
+        batch: List[PodCastKnowledgeBaseModel] = []
+        async for segment in self.__iterate(segments):
+            batch.append(segment)
+            if len(batch) >= self.__embed_batch_size:
+                await embed_queue.put(batch)
+                batch = []
+        if batch:
+            await embed_queue.put(batch)
+        for _ in range(self.__embed_concurrency):
+            await embed_queue.put(_END)
+
+    async def __regroup_stage(self, embedded_queue: asyncio.Queue, upsert_queue: asyncio.Queue) -> None:
+        """
+        Regroup embedded segments into upsert batches.
+        """
+        batch: List[PodCastKnowledgeBaseModel] = []
+        embeddings: List[ndarray] = []
+        while (item := await embedded_queue.get()) is not _END:
+            embedded: Tuple[List[PodCastKnowledgeBaseModel], ndarray] = item
+            for segment, embedding in zip(*embedded):
+                batch.append(segment)
+                embeddings.append(embedding)
+                if len(batch) >= self.__upsert_batch_size:
+                    await upsert_queue.put((batch, np.stack(embeddings)))
+                    batch, embeddings = [], []
+        if batch:
+            await upsert_queue.put((batch, np.stack(embeddings)))
+        for _ in range(self.__upsert_concurrency):
+            await upsert_queue.put(_END)
+
+    @staticmethod
+    async def __iterate(segments: AsyncIterable[PodCastKnowledgeBaseModel] | Iterable[PodCastKnowledgeBaseModel]):
+        if hasattr(segments, "__aiter__"):
+            async for segment in segments:
+                yield segment
+        else:
+            for segment in segments:
+                yield segment
@@ -1,59 +1,255 @@
-import logging
+import os
+import json
+import time
 import asyncio
+import hashlib
+import logging
+from pathlib import Path
+from typing import Any, AsyncIterable, Callable, AsyncIterator, Dict, Iterable, Iterator, List, Optional
+from dotenv import load_dotenv
+
+import numpy as np
 
 from ..models.knowledge_base_model import PodCastKnowledgeBaseModel
-from ..utils.transcripts import TRANSCRIPTS
+from ..models.ingestion_report_model import IngestionReport
+from ..utils.transcript_upload_parser import transcript_segments
+from ..utils.mmr import mmr_select
 from ..contract.memory_repository_base import MemoryRepositoryBase
+from ..repository.ingest_manifest_repository import IngestManifestRepository
+from ..repository.lexical_index_repository import LexicalIndexRepository
+from .ingestion_pipeline_service import IngestionPipeline
 
+load_dotenv()
 logger = logging.getLogger(__name__)
-max_concurrency = 5
+
+# Fuse BM25 results with the vector results; when disabled only the vector search is used.
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() == "true"
+# Lexical candidates ranked per query before fusion.
+LEXICAL_CANDIDATES = int(os.getenv("LEXICAL_CANDIDATES", "5"))
+# Share of a query's IDF weight a lexical candidate must contain. Lexical hits never face the vector
+# relevance threshold, so this is what keeps barely matching segments out of the context.
+LEXICAL_MIN_COVERAGE = float(os.getenv("LEXICAL_MIN_COVERAGE", "0.5"))
+# Vector results retrieved per query.
+KB_TOP_K = int(os.getenv("KB_TOP_K", "5"))
+# Segments picked for the answer context across all sub-queries.
+KB_CONTEXT_SIZE = int(os.getenv("KB_CONTEXT_SIZE", "5"))
+# Sub-queries searched per question; top-k retrieval needs fewer of them for the same context.
+KB_MAX_SUBQUERIES = int(os.getenv("KB_MAX_SUBQUERIES", "3"))
+# MMR weight of relevance against diversity, from 0 to 1.
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))
+RRF_K = 60
+
+# File touched whenever ingestion changes the index. It lives next to the ingest manifest, so every worker
+# sharing the index sees the change and caches built on top of it can drop stale entries.
+INDEX_GENERATION_PATH = os.getenv("INDEX_GENERATION_PATH", ".cache/index_generation")
+
+def get_index_generation() -> int:
+    """
+    Get the current knowledge base index generation.
+
+    The generation is the modification time of INDEX_GENERATION_PATH, so it is shared by all worker
+    processes and only costs a stat per call.
+
+    Returns:
+        int: A value that changes every time ingestion modifies the index, 0 before the first ingestion.
+    """
+    try:
+        return os.stat(INDEX_GENERATION_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+def _bump_index_generation() -> None:
+    path = Path(INDEX_GENERATION_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    previous = get_index_generation()
+    temporary_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    temporary_path.write_text(f"{time.time_ns()}\n", encoding="utf-8")
+    os.replace(temporary_path, path)
+    if get_index_generation() == previous:
+        # coarse file system clocks: make sure readers see a different generation
+        os.utime(path, ns=(previous + 1, previous + 1))
+
+# One ingestion at a time per process, so two runs never diff against the same manifest state.
+_ingestion_lock = asyncio.Lock()
 
 class KnowledgeBaseService:
     """
     Service for managing the knowledge base, including ingestion and search.
     """
     __kb: "MemoryRepositoryBase"
-    def __init__(self, kb: MemoryRepositoryBase):
+    __manifest: Optional["IngestManifestRepository"]
+    __lexical: "LexicalIndexRepository"
+    def __init__(self, kb: MemoryRepositoryBase, manifest: Optional[IngestManifestRepository] = None,
+                 lexical_index: Optional[LexicalIndexRepository] = None):
         """
         Initialize the KnowledgeBaseService.
 
         Args:
             kb (MemoryRepositoryBase): The memory repository instance.
+            manifest (IngestManifestRepository, optional): Manifest of ingested segments. Defaults to INGEST_MANIFEST_PATH.
+            lexical_index (LexicalIndexRepository, optional): BM25 index of the segments. Defaults to the shared index.
         """
         self.__kb = kb
-        self.__semaphore = asyncio.Semaphore(max_concurrency)
+        self.__manifest = manifest
+        self.__lexical = lexical_index or LexicalIndexRepository()
         
-    async def __safe_save(self, metadata: PodCastKnowledgeBaseModel):
+    async def ingest_transcripts_async(self,
+                                       full: bool = False,
+                                       report: Optional[IngestionReport] = None,
+                                       on_progress: Optional[Callable[[List[PodCastKnowledgeBaseModel]], None]] = None) -> IngestionReport:
         """
-        Safely save metadata to the knowledge base with concurrency control.
+        Ingest all transcripts into the knowledge base asynchronously.
+
+        Only segments that are new or whose content changed since the last ingestion are embedded and
+        written; segments that disappeared from a transcript are deleted from the index.
 
         Args:
-            metadata (PodCastKnowledgeBaseModel): The metadata to save.
+            full (bool, optional): Re-ingest every segment even if unchanged. Defaults to False.
+            report (IngestionReport, optional): Report to fill in while ingesting. Defaults to a new report.
+            on_progress (Callable, optional): Called with segments once they are written or skipped.
+
+        Returns:
+            IngestionReport: The diff summary and throughput of the ingestion.
         """
-        async with self.__semaphore:
-            logger.info(f"Ingesting: {metadata.id}")
-            await self.__kb.save_memory_async(metadata)
+        # imported here so the bundled catalog is only loaded when it is actually ingested
+        from ..utils.transcripts import TRANSCRIPTS
+        
+        return await self.ingest_segments_async(self.__iterate_transcript_segments(TRANSCRIPTS),
+                                                full=full, prune=True, report=report, on_progress=on_progress)
+    
+    def count_transcript_segments(self) -> Dict[str, int]:
+        """
+        Count the segments of each bundled transcript.
+
+        Returns:
+            Dict[str, int]: Number of segments by transcript title.
+        """
+        from ..utils.transcripts import TRANSCRIPTS
+        
+        return {transcript["title"]: len(transcript["transcripts"]) for transcript in TRANSCRIPTS}
+    
+    async def ingest_segments_async(self,
+                                    segments: AsyncIterable[PodCastKnowledgeBaseModel] | Iterable[PodCastKnowledgeBaseModel],
+                                    full: bool = False,
+                                    prune: bool = False,
+                                    report: Optional[IngestionReport] = None,
+                                    on_progress: Optional[Callable[[List[PodCastKnowledgeBaseModel]], None]] = None) -> IngestionReport:
+        """
+        Incrementally ingest segments, using the manifest to skip unchanged ones.
+
+        Segments are consumed as the pipeline needs them, so a streamed source is never held in memory as a whole.
+
+        Args:
+            segments (AsyncIterable | Iterable[PodCastKnowledgeBaseModel]): The segments to ingest.
+            full (bool, optional): Re-ingest every segment even if unchanged. Defaults to False.
+            prune (bool, optional): The segments are complete transcripts; delete indexed segments of the same
+                transcripts that are not among them. Defaults to False.
+            report (IngestionReport, optional): Report to fill in while ingesting. Defaults to a new report.
+            on_progress (Callable, optional): Called with segments once they are written or skipped.
+
+        Returns:
+            IngestionReport: The diff summary and throughput of the ingestion.
+        """
+        async with _ingestion_lock:
+            manifest = self.__manifest or IngestManifestRepository()
+            known_hashes = manifest.load()
+            report = report or IngestionReport()
+            seen_ids = set()
+            seen_titles = set()
+            pending_hashes: Dict[str, str] = {}
+            unindexed: List[PodCastKnowledgeBaseModel] = []
+            
+            async def changed_segments() -> AsyncIterator[PodCastKnowledgeBaseModel]:
+                async for segment in self.__iterate(segments):
+                    content_hash = self.__segment_hash(segment)
+                    seen_ids.add(segment.id)
+                    seen_titles.add(segment.podcast_title)
+                    previous_hash = known_hashes.get(segment.id)
+                    if previous_hash == content_hash and not full:
+                        if not self.__lexical.contains(segment.id):
+                            # indexed before the lexical index existed; it needs no embedding
+                            unindexed.append(segment)
+                        report.skipped += 1
+                        if on_progress:
+                            on_progress([segment])
+                        continue
+                    if previous_hash is None:
+                        report.added += 1
+                    else:
+                        report.updated += 1
+                    pending_hashes[segment.id] = content_hash
+                    yield segment
+            
+            def record_saved(batch: List[PodCastKnowledgeBaseModel]) -> None:
+                # recorded per batch so an interrupted run resumes where it stopped
+                manifest.record_upserts({segment.id: pending_hashes.pop(segment.id) for segment in batch})
+                self.__lexical.add(batch)
+                if on_progress:
+                    on_progress(batch)
             
-    async def ingest_transcripts_async(self):
+            try:
+                await IngestionPipeline(self.__kb).run_async(changed_segments(), record_saved, report)
+                
+                # only transcripts present in this run are pruned, so episodes ingested from other sources stay
+                removed_ids = [segment_id for segment_id in known_hashes
+                               if segment_id not in seen_ids and segment_id.rsplit("-", 1)[0] in seen_titles] if prune else []
+                if removed_ids:
+                    logger.info(f"Deleting {len(removed_ids)} segments no longer in the transcripts")
+                    await self.__kb.delete_memory_batch_async(removed_ids)
+                    self.__lexical.remove(removed_ids)
+                    manifest.record_deletes(removed_ids)
+                    report.deleted = len(removed_ids)
+                
+                self.__lexical.add(unindexed)
+                manifest.compact()
+                self.__lexical.compact()
+                logger.info(f"Ingestion diff: added={report.added} updated={report.updated} "
+                            f"skipped={report.skipped} deleted={report.deleted}")
+                return report
+            except Exception as e:
+                logger.error(f"Error encountered During ingestion: {e}")
+                raise e
+            finally:
+                # Even a partial ingestion may have changed the index
+                if report.segments or report.deleted or unindexed:
+                    _bump_index_generation()
+    
+    @staticmethod
+    def __segment_hash(segment: PodCastKnowledgeBaseModel) -> str:
         """
-        Ingest all transcripts into the knowledge base asynchronously.
+        Hash the indexed content of a segment.
+
+        Args:
+            segment (PodCastKnowledgeBaseModel): The segment.
+
+        Returns:
+            str: The content hash.
+        """
+        content = json.dumps([segment.podcast_title, segment.time_stamp, segment.content], ensure_ascii=False)
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def __iterate_transcript_segments(transcripts: List[Dict[str, Any]]) -> Iterator[PodCastKnowledgeBaseModel]:
+        """
+        Flatten transcripts into knowledge base segments.
+
+        Args:
+            transcripts (List[Dict[str, Any]]): Transcripts with a title and their time-stamped contents.
+
+        Yields:
+            PodCastKnowledgeBaseModel: One segment per time stamp.
         """
-        try:
-            for transcript in TRANSCRIPTS:
-                tasks = []
-                for i, time_stamp in enumerate(transcript["transcripts"], start=1):
-                    metadata = PodCastKnowledgeBaseModel(
-                        id=f"{transcript['title']}-{i}",
-                        podcast_title=transcript["title"],
-                        content = time_stamp["content"],
-                        time_stamp=time_stamp["time_stamp"]
-                    )
-                    logger.info(f"Ingesting: {metadata.id}")
-                    tasks.append(self.__safe_save(metadata))
-                await asyncio.gather(*tasks)
-        except Exception as e:
-            logger.error(f"Error encountered During ingestion: {e}")
-            raise e
+        for transcript in transcripts:
+            yield from transcript_segments(transcript)
+    
+    @staticmethod
+    async def __iterate(segments: AsyncIterable[PodCastKnowledgeBaseModel] | Iterable[PodCastKnowledgeBaseModel]) -> AsyncIterator[PodCastKnowledgeBaseModel]:
+        if hasattr(segments, "__aiter__"):
+            async for segment in segments:
+                yield segment
+        else:
+            for segment in segments:
+                yield segment
         
     async def search_kb_async(self, query:str):
         """
@@ -66,4 +262,97 @@ class KnowledgeBaseService:
             Any: The search result.
         """
         return await self.__kb.search_memory_async(query)
+    
+    async def search_kb_batch_async(self, queries:List[str]) -> List[Dict[str, Any]]:
+        """
+        Search the knowledge base for several queries with one batched retrieval.
+
+        Each query is ranked lexically with BM25 first, keeping only segments that contain at least
+        LEXICAL_MIN_COVERAGE of the query's IDF weight. Queries whose top lexical match is confident are
+        answered from the lexical index alone, without an embedding; the others go through one batched
+        top-k vector search. All rankings are merged with reciprocal-rank fusion, and maximal marginal
+        relevance over the candidate embeddings picks a diverse context of KB_CONTEXT_SIZE segments.
 
+        Args:
+            queries (List[str]): The search queries.
+
+        Returns:
+            List[Dict[str, Any]]: The picked results, best first and unique by (podcast_title, time_stamp).
+                Their score is the retriever's own, named by their retriever: the cosine similarity for
+                "vector" results, the BM25 score for "lexical" ones. Scores of different retrievers are
+                not comparable; the order of the results is.
+        """
+        if len(queries) > KB_MAX_SUBQUERIES:
+            logger.warning(f"Searching {KB_MAX_SUBQUERIES} of {len(queries)} sub-queries, "
+                           f"dropped {len(queries) - KB_MAX_SUBQUERIES}: {queries[KB_MAX_SUBQUERIES:]}")
+            queries = queries[:KB_MAX_SUBQUERIES]
+        rankings: List[List[Dict[str, Any]]] = []
+        vector_queries = queries
+        if HYBRID_SEARCH:
+            lexical_results = [self.__lexical.search(query, LEXICAL_CANDIDATES, LEXICAL_MIN_COVERAGE) for query in queries]
+            vector_queries = [query for query, results in zip(queries, lexical_results)
+                              if not self.__lexical.is_confident(query, results)]
+            rankings.extend(lexical_results)
+            logger.info(f"Lexical fast path for {len(queries) - len(vector_queries)} of {len(queries)} queries")
+        if vector_queries:
+            rankings.extend(await self.__kb.search_memory_top_k_batch_async(vector_queries, KB_TOP_K))
+        
+        candidates = self.__fuse(rankings)
+        if len(candidates) > KB_CONTEXT_SIZE and vector_queries:
+            candidates = await self.__select_diverse_async(candidates)
+        else:
+            # answered lexically: keep the fast path free of embedding calls
+            candidates = candidates[:KB_CONTEXT_SIZE]
+        return [{key: value for key, value in item.items() if key not in ("embedding", "rrf_score")} for item in candidates]
+    
+    async def __select_diverse_async(self, candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Pick KB_CONTEXT_SIZE relevant and mutually diverse candidates with maximal marginal relevance.
+
+        Args:
+            candidates (List[Dict[str, Any]]): Fused candidates, best first.
+
+        Returns:
+            List[Dict[str, Any]]: The picked candidates, in pick order.
+        """
+        missing = [item for item in candidates if item.get("embedding") is None]
+        if missing:
+            # lexical-only candidates; their content embeddings are normally served by the embedding cache
+            for item, embedding in zip(missing, await self.__kb.embed_texts_async([item["content"] for item in missing])):
+                item["embedding"] = embedding
+        
+        relevance = np.array([item["rrf_score"] for item in candidates])
+        embeddings = np.stack([np.asarray(item["embedding"], dtype=np.float32) for item in candidates])
+        picked = mmr_select(relevance / relevance.max(), embeddings, KB_CONTEXT_SIZE, MMR_LAMBDA)
+        return [candidates[i] for i in picked]
+    
+    @staticmethod
+    def __fuse(rankings: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Merge rankings with reciprocal-rank fusion, keeping one result per (podcast_title, time_stamp).
+
+        The fused value only orders the results and is kept as their rrf_score. Their score stays the one of
+        the retriever that found them, preferring the vector similarity when both did, and their retriever
+        ("vector" or "lexical") names the scale of that score.
+
+        Args:
+            rankings (List[List[Dict[str, Any]]]): Results of each retriever and query, best first.
+
+        Returns:
+            List[Dict[str, Any]]: The fused results, best first.
+        """
+        fused: Dict[Any, Dict[str, Any]] = {}
+        for ranking in rankings:
+            for rank, item in enumerate(ranking, start=1):
+                # only vector results carry an embedding
+                from_vector = item.get("embedding") is not None
+                entry = fused.setdefault((item.get("podcast_title"), item.get("time_stamp")),
+                                         dict(item, rrf_score=0.0, retriever="vector" if from_vector else "lexical"))
+                if from_vector and entry.get("embedding") is None:
+                    entry["embedding"] = item["embedding"]
+                    entry["score"] = item["score"]
+                    entry["retriever"] = "vector"
+                elif from_vector == (entry.get("embedding") is not None):
+                    entry["score"] = max(entry["score"], item["score"])
+                entry["rrf_score"] += 1.0 / (RRF_K + rank)
+        return sorted(fused.values(), key=lambda item: item["rrf_score"], reverse=True)
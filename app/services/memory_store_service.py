@@ -9,10 +9,6 @@ from semantic_kernel.connectors.memory.azure_cognitive_search import AzureCognit
 load_dotenv()
 VECTOR_SIZE = 1536
 
-search_enpoint = os.getenv('SEARCH_ENDPOINT') or (lambda:(_ for _ in ()).throw(ValueError("SEARCH_ENDPOINT is not set")))()
-search_key = os.getenv('SEARCH_KEY') or (lambda:(_ for _ in ()).throw(ValueError("SEARCH_KEY is not set")))()
-
-
 logger = logging.getLogger(__name__)
 
 
@@ -24,9 +20,13 @@ def get_memory_store():
         AzureCognitiveSearchMemoryStore: The initialized memory store.
 
     Raises:
+        ValueError: If SEARCH_ENDPOINT or SEARCH_KEY is not set.
         Exception: If initialization fails.
     """
     logger.info("Initializing Knowledge Base")
+    # Read lazily so the app can run against other memory stores without Azure settings
+    search_enpoint = os.getenv('SEARCH_ENDPOINT') or (lambda:(_ for _ in ()).throw(ValueError("SEARCH_ENDPOINT is not set")))()
+    search_key = os.getenv('SEARCH_KEY') or (lambda:(_ for _ in ()).throw(ValueError("SEARCH_KEY is not set")))()
     try:
         return AzureCognitiveSearchMemoryStore(
             vector_size=VECTOR_SIZE,
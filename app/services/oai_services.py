@@ -3,8 +3,11 @@ import logging
 from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion, AzureTextEmbedding
 
 from ..utils.get_oai_client import get_azure_oai_client
+from .embedding_cache_service import CachedEmbeddingService
 SERVICE_ID = "george"
 
+_cached_embedding_service: CachedEmbeddingService | None = None
+
 logger = logging.getLogger(__name__)
 
 def get_completion_service():
@@ -31,4 +34,17 @@ def get_embedding_service():
     return AzureTextEmbedding(
         service_id="embedding",
         async_client=get_azure_oai_client()
-    )
\ No newline at end of file
+    )
+
+def get_cached_embedding_service():
+    """
+    Get the process-wide cached Azure Text Embedding service instance.
+
+    Returns:
+        CachedEmbeddingService: The text embedding service wrapped with the embedding cache.
+    """
+    global _cached_embedding_service
+    if _cached_embedding_service is None:
+        logger.info("Getting Cached Azure Text Embedding Service.")
+        _cached_embedding_service = CachedEmbeddingService(get_embedding_service())
+    return _cached_embedding_service
@@ -0,0 +1,145 @@
+import os
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+from semantic_kernel.contents import ChatHistory, ChatMessageContent, AuthorRole
+
+from ..models.prompt_budget_model import PromptBudgetReport, PromptSections, SectionUsage
+from ..services.chat_history_service import ChatHistoryService
+from ..utils.token_counter import count_tokens, truncate_to_tokens
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# Token budget of each section of the QA prompt. Tokens the web and history sections leave unused go to the knowledge base.
+PROMPT_KB_TOKENS = int(os.getenv("PROMPT_KB_TOKENS", "1500"))
+PROMPT_WEB_TOKENS = int(os.getenv("PROMPT_WEB_TOKENS", "400"))
+PROMPT_HISTORY_TOKENS = int(os.getenv("PROMPT_HISTORY_TOKENS", "600"))
+# An item is only truncated into the remaining budget when at least this many tokens are left; otherwise it is dropped.
+PROMPT_MIN_ITEM_TOKENS = int(os.getenv("PROMPT_MIN_ITEM_TOKENS", "48"))
+TRUNCATION_MARK = " …"
+
+class PromptBudgetService:
+    """
+    Assembles the knowledge base, web search and history sections of the QA prompt within a token budget.
+
+    Items are rendered as compact text instead of raw JSON. When a section is over its budget, its least
+    relevant items are dropped (lowest ranked results for the knowledge base, last references for the web
+    search, oldest turns for the history) and the last item that still fits in part is truncated.
+    History turns are only ever kept or dropped whole, so the model never sees half a message or a turn.
+    """
+    def __init__(self, kb_tokens: Optional[int] = None, web_tokens: Optional[int] = None,
+                 history_tokens: Optional[int] = None) -> None:
+        """
+        Initialize the budget.
+
+        Args:
+            kb_tokens (int, optional): Knowledge base section budget. Defaults to PROMPT_KB_TOKENS.
+            web_tokens (int, optional): Web search section budget. Defaults to PROMPT_WEB_TOKENS.
+            history_tokens (int, optional): History section budget. Defaults to PROMPT_HISTORY_TOKENS.
+        """
+        self.__kb_tokens = PROMPT_KB_TOKENS if kb_tokens is None else kb_tokens
+        self.__web_tokens = PROMPT_WEB_TOKENS if web_tokens is None else web_tokens
+        self.__history_tokens = PROMPT_HISTORY_TOKENS if history_tokens is None else history_tokens
+
+    def assemble(self, kb_results: Optional[List[Dict[str, Any]]],
+                 web_search_results: Optional[Dict[str, Any]],
+                 chat_history: Optional[ChatHistory] = None) -> Tuple[PromptSections, PromptBudgetReport]:
+        """
+        Render the prompt sections within their budgets.
+
+        Args:
+            kb_results (List[Dict[str, Any]], optional): Knowledge base results.
+            web_search_results (Dict[str, Any], optional): Web search results.
+            chat_history (ChatHistory, optional): The conversation history.
+
+        Returns:
+            Tuple[PromptSections, PromptBudgetReport]: The rendered sections and how much of each budget they use.
+        """
+        web_search, web_usage = self.__fit(self.__web_items(web_search_results), self.__web_tokens)
+        history, history_usage = self.__fit(self.__history_items(chat_history), self.__history_tokens, truncate=False)
+        leftover = web_usage.budget - web_usage.used + history_usage.budget - history_usage.used
+        knowledge_base, kb_usage = self.__fit(self.__kb_items(kb_results), self.__kb_tokens + leftover)
+
+        sections = {"knowledge_base": kb_usage, "web_search": web_usage, "history": history_usage}
+        report = PromptBudgetReport(budget=self.__kb_tokens + self.__web_tokens + self.__history_tokens,
+                                    used=sum(usage.used for usage in sections.values()),
+                                    sections=sections)
+        return PromptSections(knowledge_base=knowledge_base, web_search=web_search, history=history), report
+
+    @staticmethod
+    def __kb_items(kb_results: Optional[List[Dict[str, Any]]]) -> List[Tuple[float, str]]:
+        kb_results = [result for result in kb_results or [] if result]
+        # results come best first; their scores are not comparable across retrievers
+        return [(float(len(kb_results) - index),
+                 f"[{result.get('podcast_title')} @ {result.get('time_stamp')}] {result.get('content', '')}")
+                for index, result in enumerate(kb_results)]
+
+    @staticmethod
+    def __web_items(web_search_results: Optional[Dict[str, Any]]) -> List[Tuple[float, str]]:
+        organic_result = (web_search_results or {}).get("organic_result") or {}
+        if not organic_result:
+            return []
+        # the answer matters most, then the references in their ranking order
+        references = organic_result.get("references") or []
+        items = [(float(len(references) + 1), f"Answer: {organic_result.get('answer', '')}")]
+        items += [(float(len(references) - index),
+                   f"[{reference.get('no')}] {reference.get('title')} ({reference.get('link')}): {reference.get('snippet', '')}")
+                  for index, reference in enumerate(references)]
+        return items
+
+    @staticmethod
+    def __history_items(chat_history: Optional[ChatHistory]) -> List[Tuple[float, str]]:
+        if not chat_history or not chat_history.messages:
+            return []
+        # one item per turn (a question and its answers), so a question never loses its answer or vice versa
+        turns: List[List[ChatMessageContent]] = []
+        for message in chat_history.messages:
+            if not turns or message.role in (AuthorRole.USER, AuthorRole.SYSTEM) or turns[-1][0].role == AuthorRole.SYSTEM:
+                turns.append([message])
+            else:
+                turns[-1].append(message)
+        # newer turns rank higher; a leading summary ranks above all turns
+        return [(float(len(turns) + 1 if index == 0 and turn[0].role == AuthorRole.SYSTEM else index),
+                 "\n".join(ChatHistoryService.render_message(message) for message in turn))
+                for index, turn in enumerate(turns)]
+
+    @staticmethod
+    def __fit(items: List[Tuple[float, str]], budget: int, truncate: bool = True) -> Tuple[str, SectionUsage]:
+        """
+        Keep the highest ranked items that fit in the budget, in their original order.
+
+        Args:
+            items (List[Tuple[float, str]]): The rank and text of each item.
+            budget (int): The section budget in tokens.
+            truncate (bool, optional): Truncate the first item that does not fit into the remaining budget.
+                Without it, items are kept whole and none ranked below a dropped item is kept. Defaults to True.
+
+        Returns:
+            Tuple[str, SectionUsage]: The section text and its budget usage.
+        """
+        usage = SectionUsage(budget=budget)
+        kept: Dict[int, str] = {}
+        remaining = budget
+        for index in sorted(range(len(items)), key=lambda index: items[index][0], reverse=True):
+            text = items[index][1]
+            # one more token for the line break that joins the items
+            tokens = count_tokens(text) + 1
+            if tokens <= remaining:
+                kept[index] = text
+                remaining -= tokens
+            elif truncate and remaining >= PROMPT_MIN_ITEM_TOKENS:
+                kept[index] = truncate_to_tokens(text, remaining - 2) + TRUNCATION_MARK
+                usage.truncated += 1
+                remaining = 0
+            else:
+                usage.dropped += 1
+                if not truncate:
+                    # no gaps: an older turn is not kept once a newer one was dropped
+                    remaining = 0
+
+        section = "\n".join(kept[index] for index in sorted(kept))
+        usage.items = len(kept)
+        usage.used = count_tokens(section)
+        return section, usage
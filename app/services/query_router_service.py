@@ -0,0 +1,133 @@
+import os
+import re
+import logging
+from collections import Counter
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+from semantic_kernel.contents import ChatHistory
+
+from ..models.routing_decision_model import Route, RoutingDecision
+from ..utils.query_normalizer import normalize_query
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# Local intent classifier used when no rule matches: "none" or "ngram" (character n-gram nearest example).
+ROUTER_CLASSIFIER = os.getenv("ROUTER_CLASSIFIER", "none").lower()
+# Similarity to the closest example an intent needs before the classifier picks it.
+ROUTER_CLASSIFIER_THRESHOLD = float(os.getenv("ROUTER_CLASSIFIER_THRESHOLD", "0.75"))
+NGRAM_SIZE = 3
+
+GREETING_PATTERN = re.compile(
+    r"(hi+|hello+|hey+|hiya|howdy|greetings|yo|good (morning|afternoon|evening|day)|"
+    r"thanks?( you)?( so much| a lot)?|thank you|bye|goodbye|see you)( there)?( george)?")
+CAPABILITIES_PATTERN = re.compile(
+    r"(what can you do|what do you do|who are you|what are you|help|what are your capabilities|"
+    r"what can i ask( you)?|how can you help( me)?|what is your name|whats your name|what s your name)( george)?")
+DATETIME_PATTERN = re.compile(
+    r"(what|whats|what s) (is )?(the )?(time|date|day)( is it)?( now| today| right now)?|"
+    r"what (time|date|day) is it( now| today| right now)?|(whats |what s )?(todays|today s) date")
+
+INTENT_EXAMPLES: Dict[Route, List[str]] = {
+    Route.GREETING: ["hi", "hello there", "hey george", "good morning", "thanks a lot", "thank you george",
+                     "hello how are you", "bye for now"],
+    Route.CAPABILITIES: ["what can you do", "who are you", "what are you able to help with",
+                         "what kind of questions can i ask", "tell me about yourself", "what are your features"],
+    Route.DATETIME: ["what time is it", "what is the date today", "which day is it today", "current date and time"],
+}
+
+GREETING_ANSWER = "Hello! I'm George. Ask me anything about the podcast episodes in my knowledge base."
+FAREWELL_ANSWER = "You're welcome! Come back any time you have a question about the podcasts."
+CAPABILITIES_ANSWER = (
+    "I'm George, an AI assistant. I answer questions about the podcast transcripts in my knowledge base, "
+    "keep track of our conversation so you can ask follow-up questions or a summary of it, "
+    "and I can tell you the current date and time."
+)
+
+@lru_cache(maxsize=1)
+def _intent_vectors() -> List[Tuple[Route, Counter]]:
+    return [(route, _ngrams(example)) for route, examples in INTENT_EXAMPLES.items() for example in examples]
+
+def _ngrams(text: str) -> Counter:
+    padded = f" {text} "
+    return Counter(padded[i:i + NGRAM_SIZE] for i in range(max(len(padded) - NGRAM_SIZE + 1, 1)))
+
+def _cosine(a: Counter, b: Counter) -> float:
+    dot = sum(count * b[gram] for gram, count in a.items() if gram in b)
+    norm = (sum(v * v for v in a.values()) * sum(v * v for v in b.values())) ** 0.5
+    return dot / norm if norm else 0.0
+
+class QueryRouterService:
+    """
+    Local pre-router that decides which pipeline stages a question needs before any model is called.
+
+    Greetings, capability and date/time questions are answered from templates. Any other question goes
+    to retrieval, and only when there is a conversation history is the CheckHistory stage run as well.
+    Questions are matched by rules first and, when ROUTER_CLASSIFIER is "ngram", by a character n-gram
+    nearest-example classifier. Every decision is logged so the rules and threshold can be tuned.
+    """
+    def __init__(self, classifier: Optional[str] = None, threshold: Optional[float] = None) -> None:
+        """
+        Initialize the router.
+
+        Args:
+            classifier (str, optional): "none" or "ngram". Defaults to ROUTER_CLASSIFIER.
+            threshold (float, optional): Minimum classifier similarity. Defaults to ROUTER_CLASSIFIER_THRESHOLD.
+        """
+        self.__classifier = (classifier or ROUTER_CLASSIFIER).lower()
+        self.__threshold = ROUTER_CLASSIFIER_THRESHOLD if threshold is None else threshold
+
+    def route(self, query: str, chat_history: ChatHistory) -> RoutingDecision:
+        """
+        Decide how to answer a question.
+
+        Args:
+            query (str): The user query.
+            chat_history (ChatHistory): The conversation history.
+
+        Returns:
+            RoutingDecision: The route, why it was chosen and, for template routes, the answer.
+        """
+        text = normalize_query(query)
+        decision = self.__match_rules(text) or self.__classify(text)
+        if decision is None:
+            decision = (RoutingDecision(route=Route.HISTORY_AND_RETRIEVAL, reason="has_history")
+                        if chat_history.messages else RoutingDecision(route=Route.RETRIEVAL, reason="empty_history"))
+        elif decision.answer is None:
+            decision.answer = self.__answer(decision.route, text)
+
+        logger.info(f"Routing decision: route={decision.route.value} reason={decision.reason} "
+                    f"score={decision.score} history_messages={len(chat_history.messages)} query={text!r}")
+        return decision
+
+    @staticmethod
+    def __match_rules(text: str) -> Optional[RoutingDecision]:
+        for route, pattern in ((Route.GREETING, GREETING_PATTERN),
+                               (Route.CAPABILITIES, CAPABILITIES_PATTERN),
+                               (Route.DATETIME, DATETIME_PATTERN)):
+            if pattern.fullmatch(text):
+                return RoutingDecision(route=route, reason=f"rule:{route.value}")
+        return None
+
+    def __classify(self, text: str) -> Optional[RoutingDecision]:
+        if self.__classifier != "ngram" or not text:
+            return None
+        grams = _ngrams(text)
+        route, score = max(((route, _cosine(grams, vector)) for route, vector in _intent_vectors()),
+                           key=lambda match: match[1])
+        if score < self.__threshold:
+            return None
+        return RoutingDecision(route=route, reason="classifier", score=round(score, 4))
+
+    @staticmethod
+    def __answer(route: Route, text: str) -> str:
+        if route == Route.DATETIME:
+            return f"It is {datetime.now().strftime('%A, %B %d, %Y, %I:%M %p')}."
+        if route == Route.CAPABILITIES:
+            return CAPABILITIES_ANSWER
+        if re.match(r"(thank|bye|goodbye|see you)", text):
+            return FAREWELL_ANSWER
+        return GREETING_ANSWER
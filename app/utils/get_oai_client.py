@@ -6,9 +6,6 @@ from openai import AsyncAzureOpenAI
 
 load_dotenv()
 logger = logging.getLogger(__name__)
-azure_openai_endpoint = os.getenv('AZURE_OPENAI_ENDPOINT') or (lambda:(_ for _ in ()).throw(ValueError("AZURE_OPENAI_ENDPOINT is not set")))()
-azure_openai_api_version = os.getenv('AZURE_OPENAI_API_VERSION') or (lambda:(_ for _ in ()).throw(ValueError("AZURE_OPENAI_API_VERSION is not set")))()
-azure_openai_key = os.getenv('AZURE_OPENAI_API_KEY') or (lambda:(_ for _ in ()).throw(ValueError("AZURE_OPENAI_API_KEY is not set")))()
 
 def get_azure_oai_client():
     """
@@ -20,6 +17,12 @@ def get_azure_oai_client():
     Raises:
         Exception: If client creation fails or required environment variables are missing.
     """
+    # Read lazily so modules that only need local services can be imported without Azure settings
+    # An OpenAI-compatible base URL (e.g. http://127.0.0.1:8101/openai for a local stand-in) replaces the endpoint
+    azure_openai_base_url = os.getenv('AZURE_OPENAI_BASE_URL')
+    azure_openai_endpoint = azure_openai_base_url or os.getenv('AZURE_OPENAI_ENDPOINT') or (lambda:(_ for _ in ()).throw(ValueError("AZURE_OPENAI_ENDPOINT is not set")))()
+    azure_openai_api_version = os.getenv('AZURE_OPENAI_API_VERSION') or (lambda:(_ for _ in ()).throw(ValueError("AZURE_OPENAI_API_VERSION is not set")))()
+    azure_openai_key = os.getenv('AZURE_OPENAI_API_KEY') or (lambda:(_ for _ in ()).throw(ValueError("AZURE_OPENAI_API_KEY is not set")))()
     try:
         # IF USING AZURE AAD AUTHENTICATION
         # from azure.identity.aio import DefaultAzureCredential, get_bearer_token_provider
@@ -30,7 +33,7 @@ def get_azure_oai_client():
         
         # IF USING AZURE OPENAI KEY AUTHENTICATION
         __async_client = AsyncAzureOpenAI(
-            azure_endpoint=azure_openai_endpoint,
+            **({"base_url": azure_openai_base_url} if azure_openai_base_url else {"azure_endpoint": azure_openai_endpoint}),
             api_key=azure_openai_key,
             api_version=azure_openai_api_version
         )
@@ -0,0 +1,49 @@
+import os
+import logging
+from typing import Optional
+from dotenv import load_dotenv
+
+import httpx
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "30"))
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "10"))
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the process-wide pooled HTTP client, creating it on first use.
+
+    Sharing one client keeps TLS connections alive between requests instead of
+    paying a new handshake for every outbound call.
+
+    Returns:
+        httpx.AsyncClient: The shared HTTP client.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        logger.info("Creating shared HTTP client.")
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(HTTP_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+        )
+    return _http_client
+
+async def close_http_client() -> None:
+    """
+    Close the shared HTTP client and release its pooled connections.
+    """
+    global _http_client
+    if _http_client is not None and not _http_client.is_closed:
+        logger.info("Closing shared HTTP client.")
+        await _http_client.aclose()
+    _http_client = None
@@ -0,0 +1,170 @@
+import os
+import logging
+from pathlib import Path
+from typing import List, Optional
+from dotenv import load_dotenv
+
+import numpy as np
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# Number of clusters; 0 sizes it from the collection (about 4 * sqrt(rows)).
+ANN_NLIST = int(os.getenv("ANN_NLIST", "0"))
+# Clusters scanned per query: higher is more accurate and slower.
+ANN_NPROBE = int(os.getenv("ANN_NPROBE", "8"))
+# Below this many rows an exact scan is fast enough and the index stays untrained.
+ANN_MIN_ROWS = int(os.getenv("ANN_MIN_ROWS", "4096"))
+# Retrain the clusters once the collection grew by this factor since they were trained.
+ANN_RETRAIN_GROWTH = float(os.getenv("ANN_RETRAIN_GROWTH", "4"))
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 64
+ASSIGN_CHUNK_ROWS = 8192
+
+class IVFIndex:
+    """
+    Inverted-file approximate nearest-neighbour index over the rows of a unit-normalized embedding matrix.
+
+    Rows are clustered with spherical k-means and a query only scores the rows of its ``nprobe``
+    closest clusters. New rows are assigned to their nearest cluster as they arrive, and the clusters
+    are retrained once the collection has grown by ANN_RETRAIN_GROWTH. Centroids and assignments are
+    persisted next to the collection so workers do not retrain on start-up.
+    """
+    __path: Path
+    __centroids: Optional[np.ndarray]
+    __assignments: np.ndarray
+    __lists: Optional[List[np.ndarray]]
+
+    def __init__(self, path: str | Path, nlist: Optional[int] = None, nprobe: Optional[int] = None,
+                 min_rows: Optional[int] = None) -> None:
+        """
+        Initialize the index and load its persisted state, if any.
+
+        Args:
+            path (str | Path): File the index is persisted to.
+            nlist (int, optional): Number of clusters. Defaults to ANN_NLIST.
+            nprobe (int, optional): Clusters scanned per query. Defaults to ANN_NPROBE.
+            min_rows (int, optional): Rows needed before the index is trained. Defaults to ANN_MIN_ROWS.
+        """
+        self.__path = Path(path)
+        self.nlist = ANN_NLIST if nlist is None else nlist
+        self.nprobe = nprobe or ANN_NPROBE
+        self.min_rows = ANN_MIN_ROWS if min_rows is None else min_rows
+        self.__epoch: Optional[int] = None
+        self.__clear()
+
+    @property
+    def ready(self) -> bool:
+        """
+        Whether the index is trained and can answer queries.
+        """
+        return self.__centroids is not None
+
+    def sync(self, matrix: Optional[np.ndarray], epoch: Optional[int], persist: bool = False) -> None:
+        """
+        Bring the index up to date with the collection matrix.
+
+        Args:
+            matrix (np.ndarray, optional): The unit-normalized embedding matrix of the collection.
+            epoch (int, optional): Identifies the row numbering; a new epoch (after a compaction) discards the index.
+            persist (bool, optional): Save the updated index to disk. Defaults to False.
+        """
+        if epoch != self.__epoch:
+            self.__epoch = epoch
+            self.__clear()
+            self.__load()
+
+        rows = 0 if matrix is None else matrix.shape[0]
+        if rows < len(self.__assignments):
+            # the collection was replaced under the same epoch; start over
+            self.__clear()
+        if rows == len(self.__assignments) or rows < self.min_rows:
+            return
+
+        if not self.ready or rows >= self.__trained_rows * ANN_RETRAIN_GROWTH:
+            self.__train(matrix)
+        else:
+            new_rows = np.asarray(matrix[len(self.__assignments):rows])
+            self.__assignments = np.concatenate([self.__assignments, self.__assign(new_rows)])
+            self.__lists = None
+        if persist:
+            self.__save()
+
+    def candidates(self, queries: np.ndarray) -> List[np.ndarray]:
+        """
+        Rows in the clusters closest to each query.
+
+        Args:
+            queries (np.ndarray): Unit-normalized query embeddings, one per row.
+
+        Returns:
+            List[np.ndarray]: The candidate rows of each query.
+        """
+        lists = self.__inverted_lists()
+        nprobe = min(self.nprobe, len(self.__centroids))
+        closest = np.argpartition(-(queries @ self.__centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+        return [np.concatenate([lists[cluster] for cluster in clusters]) for clusters in closest]
+
+    def __train(self, matrix: np.ndarray) -> None:
+        rows = matrix.shape[0]
+        nlist = self.nlist or max(1, int(4 * np.sqrt(rows)))
+        nlist = min(nlist, rows)
+        rng = np.random.default_rng(0)
+        sample_size = min(rows, nlist * KMEANS_SAMPLE_PER_LIST)
+        sample = np.asarray(matrix[np.sort(rng.choice(rows, sample_size, replace=False))])
+
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=nlist)
+            empty = counts == 0
+            # reseed empty clusters with random sample points
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.where(norms == 0, 1, norms)
+
+        self.__centroids = centroids.astype(np.float32)
+        self.__trained_rows = rows
+        self.__assignments = self.__assign(matrix)
+        self.__lists = None
+        logger.info(f"Trained IVF index {self.__path} with {nlist} clusters over {rows} rows")
+
+    def __assign(self, vectors: np.ndarray) -> np.ndarray:
+        assignments = [np.argmax(np.asarray(vectors[start:start + ASSIGN_CHUNK_ROWS]) @ self.__centroids.T, axis=1)
+                       for start in range(0, vectors.shape[0], ASSIGN_CHUNK_ROWS)]
+        return np.concatenate(assignments).astype(np.int32) if assignments else np.zeros(0, dtype=np.int32)
+
+    def __inverted_lists(self) -> List[np.ndarray]:
+        if self.__lists is None:
+            order = np.argsort(self.__assignments, kind="stable")
+            bounds = np.searchsorted(self.__assignments[order], np.arange(len(self.__centroids) + 1))
+            self.__lists = [order[bounds[i]:bounds[i + 1]] for i in range(len(self.__centroids))]
+        return self.__lists
+
+    def __clear(self) -> None:
+        self.__centroids = None
+        self.__assignments = np.zeros(0, dtype=np.int32)
+        self.__trained_rows = 0
+        self.__lists = None
+
+    def __save(self) -> None:
+        temporary_path = self.__path.with_name(self.__path.name + ".tmp.npz")
+        np.savez(temporary_path, centroids=self.__centroids, assignments=self.__assignments,
+                 trained_rows=self.__trained_rows, epoch=-1 if self.__epoch is None else self.__epoch)
+        os.replace(temporary_path, self.__path)
+
+    def __load(self) -> None:
+        if not self.__path.exists():
+            return
+        try:
+            with np.load(self.__path) as saved:
+                if int(saved["epoch"]) != (-1 if self.__epoch is None else self.__epoch):
+                    return
+                self.__centroids = saved["centroids"]
+                self.__assignments = saved["assignments"]
+                self.__trained_rows = int(saved["trained_rows"])
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable IVF index {self.__path}: {e}")
+            self.__clear()
@@ -1,5 +1,13 @@
+import os
+from dotenv import load_dotenv
+
 from slowapi import Limiter
 from ..utils.get_client_ip import get_client_ip
 
+load_dotenv()
+
+# Per-client limit of the ask endpoint, in the slowapi notation (e.g. "5/hour", "100/minute").
+ASK_RATE_LIMIT = os.getenv("ASK_RATE_LIMIT", "5/hour")
+
 # Initialize the rate limiter using the client IP extraction function.
 limiter = Limiter(key_func=get_client_ip)
@@ -0,0 +1,328 @@
+import os
+import json
+import logging
+import threading
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .ivf_index import IVFIndex
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows development machines run a single worker
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = "vectors.f32"
+RECORDS_FILE = "records.jsonl"
+META_FILE = "meta.json"
+LOCK_FILE = ".lock"
+# Compact once dead rows outnumber live ones (and there are at least this many of them).
+MIN_DEAD_ROWS_TO_COMPACT = 1024
+
+class LocalVectorStore:
+    """
+    On-disk vector collection searched in-process with vectorized cosine similarity.
+
+    Embeddings are unit-normalized rows of a memory-mapped float32 matrix (``vectors.f32``); the
+    segment metadata is kept column by column in memory and persisted in an append-only log
+    (``records.jsonl``) that maps every id to its row. Replacing or deleting a segment only marks
+    its old row dead, and dead rows are dropped by compaction. Writers take an exclusive file lock
+    and append vectors before their log entries, so other workers can pick up new rows by re-reading
+    the log tail. An optional IVF index, kept in sync with the matrix, narrows searches on large collections.
+    """
+    __directory: Path
+    __dim: Optional[int]
+    __matrix: Optional[np.memmap]
+    __alive: np.ndarray
+    __row_of: Dict[str, int]
+
+    def __init__(self, directory: str | Path, ann: Optional[IVFIndex] = None) -> None:
+        """
+        Open (or create) the collection in a directory.
+
+        Args:
+            directory (str | Path): Directory holding the collection files.
+            ann (IVFIndex, optional): Approximate nearest-neighbour index used by searches once it is trained.
+        """
+        self.__directory = Path(directory)
+        self.__ann = ann
+        self.__directory.mkdir(parents=True, exist_ok=True)
+        self.__mutex = threading.RLock()
+        self.__reset()
+        self.__refresh()
+
+    def __len__(self) -> int:
+        return len(self.__row_of)
+
+    @property
+    def dim(self) -> Optional[int]:
+        """
+        Dimension of the stored embeddings, or None while the collection is empty.
+        """
+        return self.__dim
+
+    def upsert(self, records: Sequence[Dict[str, Any]], embeddings: np.ndarray) -> List[int]:
+        """
+        Insert or replace segments.
+
+        Args:
+            records (Sequence[Dict[str, Any]]): Segment metadata, each with at least an ``id``.
+            embeddings (np.ndarray): The embedding of each segment, in order.
+
+        Returns:
+            List[int]: The row of each segment.
+        """
+        if not records:
+            return []
+
+        vectors = self.__normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(records), -1))
+        with self.__mutex, self.__lock(exclusive=True):
+            self.__refresh(locked=True)
+            if self.__dim is None:
+                self.__dim = int(vectors.shape[1])
+                (self.__directory / META_FILE).write_text(json.dumps({"dim": self.__dim}))
+
+            row_bytes = self.__dim * 4
+            with open(self.__directory / VECTORS_FILE, "ab") as vectors_file:
+                # drop a partially written row left by a crashed writer
+                first_row = vectors_file.seek(0, os.SEEK_END) // row_bytes
+                vectors_file.truncate(first_row * row_bytes)
+                vectors_file.seek(0, os.SEEK_END)
+                vectors_file.write(vectors.tobytes())
+                vectors_file.flush()
+
+            entries = [dict(record, row=first_row + i) for i, record in enumerate(records)]
+            self.__append_log(entries)
+            self.__refresh(locked=True)
+            return [entry["row"] for entry in entries]
+
+    def delete(self, ids: Sequence[str]) -> int:
+        """
+        Delete segments.
+
+        Args:
+            ids (Sequence[str]): The ids to delete.
+
+        Returns:
+            int: The number of segments that existed and were deleted.
+        """
+        with self.__mutex, self.__lock(exclusive=True):
+            self.__refresh(locked=True)
+            existing = [segment_id for segment_id in ids if segment_id in self.__row_of]
+            self.__append_log({"id": segment_id, "deleted": True} for segment_id in existing)
+            self.__refresh(locked=True)
+            if self.__dead_rows() >= max(len(self.__row_of), MIN_DEAD_ROWS_TO_COMPACT):
+                self.__compact()
+            return len(existing)
+
+    def search(self, queries: np.ndarray, limit: int = 1, min_relevance_score: float = 0.0,
+               exact: bool = False) -> List[List[Tuple[int, float]]]:
+        """
+        Find the segments most similar to each query, with one matrix product over the whole collection
+        or over the candidates of the ANN index once it is trained.
+
+        Args:
+            queries (np.ndarray): Query embeddings, one per row.
+            limit (int, optional): Results per query. Defaults to 1.
+            min_relevance_score (float, optional): Minimum cosine similarity of a result. Defaults to 0.0.
+            exact (bool, optional): Scan every row even if the ANN index is trained. Defaults to False.
+
+        Returns:
+            List[List[Tuple[int, float]]]: Row and score of the best matches of each query, best first.
+        """
+        queries = self.__normalize(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        with self.__mutex:
+            self.__refresh()
+            if self.__matrix is None or not self.__row_of:
+                return [[] for _ in queries]
+            if self.__ann is not None and self.__ann.ready and not exact:
+                return [self.top_k(self.score_rows(query[None, :], candidates)[0], candidates, limit, min_relevance_score)
+                        for query, candidates in zip(queries, self.__ann.candidates(queries))]
+            scores = self.score_rows(queries)
+            rows = np.arange(scores.shape[1])
+        return [self.top_k(row_scores, rows, limit, min_relevance_score) for row_scores in scores]
+
+    def score_rows(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Cosine similarity of unit-normalized queries to the given rows; dead rows score -inf.
+
+        Args:
+            queries (np.ndarray): Unit-normalized query embeddings, one per row.
+            rows (np.ndarray, optional): The rows to score. Defaults to every row.
+
+        Returns:
+            np.ndarray: A (queries x rows) score matrix.
+        """
+        with self.__mutex:
+            if self.__matrix is None or (rows is not None and not len(rows)):
+                return np.empty((len(queries), 0), dtype=np.float32)
+            if rows is None:
+                scores = queries @ self.__matrix.T
+                scores[:, ~self.__alive[:self.__matrix.shape[0]]] = -np.inf
+            else:
+                scores = queries @ self.__matrix[rows].T
+                scores[:, ~self.__alive[rows]] = -np.inf
+            return scores
+
+    @staticmethod
+    def top_k(scores: np.ndarray, rows: np.ndarray, limit: int, min_relevance_score: float) -> List[Tuple[int, float]]:
+        """
+        Pick the best scoring rows.
+
+        Args:
+            scores (np.ndarray): Score of each candidate.
+            rows (np.ndarray): Row of each candidate.
+            limit (int): Maximum number of results.
+            min_relevance_score (float): Minimum score of a result.
+
+        Returns:
+            List[Tuple[int, float]]: Row and score of the best candidates, best first.
+        """
+        if not len(scores) or limit <= 0:
+            return []
+        k = min(limit, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(int(rows[i]), float(scores[i])) for i in best if scores[i] >= min_relevance_score]
+
+    def record(self, row: int) -> Dict[str, Any]:
+        """
+        Get the metadata stored in a row.
+
+        Args:
+            row (int): The row.
+
+        Returns:
+            Dict[str, Any]: The segment metadata.
+        """
+        return {name: column[row] for name, column in self.__columns.items()}
+
+    def vectors(self, rows: Sequence[int]) -> np.ndarray:
+        """
+        Read the unit-normalized embeddings stored in some rows.
+
+        Args:
+            rows (Sequence[int]): The rows.
+
+        Returns:
+            np.ndarray: One embedding per row.
+        """
+        with self.__mutex:
+            return np.array(self.__matrix[np.asarray(rows, dtype=np.int64)])
+
+    def __reset(self) -> None:
+        self.__dim = None
+        self.__matrix = None
+        self.__alive = np.zeros(0, dtype=bool)
+        self.__row_of = {}
+        self.__columns: Dict[str, List[Any]] = {}
+        self.__log_offset = 0
+        self.__log_inode: Optional[int] = None
+
+    def __refresh(self, locked: bool = False) -> None:
+        """
+        Apply log entries appended since the last refresh (re-reading everything after a compaction)
+        and remap the vector matrix.
+        """
+        log_path = self.__directory / RECORDS_FILE
+        if not log_path.exists():
+            return
+        stat = log_path.stat()
+        if stat.st_ino == self.__log_inode and stat.st_size == self.__log_offset:
+            return
+
+        with (self.__lock(exclusive=False) if not locked else nullcontext()):
+            stat = log_path.stat()
+            if stat.st_ino != self.__log_inode:
+                self.__reset()
+                self.__log_inode = stat.st_ino
+            if self.__dim is None:
+                self.__dim = int(json.loads((self.__directory / META_FILE).read_text())["dim"])
+
+            with open(log_path, "r", encoding="utf-8") as log_file:
+                log_file.seek(self.__log_offset)
+                lines = log_file.read().splitlines()
+                self.__log_offset = log_file.tell()
+
+            rows = (self.__directory / VECTORS_FILE).stat().st_size // (self.__dim * 4)
+            self.__matrix = (np.memmap(self.__directory / VECTORS_FILE, dtype=np.float32, mode="r", shape=(rows, self.__dim))
+                             if rows else None)
+            if len(self.__alive) < rows:
+                self.__alive = np.concatenate([self.__alive, np.zeros(rows - len(self.__alive), dtype=bool)])
+            for line in lines:
+                self.__apply(json.loads(line))
+            if self.__ann is not None:
+                # only the writer holding the lock persists the index
+                self.__ann.sync(self.__matrix, self.__log_inode, persist=locked)
+        logger.info(f"Vector store {self.__directory} has {len(self.__row_of)} segments")
+
+    def __apply(self, entry: Dict[str, Any]) -> None:
+        previous_row = self.__row_of.pop(entry["id"], None)
+        if previous_row is not None:
+            self.__alive[previous_row] = False
+        if entry.get("deleted"):
+            return
+
+        row = entry["row"]
+        for name, value in entry.items():
+            if name == "row":
+                continue
+            column = self.__columns.setdefault(name, [])
+            if len(column) <= row:
+                column.extend([None] * (row + 1 - len(column)))
+            column[row] = value
+        self.__row_of[entry["id"]] = row
+        self.__alive[row] = True
+
+    def __append_log(self, entries) -> None:
+        lines = [json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries]
+        if not lines:
+            return
+        with open(self.__directory / RECORDS_FILE, "a", encoding="utf-8") as log_file:
+            log_file.writelines(lines)
+            log_file.flush()
+
+    def __dead_rows(self) -> int:
+        return int(len(self.__alive) - np.count_nonzero(self.__alive))
+
+    def __compact(self) -> None:
+        """
+        Rewrite the collection without dead rows. Must be called with the exclusive lock held.
+        """
+        rows = np.flatnonzero(self.__alive)
+        vectors_tmp = self.__directory / (VECTORS_FILE + ".tmp")
+        log_tmp = self.__directory / (RECORDS_FILE + ".tmp")
+        np.asarray(self.__matrix[rows] if len(rows) else np.empty((0, self.__dim)), dtype=np.float32).tofile(vectors_tmp)
+        with open(log_tmp, "w", encoding="utf-8") as log_file:
+            for new_row, row in enumerate(rows):
+                entry = {name: column[row] for name, column in self.__columns.items()}
+                log_file.write(json.dumps(dict(entry, row=new_row), ensure_ascii=False) + "\n")
+        self.__matrix = None
+        os.replace(vectors_tmp, self.__directory / VECTORS_FILE)
+        # replacing the log changes its inode, which makes every reader reload the collection
+        os.replace(log_tmp, self.__directory / RECORDS_FILE)
+        logger.info(f"Compacted vector store {self.__directory} to {len(rows)} rows")
+        self.__reset()
+        self.__refresh(locked=True)
+
+    @staticmethod
+    def __normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    @contextmanager
+    def __lock(self, exclusive: bool) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        with open(self.__directory / LOCK_FILE, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,41 @@
+from typing import List
+
+import numpy as np
+
+def mmr_select(relevance: np.ndarray, embeddings: np.ndarray, k: int, lambda_mult: float = 0.7) -> List[int]:
+    """
+    Pick a relevant and diverse subset of candidates with maximal marginal relevance.
+
+    The candidate similarity matrix is computed once; each greedy step then scores every remaining
+    candidate with one vector operation.
+
+    Args:
+        relevance (np.ndarray): Relevance of each candidate, higher is better.
+        embeddings (np.ndarray): Embedding of each candidate, one per row.
+        k (int): Number of candidates to pick.
+        lambda_mult (float, optional): Weight of relevance against diversity, from 0 to 1. Defaults to 0.7.
+
+    Returns:
+        List[int]: Indices of the picked candidates, in the order they were picked.
+    """
+    count = len(relevance)
+    if count == 0 or k <= 0:
+        return []
+
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms == 0, 1, norms)
+    similarity = vectors @ vectors.T
+
+    relevance = np.asarray(relevance, dtype=np.float32)
+    max_similarity = np.zeros(count, dtype=np.float32)
+    available = np.ones(count, dtype=bool)
+    selected: List[int] = []
+    for _ in range(min(k, count)):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+    return selected
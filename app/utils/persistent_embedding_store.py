@@ -0,0 +1,232 @@
+import os
+import json
+import logging
+import threading
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from dotenv import load_dotenv
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows development machines run a single worker
+    fcntl = None
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# Vectors kept on disk; once full, the store is rewritten with its newest half.
+EMBEDDING_STORE_MAX_ROWS = int(os.getenv("EMBEDDING_STORE_MAX_ROWS", "100000"))
+
+META_FILE = "meta.json"
+LOCK_FILE = ".lock"
+
+def _vectors_file(generation: int) -> str:
+    return f"vectors.{generation}.f32" if generation else "vectors.f32"
+
+def _keys_file(generation: int) -> str:
+    return f"keys.{generation}.txt" if generation else "keys.txt"
+
+class PersistentEmbeddingStore:
+    """
+    Append-only on-disk embedding store shared by every worker on the host.
+
+    Vectors are rows of a memory-mapped float32 matrix (``vectors.f32``) and ``keys.txt`` maps
+    each key to its row, one ``<key> <row>`` pair per line. Writers take an exclusive file lock and
+    append the vectors before their keys, so a key that is visible always has its row on disk and
+    rows left behind by a crashed writer are simply never referenced. Readers pick up rows appended
+    by other workers by re-reading the tail of ``keys.txt``.
+
+    The store holds at most ``max_rows`` vectors. A write that would exceed it first rewrites the newest
+    half into the files of a new generation and then switches ``meta.json`` to them, so readers always
+    see one consistent pair of files and reload when the generation changes. The in-memory state is
+    guarded by a mutex, as the store is used from worker threads.
+    """
+    __directory: Path
+    __max_rows: int
+    __dim: Optional[int]
+    __generation: int
+    __meta_inode: Optional[int]
+    __rows: Dict[str, int]
+    __keys_offset: int
+    __matrix: Optional[np.memmap]
+    __mutex: threading.Lock
+
+    def __init__(self, directory: str | Path, max_rows: Optional[int] = None) -> None:
+        """
+        Open (or create) the store in a directory.
+
+        Args:
+            directory (str | Path): Directory holding the store files.
+            max_rows (int, optional): Vectors kept on disk. Defaults to EMBEDDING_STORE_MAX_ROWS.
+        """
+        self.__directory = Path(directory)
+        self.__directory.mkdir(parents=True, exist_ok=True)
+        self.__max_rows = max_rows or EMBEDDING_STORE_MAX_ROWS
+        self.__dim = None
+        self.__generation = 0
+        self.__meta_inode = None
+        self.__mutex = threading.Lock()
+        self.__reset()
+        self.__refresh()
+
+    def __len__(self) -> int:
+        with self.__mutex:
+            return len(self.__rows)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, np.ndarray]:
+        """
+        Read the vectors stored under the given keys.
+
+        Args:
+            keys (Iterable[str]): Keys to look up.
+
+        Returns:
+            Dict[str, np.ndarray]: The vectors found, by key.
+        """
+        keys = list(keys)
+        with self.__mutex:
+            missing = any(key not in self.__rows for key in keys)
+        if missing:
+            # another worker may have written them since our last read
+            self.__refresh()
+
+        found = {}
+        with self.__mutex:
+            for key in keys:
+                row = self.__rows.get(key)
+                if row is not None and self.__matrix is not None and row < self.__matrix.shape[0]:
+                    found[key] = np.array(self.__matrix[row])
+        return found
+
+    def put_many(self, items: Iterable[Tuple[str, np.ndarray]]) -> None:
+        """
+        Append vectors under the given keys, skipping keys that are already stored.
+
+        Args:
+            items (Iterable[Tuple[str, np.ndarray]]): Key and vector pairs.
+        """
+        items = list(items)
+        if not items:
+            return
+
+        with self.__lock(exclusive=True):
+            self.__refresh(locked=True)
+            with self.__mutex:
+                if self.__dim is None:
+                    self.__dim = int(np.asarray(items[0][1]).shape[-1])
+                    self.__write_meta()
+
+                new_items = {}
+                for key, vector in items:
+                    if key not in self.__rows and key not in new_items:
+                        new_items[key] = np.asarray(vector, dtype=np.float32).reshape(self.__dim)
+                if not new_items:
+                    return
+                if len(self.__rows) + len(new_items) > self.__max_rows:
+                    self.__evict(len(new_items))
+
+                row_bytes = self.__dim * 4
+                with open(self.__directory / _vectors_file(self.__generation), "ab") as vectors_file:
+                    # drop a partially written row left by a crashed writer
+                    first_row = vectors_file.seek(0, os.SEEK_END) // row_bytes
+                    vectors_file.truncate(first_row * row_bytes)
+                    vectors_file.seek(0, os.SEEK_END)
+                    vectors_file.write(np.stack(list(new_items.values())).tobytes())
+                    vectors_file.flush()
+                with open(self.__directory / _keys_file(self.__generation), "a", encoding="utf-8") as keys_file:
+                    keys_file.write("".join(f"{key} {first_row + i}\n" for i, key in enumerate(new_items)))
+                    keys_file.flush()
+
+            self.__refresh(locked=True)
+
+    def __evict(self, incoming: int) -> None:
+        """
+        Rewrite the newest vectors into a new generation so that ``incoming`` more fit in the store.
+
+        Called with the exclusive lock and the mutex held.
+        """
+        keep = max(0, min(self.__max_rows // 2, self.__max_rows - incoming))
+        # rows are numbered in insertion order, so the highest ones are the newest
+        kept = sorted(self.__rows.items(), key=lambda item: item[1])[len(self.__rows) - keep:] if keep else []
+        generation = self.__generation + 1
+
+        vectors = np.array(self.__matrix[[row for _, row in kept]]) if kept else np.empty((0, self.__dim), np.float32)
+        with open(self.__directory / _vectors_file(generation), "wb") as vectors_file:
+            vectors_file.write(vectors.astype(np.float32).tobytes())
+        with open(self.__directory / _keys_file(generation), "w", encoding="utf-8") as keys_file:
+            keys_file.write("".join(f"{key} {row}\n" for row, (key, _) in enumerate(kept)))
+
+        previous = self.__generation
+        evicted = len(self.__rows) - len(kept)
+        self.__generation = generation
+        # the switch: readers follow meta.json, so they never pair keys and vectors of different generations
+        self.__write_meta()
+        # unmapped before the old files go; other workers keep reading their mappings until they refresh
+        self.__reset()
+        for name in (_vectors_file(previous), _keys_file(previous)):
+            (self.__directory / name).unlink(missing_ok=True)
+        logger.info(f"Embedding store {self.__directory} evicted {evicted} vectors")
+
+    def __write_meta(self) -> None:
+        meta_path = self.__directory / META_FILE
+        temporary_path = meta_path.with_suffix(meta_path.suffix + ".tmp")
+        temporary_path.write_text(json.dumps({"dim": self.__dim, "generation": self.__generation}))
+        os.replace(temporary_path, meta_path)
+
+    def __refresh(self, locked: bool = False) -> None:
+        """
+        Load keys appended since the last refresh and remap the vector matrix.
+        """
+        meta_path = self.__directory / META_FILE
+        if not meta_path.exists():
+            return
+
+        with (self.__lock(exclusive=False) if not locked else nullcontext()), self.__mutex:
+            meta_inode = meta_path.stat().st_ino
+            if meta_inode != self.__meta_inode:
+                meta = json.loads(meta_path.read_text())
+                self.__dim = int(meta["dim"])
+                if int(meta.get("generation", 0)) != self.__generation:
+                    # compacted by another worker: reload from the new files
+                    self.__generation = int(meta.get("generation", 0))
+                    self.__reset()
+                self.__meta_inode = meta_inode
+
+            keys_path = self.__directory / _keys_file(self.__generation)
+            if not keys_path.exists() or keys_path.stat().st_size == self.__keys_offset:
+                return
+
+            with open(keys_path, "r", encoding="utf-8") as keys_file:
+                keys_file.seek(self.__keys_offset)
+                new_lines: List[str] = keys_file.read().splitlines()
+                self.__keys_offset = keys_file.tell()
+
+            for line in new_lines:
+                key, row = line.rsplit(" ", 1)
+                self.__rows.setdefault(key, int(row))
+
+            vectors_path = self.__directory / _vectors_file(self.__generation)
+            rows = vectors_path.stat().st_size // (self.__dim * 4)
+            self.__matrix = (np.memmap(vectors_path, dtype=np.float32, mode="r", shape=(rows, self.__dim))
+                             if rows else None)
+            logger.info(f"Embedding store {self.__directory} has {len(self.__rows)} vectors")
+
+    def __reset(self) -> None:
+        self.__rows = {}
+        self.__keys_offset = 0
+        self.__matrix = None
+
+    @contextmanager
+    def __lock(self, exclusive: bool) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        with open(self.__directory / LOCK_FILE, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,31 @@
+from typing import AsyncIterator, Tuple
+
+def _normalize(text: str) -> str:
+    # ignore the quotes, emphasis and spacing a model may put around a marker
+    return " ".join(text.strip().strip("\"'`*").lower().split())
+
+async def detect_marker_prefix_async(chunks: AsyncIterator[str], marker: str) -> Tuple[bool, str]:
+    """
+    Read a text stream just far enough to tell whether it starts with a marker.
+
+    Chunks are consumed while the text read so far could still become the marker (case-insensitive,
+    ignoring surrounding quotes and whitespace), and no further; the rest of the stream is left unread.
+
+    Args:
+        chunks (AsyncIterator[str]): The text stream.
+        marker (str): The marker, such as "NO ANSWER".
+
+    Returns:
+        Tuple[bool, str]: Whether the stream starts with the marker (or ended while it still could),
+            and the text consumed so far.
+    """
+    target = _normalize(marker)
+    consumed = ""
+    async for chunk in chunks:
+        consumed += chunk
+        text = _normalize(consumed)
+        if text.startswith(target):
+            return True, consumed
+        if text and not target.startswith(text):
+            return False, consumed
+    return True, consumed
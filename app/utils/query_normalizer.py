@@ -0,0 +1,13 @@
+import re
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a question for exact matching: lower case, punctuation removed, whitespace collapsed.
+
+    Args:
+        query (str): The question.
+
+    Returns:
+        str: The normalized question.
+    """
+    return " ".join(re.sub(r"[^\w\s]", " ", query.lower()).split())
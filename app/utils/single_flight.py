@@ -0,0 +1,97 @@
+import asyncio
+import logging
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class _Flight:
+    __slots__ = ("items", "done", "error", "changed", "subscribers", "task")
+
+    def __init__(self) -> None:
+        self.items: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.changed = asyncio.Event()
+        self.subscribers = 0
+        self.task: Optional["asyncio.Task"] = None
+
+    def notify(self) -> None:
+        # a fresh event per change, so every waiter wakes up exactly once per change
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+class StreamSingleFlight:
+    """
+    Shares one execution of a stream between concurrent callers with the same key.
+
+    The first caller of a key starts the stream in a background task; callers that arrive while it
+    runs subscribe to it instead, replay what it produced so far and then follow it live. Errors reach
+    every subscriber. The stream is cancelled once its last subscriber goes away.
+
+    Usage:
+        flights = StreamSingleFlight()
+        async for item in flights.stream(key, lambda: produce_items()):
+            ...
+    """
+    __flights: Dict[Hashable, _Flight]
+
+    def __init__(self) -> None:
+        self.__flights = {}
+
+    def __len__(self) -> int:
+        return len(self.__flights)
+
+    async def stream(self, key: Hashable, factory: Callable[[], AsyncIterator[Any]]) -> AsyncGenerator[Any, None]:
+        """
+        Subscribe to the in-flight stream of the key, starting it if there is none.
+
+        Args:
+            key (Hashable): Identifies identical streams.
+            factory (Callable[[], AsyncIterator[Any]]): Creates the stream; only called by the first caller.
+
+        Yields:
+            Any: Every item of the stream, from the start.
+        """
+        flight = self.__flights.get(key)
+        if flight is None:
+            flight = _Flight()
+            self.__flights[key] = flight
+            flight.task = asyncio.ensure_future(self.__run(key, flight, factory))
+        else:
+            logger.info(f"Joined in-flight stream with {flight.subscribers} other subscribers")
+
+        flight.subscribers += 1
+        try:
+            index = 0
+            while True:
+                changed = flight.changed
+                while index < len(flight.items):
+                    yield flight.items[index]
+                    index += 1
+                if flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                await changed.wait()
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                # nobody is listening any more; a new caller starts over
+                if self.__flights.get(key) is flight:
+                    del self.__flights[key]
+                flight.task.cancel()
+
+    async def __run(self, key: Hashable, flight: _Flight, factory: Callable[[], AsyncIterator[Any]]) -> None:
+        try:
+            async for item in factory():
+                flight.items.append(item)
+                flight.notify()
+        except asyncio.CancelledError:
+            flight.error = asyncio.CancelledError()
+        except Exception as e:
+            flight.error = e
+        finally:
+            flight.done = True
+            if self.__flights.get(key) is flight:
+                del self.__flights[key]
+            flight.notify()
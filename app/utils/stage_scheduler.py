@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Dict
+
+logger = logging.getLogger(__name__)
+
+class StageScheduler:
+    """
+    Runs independent pipeline stages concurrently and cancels the ones that are no longer needed.
+
+    Usage:
+        async with StageScheduler() as stages:
+            stages.start("kb", search_kb())
+            stages.start("web", search_web())
+            kb_results = await stages.result("kb")
+            if not kb_results:
+                stages.cancel("web")
+    """
+    __tasks: Dict[str, "asyncio.Task[Any]"]
+    __started_at: Dict[str, float]
+
+    def __init__(self) -> None:
+        self.__tasks = {}
+        self.__started_at = {}
+
+    async def __aenter__(self) -> "StageScheduler":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        # Never leave a branch running once the pipeline is done with it (finished, failed or client gone).
+        self.cancel_all()
+
+    def start(self, name: str, stage: Awaitable[Any]) -> "asyncio.Task[Any]":
+        """
+        Schedule a stage to run in the background.
+
+        Args:
+            name (str): Unique name of the stage.
+            stage (Awaitable[Any]): The coroutine implementing the stage.
+
+        Returns:
+            asyncio.Task: The task running the stage.
+        """
+        if name in self.__tasks:
+            raise ValueError(f"Stage '{name}' is already scheduled.")
+
+        self.__started_at[name] = time.perf_counter()
+        task = asyncio.ensure_future(stage)
+        task.add_done_callback(lambda t, n=name: self.__on_done(n, t))
+        self.__tasks[name] = task
+        return task
+
+    async def result(self, name: str) -> Any:
+        """
+        Wait for a stage and return its result, re-raising its exception if it failed.
+
+        Args:
+            name (str): Name of the stage.
+
+        Returns:
+            Any: The stage result.
+        """
+        if name not in self.__tasks:
+            raise KeyError(f"Stage '{name}' was never scheduled.")
+        # shield so that a cancelled consumer does not implicitly cancel a stage other consumers may need
+        return await asyncio.shield(self.__tasks[name])
+
+    def cancel(self, *names: str) -> None:
+        """
+        Cancel stages that are no longer needed.
+
+        Args:
+            *names (str): Names of the stages to cancel.
+        """
+        for name in names:
+            task = self.__tasks.get(name)
+            if task and not task.done():
+                logger.info(f"Cancelling stage '{name}'")
+                task.cancel()
+
+    def cancel_all(self) -> None:
+        """
+        Cancel every stage that is still running.
+        """
+        self.cancel(*self.__tasks.keys())
+
+    def __on_done(self, name: str, task: "asyncio.Task[Any]") -> None:
+        elapsed = time.perf_counter() - self.__started_at.get(name, time.perf_counter())
+        if task.cancelled():
+            logger.info(f"Stage '{name}' cancelled after {elapsed:.4f} seconds")
+        elif task.exception() is not None:
+            logger.error(f"Stage '{name}' failed after {elapsed:.4f} seconds: {task.exception()}")
+        else:
+            logger.info(f"Stage '{name}' completed in {elapsed:.4f} seconds")
@@ -0,0 +1,101 @@
+import os
+import asyncio
+import logging
+from typing import AsyncGenerator, AsyncIterable, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# Flush once this many bytes are buffered (0 disables the size trigger).
+STREAM_FLUSH_BYTES = int(os.getenv("STREAM_FLUSH_BYTES", "64"))
+# Flush once the oldest buffered chunk is this old (0 disables the time trigger).
+STREAM_FLUSH_MS = int(os.getenv("STREAM_FLUSH_MS", "20"))
+
+class StreamCoalescer:
+    """
+    Forwards upstream text chunks as soon as they arrive, merging bursts of tiny chunks into fewer frames.
+
+    The first chunk is always flushed immediately so coalescing never adds to time-to-first-token.
+    After that a frame is flushed when either the size or the age threshold is reached; with both
+    thresholds disabled every chunk is forwarded as its own frame.
+    """
+    __flush_bytes: int
+    __flush_seconds: float
+
+    def __init__(self, flush_bytes: Optional[int] = None, flush_ms: Optional[int] = None) -> None:
+        """
+        Initialize the coalescer with its flush policy.
+
+        Args:
+            flush_bytes (int, optional): Size threshold in bytes. Defaults to STREAM_FLUSH_BYTES.
+            flush_ms (int, optional): Age threshold in milliseconds. Defaults to STREAM_FLUSH_MS.
+        """
+        self.__flush_bytes = STREAM_FLUSH_BYTES if flush_bytes is None else flush_bytes
+        self.__flush_seconds = (STREAM_FLUSH_MS if flush_ms is None else flush_ms) / 1000
+
+    async def coalesce(self, chunks: AsyncIterable[str]) -> AsyncGenerator[str, None]:
+        """
+        Coalesce an upstream stream of text chunks into frames.
+
+        Args:
+            chunks (AsyncIterable[str]): The upstream text chunks.
+
+        Yields:
+            str: Frames made of one or more consecutive upstream chunks.
+        """
+        iterator = chunks.__aiter__()
+        loop = asyncio.get_running_loop()
+        buffer: List[str] = []
+        buffered_bytes = 0
+        deadline: Optional[float] = None
+        first_frame = True
+        pending: Optional[asyncio.Future] = None
+
+        try:
+            while True:
+                if pending is None:
+                    pending = asyncio.ensure_future(iterator.__anext__())
+
+                timeout = None if deadline is None else max(0.0, deadline - loop.time())
+                done, _ = await asyncio.wait({pending}, timeout=timeout)
+
+                if not done:
+                    # The age threshold elapsed while upstream was still producing the next chunk.
+                    yield "".join(buffer)
+                    buffer, buffered_bytes, deadline = [], 0, None
+                    continue
+
+                future, pending = pending, None
+                try:
+                    chunk = future.result()
+                except StopAsyncIteration:
+                    break
+
+                if not chunk:
+                    continue
+
+                buffer.append(chunk)
+                buffered_bytes += len(chunk.encode("utf-8"))
+
+                if first_frame or self.__should_flush(buffered_bytes):
+                    yield "".join(buffer)
+                    buffer, buffered_bytes, deadline = [], 0, None
+                    first_frame = False
+                elif deadline is None and self.__flush_seconds > 0:
+                    deadline = loop.time() + self.__flush_seconds
+
+            if buffer:
+                yield "".join(buffer)
+        finally:
+            if pending is not None and not pending.done():
+                pending.cancel()
+                # let the cancelled step unwind before closing the upstream generator
+                await asyncio.wait({pending})
+            if hasattr(iterator, "aclose"):
+                await iterator.aclose()
+
+    def __should_flush(self, buffered_bytes: int) -> bool:
+        if self.__flush_bytes <= 0 and self.__flush_seconds <= 0:
+            return True
+        return self.__flush_bytes > 0 and buffered_bytes >= self.__flush_bytes
@@ -0,0 +1,217 @@
+import os
+import time
+import asyncio
+import logging
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Iterator, Optional, Tuple
+from dotenv import load_dotenv
+
+from opentelemetry import trace
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+
+try:
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+except ImportError:  # pragma: no cover - the OTLP exporter is an optional dependency
+    OTLPSpanExporter = None
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# Spans are exported to this OTLP/HTTP collector (e.g. http://localhost:4318) when set; metrics are always collected.
+OTEL_EXPORTER_OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "")
+OTEL_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "george-api")
+# Set by multi-worker deployments so /metrics aggregates the samples of every worker.
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
+
+# Model calls take seconds, local stages milliseconds: cover both ends.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0)
+
+STAGE_DURATION = Histogram(
+    "george_stage_duration_seconds",
+    "Duration of each stage of the Q&A pipeline.",
+    ["stage", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_DURATION = Histogram(
+    "george_request_duration_seconds",
+    "Time until the last byte of the response body was sent.",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+FIRST_BYTE_DURATION = Histogram(
+    "george_request_first_byte_seconds",
+    "Time until the first byte of the response body was sent.",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    "george_cache_lookups",
+    "Lookups of the in-process caches, by cache and result.",
+    ["cache", "result"],
+)
+CACHE_REFRESHES = Counter(
+    "george_cache_refreshes",
+    "Background refreshes of stale cache entries.",
+    ["cache"],
+)
+CACHE_ERRORS = Counter(
+    "george_cache_errors",
+    "Failed upstream fetches of cache misses and refreshes.",
+    ["cache"],
+)
+CACHE_ENTRIES = Gauge(
+    "george_cache_entries",
+    "Entries held by each in-process cache.",
+    ["cache"],
+    multiprocess_mode="livesum",
+)
+
+_tracer = trace.get_tracer(__name__)
+
+def configure_tracing() -> None:
+    """
+    Export spans to the OTLP collector at OTEL_EXPORTER_OTLP_ENDPOINT, if one is configured.
+
+    Without an endpoint, or without the optional ``opentelemetry-exporter-otlp-proto-http`` package,
+    spans are no-ops and only the Prometheus histograms are recorded.
+    """
+    if not OTEL_EXPORTER_OTLP_ENDPOINT:
+        return
+    if OTLPSpanExporter is None:
+        logger.warning("OTEL_EXPORTER_OTLP_ENDPOINT is set but opentelemetry-exporter-otlp-proto-http "
+                       "is not installed; spans are not exported.")
+        return
+
+    provider = TracerProvider(resource=Resource.create({"service.name": OTEL_SERVICE_NAME}))
+    # the exporter reads the endpoint and headers from the standard OTEL_EXPORTER_OTLP_* variables
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    trace.set_tracer_provider(provider)
+    logger.info(f"Exporting spans to {OTEL_EXPORTER_OTLP_ENDPOINT}")
+
+def shutdown_tracing() -> None:
+    """
+    Flush the spans that are still buffered.
+    """
+    provider = trace.get_tracer_provider()
+    if hasattr(provider, "shutdown"):
+        provider.shutdown()
+
+def start_span(name: str, start_time: Optional[int] = None, **attributes: Any) -> trace.Span:
+    """
+    Start a span as a child of the current one, without making it current.
+
+    Spans are never attached to the context: pipeline stages run in their own tasks and async
+    generators, and a context attached in one of them cannot be detached from another.
+
+    Args:
+        name (str): Name of the span.
+        start_time (int, optional): Start time in nanoseconds since the epoch. Defaults to now.
+        **attributes (Any): Attributes of the span.
+
+    Returns:
+        trace.Span: The started span; the caller ends it.
+    """
+    return _tracer.start_span(name, start_time=start_time, attributes=attributes)
+
+def record_stage(stage: str, started_at: float, outcome: str = "ok", **attributes: Any) -> float:
+    """
+    Record a stage that started at ``started_at`` and ends now.
+
+    For stages that do not fit a ``with`` block, such as the first and last token of a stream.
+
+    Args:
+        stage (str): Name of the stage.
+        started_at (float): ``time.perf_counter()`` when the stage started.
+        outcome (str, optional): "ok", "error" or "cancelled". Defaults to "ok".
+        **attributes (Any): Attributes of the span.
+
+    Returns:
+        float: The duration of the stage in seconds.
+    """
+    elapsed = time.perf_counter() - started_at
+    STAGE_DURATION.labels(stage, outcome).observe(elapsed)
+    span = start_span(f"george.{stage}", start_time=time.time_ns() - int(elapsed * 1e9), outcome=outcome, **attributes)
+    span.end()
+    return elapsed
+
+@contextmanager
+def stage_span(stage: str, **attributes: Any) -> Iterator[trace.Span]:
+    """
+    Time a pipeline stage into the stage histogram and a span.
+
+    Usage:
+        with stage_span("web_search", query=query):
+            results = await connector.search_async(query)
+
+    Args:
+        stage (str): Name of the stage.
+        **attributes (Any): Attributes of the span.
+
+    Yields:
+        trace.Span: The span of the stage.
+    """
+    started_at = time.perf_counter()
+    span = start_span(f"george.{stage}", **attributes)
+    outcome = "ok"
+    try:
+        yield span
+    except (asyncio.CancelledError, GeneratorExit):
+        outcome = "cancelled"
+        raise
+    except BaseException as e:
+        outcome = "error"
+        span.record_exception(e)
+        span.set_status(trace.Status(trace.StatusCode.ERROR, str(e)))
+        raise
+    finally:
+        STAGE_DURATION.labels(stage, outcome).observe(time.perf_counter() - started_at)
+        span.set_attribute("outcome", outcome)
+        span.end()
+
+async def observe_response_body(body: AsyncIterator[Any], started_at: float, method: str, route: str,
+                                status: int, span: Optional[trace.Span] = None) -> AsyncIterator[Any]:
+    """
+    Forward a response body and record when its first and last byte were sent.
+
+    A streaming response is returned to the middleware as soon as its headers are ready, so the
+    request is only complete once the body has been fully sent.
+
+    Args:
+        body (AsyncIterator[Any]): The response body iterator.
+        started_at (float): ``time.perf_counter()`` when the request arrived.
+        method (str): The HTTP method.
+        route (str): The route template of the request.
+        status (int): The response status code.
+        span (trace.Span, optional): The request span, ended with the body.
+
+    Yields:
+        Any: The chunks of the body.
+    """
+    labels = (method, route, str(status))
+    first_chunk = True
+    try:
+        async for chunk in body:
+            if first_chunk:
+                FIRST_BYTE_DURATION.labels(*labels).observe(time.perf_counter() - started_at)
+                first_chunk = False
+            yield chunk
+    finally:
+        REQUEST_DURATION.labels(*labels).observe(time.perf_counter() - started_at)
+        if span is not None:
+            span.end()
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Render the collected metrics in the Prometheus text format.
+
+    Returns:
+        Tuple[bytes, str]: The metrics and their content type.
+    """
+    registry = REGISTRY
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,67 @@
+import os
+import logging
+from functools import lru_cache
+from dotenv import load_dotenv
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - pinned in requirements.txt; without it token counts are estimated
+    tiktoken = None
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# Encoding of the chat model, used to count prompt tokens locally.
+TOKEN_ENCODING = os.getenv("TOKEN_ENCODING", "cl100k_base")
+# Average characters per token, used to estimate token counts when tiktoken is not installed.
+CHARS_PER_TOKEN = 4
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        logger.warning(f"tiktoken is not installed, token counts are estimates of {CHARS_PER_TOKEN} characters per token")
+        return None
+    try:
+        return tiktoken.get_encoding(TOKEN_ENCODING)
+    except Exception as e:
+        # the encoding files are downloaded on first use, which fails on machines without network access;
+        # pre-fetch them into TIKTOKEN_CACHE_DIR when building images for such hosts
+        logger.warning(f"Token encoding {TOKEN_ENCODING} unavailable, token counts are estimates "
+                       f"of {CHARS_PER_TOKEN} characters per token: {e}")
+        return None
+
+def count_tokens(text: str) -> int:
+    """
+    Count the tokens of a text with the chat model's encoding, or estimate them when tiktoken is unavailable.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        int: The number of tokens.
+    """
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut a text down to at most the given number of tokens.
+
+    Args:
+        text (str): The text.
+        max_tokens (int): The maximum number of tokens to keep.
+
+    Returns:
+        str: The text itself if it fits, otherwise its longest prefix that does.
+    """
+    if max_tokens <= 0:
+        return ""
+    encoding = _encoding()
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
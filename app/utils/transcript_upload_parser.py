@@ -0,0 +1,169 @@
+import os
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, Iterator, Tuple
+from dotenv import load_dotenv
+
+from ..models.knowledge_base_model import PodCastKnowledgeBaseModel
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# Longest NDJSON line (one transcript or one segment) accepted from an upload.
+INGEST_MAX_LINE_BYTES = int(os.getenv("INGEST_MAX_LINE_BYTES", str(8 * 1024 * 1024)))
+MAX_PART_HEADER_BYTES = 16 * 1024
+
+def transcript_segments(transcript: Dict[str, Any]) -> Iterator[PodCastKnowledgeBaseModel]:
+    """
+    Flatten one transcript into knowledge base segments.
+
+    Args:
+        transcript (Dict[str, Any]): A transcript with a title and its time-stamped contents.
+
+    Yields:
+        PodCastKnowledgeBaseModel: One segment per time stamp.
+    """
+    for i, time_stamp in enumerate(transcript["transcripts"], start=1):
+        yield PodCastKnowledgeBaseModel(
+            id=f"{transcript['title']}-{i}",
+            podcast_title=transcript["title"],
+            content = time_stamp["content"],
+            time_stamp=time_stamp["time_stamp"]
+        )
+
+async def iter_uploaded_segments(chunks: AsyncIterator[bytes], content_type: str) -> AsyncIterator[PodCastKnowledgeBaseModel]:
+    """
+    Parse an uploaded transcript body into segments as it arrives.
+
+    The body is NDJSON, sent either as the raw request body or as the file parts of a multipart form.
+    Each line is a transcript (``{"title": ..., "transcripts": [{"time_stamp": ..., "content": ...}]}``)
+    or a single segment (``{"title": ..., "time_stamp": ..., "content": ..., "id": optional}``).
+    A segment without an id is identified by its title and time stamp, so uploading it again updates it
+    rather than overwriting another segment. Only the current line is held in memory.
+
+    Args:
+        chunks (AsyncIterator[bytes]): The request body.
+        content_type (str): The request Content-Type header.
+
+    Yields:
+        PodCastKnowledgeBaseModel: The uploaded segments, in order.
+
+    Raises:
+        ValueError: If the body is not valid transcript NDJSON.
+    """
+    media_type, params = _parse_header_value(content_type or "")
+    if media_type == "multipart/form-data":
+        boundary = params.get("boundary")
+        if not boundary:
+            raise ValueError("Multipart upload without a boundary.")
+        chunks = _iter_multipart_files(chunks, boundary.encode("latin-1"))
+    elif media_type not in ("application/x-ndjson", "application/jsonl", "application/json-seq", "text/plain", ""):
+        raise ValueError(f"Unsupported upload content type: {media_type}")
+
+    line_number = 0
+    async for line in _iter_lines(chunks):
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+            if not isinstance(entry, dict):
+                raise ValueError(f"expected a JSON object, got {type(entry).__name__}")
+            if "transcripts" in entry:
+                for segment in transcript_segments(entry):
+                    yield segment
+            else:
+                yield PodCastKnowledgeBaseModel(
+                    id=entry.get("id") or f"{entry['title']}-{entry['time_stamp']}",
+                    podcast_title=entry["title"],
+                    content=entry["content"],
+                    time_stamp=entry["time_stamp"]
+                )
+        except (ValueError, TypeError, KeyError) as e:
+            raise ValueError(f"Invalid transcript on line {line_number}: {e}") from e
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Split a byte stream into lines, rejecting lines longer than INGEST_MAX_LINE_BYTES.
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+        if len(buffer) > INGEST_MAX_LINE_BYTES:
+            raise ValueError(f"Upload line longer than {INGEST_MAX_LINE_BYTES} bytes.")
+    if buffer:
+        yield buffer
+
+async def _iter_multipart_files(chunks: AsyncIterator[bytes], boundary: bytes) -> AsyncIterator[bytes]:
+    """
+    Stream the contents of the file parts of a multipart/form-data body.
+
+    Other form fields are skipped. Contents of consecutive file parts are separated by a newline so
+    every part can be an NDJSON file of its own.
+    """
+    delimiter = b"--" + boundary
+    part_separator = b"\r\n" + delimiter
+    buffer = b""
+    state = "preamble"
+    emit = False
+
+    async for chunk in chunks:
+        buffer += chunk
+        while True:
+            if state == "preamble":
+                index = buffer.find(delimiter)
+                if index < 0:
+                    buffer = buffer[-len(delimiter):]
+                    break
+                buffer = buffer[index + len(delimiter):]
+                state = "delimiter"
+            elif state == "delimiter":
+                if len(buffer) < 2:
+                    break
+                if buffer.startswith(b"--"):
+                    return
+                buffer = buffer[2:] if buffer.startswith(b"\r\n") else buffer
+                state = "headers"
+            elif state == "headers":
+                index = buffer.find(b"\r\n\r\n")
+                if index < 0:
+                    if len(buffer) > MAX_PART_HEADER_BYTES:
+                        raise ValueError("Multipart part headers too large.")
+                    break
+                emit = _is_file_part(buffer[:index])
+                buffer = buffer[index + 4:]
+                state = "body"
+            else:
+                index = buffer.find(part_separator)
+                if index < 0:
+                    # keep enough bytes to recognise a separator split across chunks
+                    keep = len(part_separator) - 1
+                    if emit and len(buffer) > keep:
+                        yield buffer[:-keep]
+                    buffer = buffer[-keep:]
+                    break
+                if emit:
+                    yield buffer[:index] + b"\n"
+                buffer = buffer[index + len(part_separator):]
+                state = "delimiter"
+
+    raise ValueError("Multipart upload ended before its closing boundary.")
+
+def _is_file_part(headers: bytes) -> bool:
+    for header in headers.decode("latin-1").split("\r\n"):
+        name, _, value = header.partition(":")
+        if name.strip().lower() == "content-disposition":
+            _, params = _parse_header_value(value)
+            return "filename" in params or params.get("name") == "file"
+    return False
+
+def _parse_header_value(value: str) -> Tuple[str, Dict[str, str]]:
+    media_type, *raw_params = value.split(";")
+    params: Dict[str, str] = {}
+    for raw_param in raw_params:
+        key, _, param_value = raw_param.strip().partition("=")
+        params[key.lower()] = param_value.strip().strip('"')
+    return media_type.strip().lower(), params
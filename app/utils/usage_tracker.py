@@ -0,0 +1,167 @@
+import hashlib
+import logging
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, Optional
+
+from prometheus_client import Counter, Histogram
+from semantic_kernel.functions.function_result import FunctionResult
+
+from ..models.token_usage_model import StageTokenUsage, TokenUsageReport
+from .security import API_KEYS
+from .token_counter import count_tokens
+
+logger = logging.getLogger(__name__)
+
+ANONYMOUS = "anonymous"
+# Prompts are budgeted in the low thousands of tokens; the upper buckets catch the bloated ones.
+PROMPT_TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+MODEL_TOKENS = Counter(
+    "george_model_tokens",
+    "Tokens sent to (prompt) and generated by (completion) the models.",
+    ["stage", "kind", "api_key"],
+)
+MODEL_CALLS = Counter(
+    "george_model_calls",
+    "Model calls, including the ones whose usage was estimated locally.",
+    ["stage", "api_key"],
+)
+PROMPT_TOKENS = Histogram(
+    "george_prompt_tokens",
+    "Prompt tokens of each model call.",
+    ["stage"],
+    buckets=PROMPT_TOKEN_BUCKETS,
+)
+
+def api_key_label(api_key: Optional[str]) -> str:
+    """
+    Identify an API key in metrics and logs without revealing it.
+
+    Only configured keys get their own label, so arbitrary header values cannot blow up the metric cardinality.
+
+    Args:
+        api_key (str, optional): The API key sent by the client.
+
+    Returns:
+        str: A short hash of the key, or "anonymous" for a missing or unknown key.
+    """
+    if not api_key or api_key not in API_KEYS:
+        return ANONYMOUS
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+
+class UsageTracker:
+    """
+    Accumulates the model usage of one request, per pipeline stage.
+    """
+    __api_key: str
+    __stages: Dict[str, StageTokenUsage]
+
+    def __init__(self, api_key: Optional[str] = None) -> None:
+        """
+        Initialize the tracker.
+
+        Args:
+            api_key (str, optional): The API key the request was made with.
+        """
+        self.__api_key = api_key_label(api_key)
+        self.__stages = {}
+
+    @property
+    def api_key(self) -> str:
+        """
+        The label of the request's API key.
+        """
+        return self.__api_key
+
+    def record(self, stage: str, prompt_tokens: int, completion_tokens: int = 0, estimated: bool = False) -> None:
+        """
+        Add the usage of one model call.
+
+        Args:
+            stage (str): The pipeline stage that made the call.
+            prompt_tokens (int): Tokens sent to the model.
+            completion_tokens (int, optional): Tokens generated by the model. Defaults to 0.
+            estimated (bool, optional): Whether the usage was counted locally. Defaults to False.
+        """
+        usage = self.__stages.setdefault(stage, StageTokenUsage())
+        usage.calls += 1
+        usage.prompt_tokens += prompt_tokens
+        usage.completion_tokens += completion_tokens
+        usage.estimated_calls += int(estimated)
+
+    def report(self) -> TokenUsageReport:
+        """
+        Summarize the usage of the request.
+
+        Returns:
+            TokenUsageReport: The total and per-stage usage.
+        """
+        stages = {stage: usage.model_copy() for stage, usage in self.__stages.items()}
+        prompt_tokens = sum(usage.prompt_tokens for usage in stages.values())
+        completion_tokens = sum(usage.completion_tokens for usage in stages.values())
+        return TokenUsageReport(prompt_tokens=prompt_tokens,
+                                completion_tokens=completion_tokens,
+                                total_tokens=prompt_tokens + completion_tokens,
+                                stages=stages)
+
+# The tracker of the request being served; the pipeline's tasks inherit it when they are created.
+_current_tracker: ContextVar[Optional[UsageTracker]] = ContextVar("george_usage_tracker", default=None)
+
+def track_usage(tracker: UsageTracker) -> None:
+    """
+    Attribute the model calls made from the current context, and the tasks it starts, to a request.
+
+    Args:
+        tracker (UsageTracker): The tracker of the request.
+    """
+    _current_tracker.set(tracker)
+
+def record_usage(stage: str, prompt_tokens: int, completion_tokens: int = 0, estimated: bool = False) -> None:
+    """
+    Record the usage of one model call in the metrics and in the tracker of the current request, if any.
+
+    Args:
+        stage (str): The pipeline stage that made the call.
+        prompt_tokens (int): Tokens sent to the model.
+        completion_tokens (int, optional): Tokens generated by the model. Defaults to 0.
+        estimated (bool, optional): Whether the usage was counted locally. Defaults to False.
+    """
+    tracker = _current_tracker.get()
+    api_key = tracker.api_key if tracker else ANONYMOUS
+    MODEL_CALLS.labels(stage, api_key).inc()
+    MODEL_TOKENS.labels(stage, "prompt", api_key).inc(prompt_tokens)
+    MODEL_TOKENS.labels(stage, "completion", api_key).inc(completion_tokens)
+    PROMPT_TOKENS.labels(stage).observe(prompt_tokens)
+    if tracker:
+        tracker.record(stage, prompt_tokens, completion_tokens, estimated)
+
+def record_reported_usage(stage: str, metadata: Iterable[Dict[str, Any]], prompt: str, completion: str) -> None:
+    """
+    Record the usage reported in the metadata of a completion, or count it locally when none was reported
+    (e.g. a stream closed before its final usage chunk).
+
+    Args:
+        stage (str): The pipeline stage that made the call.
+        metadata (Iterable[Dict[str, Any]]): The metadata of the completion's choices or chunks.
+        prompt (str): The prompt, for the local count.
+        completion (str): The completion, for the local count.
+    """
+    usages = [item["usage"] for item in metadata if isinstance(item, dict) and item.get("usage")]
+    if usages:
+        # the usage of a completion is repeated on each of its choices
+        usage = usages[-1]
+        record_usage(stage, usage.prompt_tokens or 0, usage.completion_tokens or 0)
+    else:
+        record_usage(stage, count_tokens(prompt), count_tokens(completion), estimated=True)
+
+def record_result_usage(stage: str, result: FunctionResult) -> None:
+    """
+    Record the usage of a non-streaming kernel function call.
+
+    Args:
+        stage (str): The pipeline stage that made the call.
+        result (FunctionResult): The result of the call.
+    """
+    messages = result.metadata.get("messages")
+    prompt = result.rendered_prompt or ("\n".join(str(message.content) for message in messages) if messages else "")
+    record_reported_usage(stage, result.metadata.get("metadata", []), prompt, str(result))
@@ -0,0 +1,103 @@
+"""
+Benchmark the IVF approximate nearest-neighbour index of the local knowledge base against exact search.
+
+Reports recall@k and per-query latency for a range of nprobe values, plus the time spent building the
+index incrementally and re-opening it from disk.
+
+Usage:
+    python -m benchmarks.ann_benchmark --rows 50000 --dimensions 256 --k 5 --nprobe 1,4,8,16,32
+"""
+import argparse
+import json
+import logging
+import tempfile
+import time
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+
+from app.utils.ivf_index import IVFIndex
+from app.utils.local_vector_store import LocalVectorStore
+
+
+def synthetic_embeddings(rows: int, dimensions: int, topics: int, seed: int = 0) -> np.ndarray:
+    """
+    Embeddings clustered around random topic directions, like segments of episodes on shared themes.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(topics, dimensions))
+    vectors = centers[rng.integers(0, topics, rows)] + rng.normal(scale=1.5, size=(rows, dimensions))
+    return vectors.astype(np.float32)
+
+
+def open_store(directory: Path, args: argparse.Namespace) -> Tuple[LocalVectorStore, IVFIndex]:
+    index = IVFIndex(directory / "ivf.npz", nlist=args.nlist, min_rows=args.min_rows)
+    return LocalVectorStore(directory, ann=index), index
+
+
+def main(args: argparse.Namespace) -> dict:
+    vectors = synthetic_embeddings(args.rows, args.dimensions, args.topics)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(args.rows, args.queries, replace=False)]
+    queries = queries + rng.normal(scale=1.0, size=queries.shape).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        store, index = open_store(directory, args)
+
+        started_at = time.perf_counter()
+        for start in range(0, args.rows, args.batch_size):
+            batch = vectors[start:start + args.batch_size]
+            store.upsert([{"id": f"segment-{start + i}"} for i in range(len(batch))], batch)
+        build_seconds = time.perf_counter() - started_at
+
+        started_at = time.perf_counter()
+        store, index = open_store(directory, args)
+        reopen_seconds = time.perf_counter() - started_at
+
+        started_at = time.perf_counter()
+        exact = store.search(queries, args.k, -1.0, exact=True)
+        exact_ms = (time.perf_counter() - started_at) * 1000 / args.queries
+        exact_rows = [{row for row, _ in matches} for matches in exact]
+
+        sweeps = []
+        for nprobe in args.nprobe:
+            index.nprobe = nprobe
+            started_at = time.perf_counter()
+            approximate = store.search(queries, args.k, -1.0)
+            query_ms = (time.perf_counter() - started_at) * 1000 / args.queries
+            recall = np.mean([len(expected & {row for row, _ in matches}) / args.k
+                              for expected, matches in zip(exact_rows, approximate)])
+            sweeps.append({"nprobe": nprobe, f"recall@{args.k}": round(float(recall), 4), "ms_per_query": round(query_ms, 3)})
+
+    return {
+        "config": vars(args),
+        "index_ready": index.ready,
+        "build_seconds": round(build_seconds, 3),
+        "reopen_seconds": round(reopen_seconds, 3),
+        "exact_ms_per_query": round(exact_ms, 3),
+        "ann": sweeps,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--topics", type=int, default=500, help="clusters in the synthetic embeddings")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=1024, help="rows per upsert while building")
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--min-rows", type=int, default=None)
+    parser.add_argument("--nprobe", type=lambda value: [int(v) for v in value.split(",")], default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--output", help="write the JSON report to this file")
+    arguments = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    result = main(arguments)
+    print(json.dumps(result, indent=2))
+    if arguments.output:
+        with open(arguments.output, "w", encoding="utf-8") as output:
+            json.dump(result, output, indent=2)
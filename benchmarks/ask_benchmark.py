@@ -0,0 +1,403 @@
+"""
+Benchmark /api/v1/askgeorge/ask/stream end to end against local stand-ins for every upstream service.
+
+The app runs under uvicorn with the local knowledge base, pointed at a fake OpenAI-compatible server
+(chat completions and embeddings) and a fake SerpApi server, each with configurable latency and token
+rate. The sample transcripts are ingested through the ingest API, then the questions are asked with
+the given concurrency. The JSON report holds the time to first token, the total stream time,
+requests/s, the upstream calls per question and the stage timings from /metrics. It can be compared
+with an earlier report.
+
+By default the run is cold: every question is different, and the answer cache, the web search cache
+and single-flight are disabled, so every request runs the whole pipeline. With --warm the caches and
+single-flight stay on and a few questions are repeated, which measures the cached path instead. The
+two modes are reported separately and only compared with a baseline of the same mode.
+
+Usage:
+    python -m benchmarks.ask_benchmark --requests 60 --concurrency 6 --output report.json
+    python -m benchmarks.ask_benchmark --warm --output warm.json
+    python -m benchmarks.ask_benchmark --baseline report.json --app-env QUERY_PLANNER=separate
+"""
+import os
+import sys
+import json
+import math
+import time
+import socket
+import asyncio
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+from prometheus_client.parser import text_string_to_metric_families
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+ASK_PATH = "/api/v1/askgeorge/ask/stream"
+END_OF_RESPONSE = "<|END_OF_RESPONSE|>"
+API_KEY = "benchmark-key"
+STARTUP_TIMEOUT_SECONDS = 60.0
+INGEST_TIMEOUT_SECONDS = 300.0
+
+# Repeated in a warm run, so most answers come from the caches or a shared in-flight run.
+QUESTIONS = [
+    "How is AI changing healthcare in 2025?",
+    "What did the hosts say about AI in education?",
+    "How are companies using AI assistants at work?",
+    "What risks of AI does the podcast talk about?",
+    "What does the episode say about AI and creativity?",
+    "How will AI change jobs in the next few years?",
+]
+# Combined into the distinct questions of a cold run.
+QUESTION_TEMPLATES = [
+    "How is AI changing {topic}?",
+    "What did the hosts say about AI and {topic}?",
+    "What risks does AI bring to {topic}?",
+    "Which AI tools for {topic} does the podcast mention?",
+    "How will {topic} look in five years thanks to AI?",
+    "What examples of AI in {topic} come up in the episode?",
+]
+QUESTION_TOPICS = [
+    "healthcare", "education", "remote work", "creativity", "jobs", "privacy", "climate research",
+    "software development", "customer service", "scientific discovery", "personal finance", "fitness",
+]
+WARMUP_QUESTION = "What is the podcast about?"
+# Disabled in a cold run so every request runs the whole pipeline.
+COLD_APP_ENV = {"ANSWER_CACHE_SIZE": "0", "WEB_SEARCH_CACHE_SIZE": "0", "QA_SINGLE_FLIGHT": "false"}
+
+# Metrics compared against the baseline; for each, whether a higher value is better.
+COMPARED_METRICS = {
+    "ttft_seconds.p50": False,
+    "ttft_seconds.p90": False,
+    "total_seconds.p50": False,
+    "total_seconds.p90": False,
+    "requests_per_second": True,
+    "upstream_calls_per_request.chat": False,
+    "upstream_calls_per_request.embedding": False,
+    "upstream_calls_per_request.search": False,
+}
+
+
+def distinct_questions(count: int) -> List[str]:
+    """
+    Questions that all differ from each other, so none is answered from a cache.
+    """
+    questions = [template.format(topic=topic) for topic in QUESTION_TOPICS for template in QUESTION_TEMPLATES]
+    return [questions[index % len(questions)] + (f" (part {index // len(questions) + 1})" if index >= len(questions) else "")
+            for index in range(count)]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    """
+    Mean, nearest-rank percentiles and maximum of a sample, in seconds.
+    """
+    if not values:
+        return {"mean": None, "p50": None, "p90": None, "p99": None, "max": None}
+    ordered = sorted(values)
+
+    def rank(p: float) -> float:
+        # the smallest value with at least p% of the sample at or below it
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(p * len(ordered) / 100) - 1))]
+
+    return {"mean": round(sum(ordered) / len(ordered), 4), "p50": round(rank(50), 4), "p90": round(rank(90), 4),
+            "p99": round(rank(99), 4), "max": round(ordered[-1], 4)}
+
+
+def start_process(arguments: List[str], env: Dict[str, str], log_path: Path) -> subprocess.Popen:
+    log_file = open(log_path, "w", encoding="utf-8")
+    return subprocess.Popen([sys.executable, *arguments], cwd=REPO_ROOT, env=env,
+                            stdout=log_file, stderr=subprocess.STDOUT)
+
+
+async def wait_until_ready(client: httpx.AsyncClient, url: str, process: subprocess.Popen, log_path: Path) -> None:
+    deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} exited with {process.returncode}:\n{log_path.read_text()[-4000:]}")
+        try:
+            if (await client.get(url)).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise TimeoutError(f"{url} did not start within {STARTUP_TIMEOUT_SECONDS} seconds:\n{log_path.read_text()[-4000:]}")
+
+
+def app_environment(args: argparse.Namespace, workdir: Path, openai_url: str, search_url: str) -> Dict[str, str]:
+    """
+    Environment of the app under test: every upstream points at a stand-in and all state lives in the work directory.
+    """
+    env = {key: value for key, value in os.environ.items() if key != "AZURE_OPENAI_ENDPOINT"}
+    env.update({
+        "ENVIRONMENT": "benchmark",
+        # plain-http stand-ins are only accepted as a base URL, not as the (https) endpoint
+        "AZURE_OPENAI_BASE_URL": f"{openai_url}/openai",
+        "AZURE_OPENAI_API_KEY": "benchmark",
+        "AZURE_OPENAI_API_VERSION": "2024-06-01",
+        "AZURE_OPENAI_CHAT_DEPLOYMENT_NAME": "benchmark-chat",
+        "AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME": "benchmark-embedding",
+        "SERPAPI_API_KEY": "benchmark",
+        "SERPAPI_BASE_URL": search_url,
+        "KB_BACKEND": "local",
+        "LOCAL_KB_DIR": str(workdir / "knowledge_base"),
+        "EMBEDDING_CACHE_DIR": str(workdir / "embeddings"),
+        "LEXICAL_INDEX_PATH": str(workdir / "lexical_index.jsonl"),
+        "INGEST_MANIFEST_PATH": str(workdir / "ingest_manifest.jsonl"),
+        "SESSION_DB_PATH": str(workdir / "sessions.sqlite3"),
+        "PROMETHEUS_MULTIPROC_DIR": str(workdir / "prometheus"),
+        "ASK_RATE_LIMIT": "1000000/second",
+        "API_KEY_1": API_KEY,
+        "OTEL_EXPORTER_OTLP_ENDPOINT": "",
+    })
+    if not args.warm:
+        env.update(COLD_APP_ENV)
+    for setting in args.app_env:
+        key, _, value = setting.partition("=")
+        env[key] = value
+    return env
+
+
+async def ingest_transcripts(client: httpx.AsyncClient) -> Dict[str, Any]:
+    headers = {"X-API-Key": API_KEY}
+    response = await client.post("/api/v1/ingest/transcripts", headers=headers)
+    response.raise_for_status()
+    job_id = response.json()["job"]["id"]
+    deadline = time.monotonic() + INGEST_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        job = (await client.get(f"/api/v1/ingest/jobs/{job_id}", headers=headers)).json()["job"]
+        if job["status"] == "completed":
+            return job["report"]
+        if job["status"] in ("failed", "cancelled"):
+            raise RuntimeError(f"Ingestion {job['status']}: {job['errors']}")
+        await asyncio.sleep(0.2)
+    raise TimeoutError("Ingestion did not complete.")
+
+
+async def ask(client: httpx.AsyncClient, question: str) -> Dict[str, Any]:
+    """
+    Ask one question and time its stream.
+    """
+    started_at = time.perf_counter()
+    ttft: Optional[float] = None
+    body = ""
+    try:
+        async with client.stream("POST", ASK_PATH, json={"query": question}) as response:
+            async for text in response.aiter_text():
+                if ttft is None and text.strip():
+                    ttft = time.perf_counter() - started_at
+                body += text
+        ok = response.status_code == 200 and END_OF_RESPONSE in body
+        error = None if ok else f"HTTP {response.status_code}: {body[:200]}"
+    except httpx.HTTPError as e:
+        ok, error = False, f"{type(e).__name__}: {e}"
+    return {"ok": ok, "ttft": ttft, "total": time.perf_counter() - started_at, "error": error}
+
+
+async def run_load(client: httpx.AsyncClient, questions: List[str], requests: int, concurrency: int) -> Dict[str, Any]:
+    queue: asyncio.Queue = asyncio.Queue()
+    for index in range(requests):
+        queue.put_nowait(questions[index % len(questions)])
+    results: List[Dict[str, Any]] = []
+
+    async def worker() -> None:
+        while not queue.empty():
+            results.append(await ask(client, queue.get_nowait()))
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started_at
+
+    succeeded = [result for result in results if result["ok"]]
+    return {
+        "requests": len(results),
+        "succeeded": len(succeeded),
+        "errors": sorted({result["error"] for result in results if not result["ok"]})[:10],
+        "wall_seconds": round(elapsed, 4),
+        "requests_per_second": round(len(succeeded) / elapsed, 4) if elapsed else None,
+        "ttft_seconds": percentiles([result["ttft"] for result in succeeded if result["ttft"] is not None]),
+        "total_seconds": percentiles([result["total"] for result in succeeded]),
+    }
+
+
+def stage_timings(metrics_text: str) -> Dict[str, Dict[str, float]]:
+    """
+    Count and mean duration of each completed pipeline stage, from the app's /metrics.
+    """
+    totals: Dict[str, Dict[str, float]] = {}
+    for family in text_string_to_metric_families(metrics_text):
+        if family.name != "george_stage_duration_seconds":
+            continue
+        for sample in family.samples:
+            if sample.labels.get("outcome") != "ok" or sample.name not in (f"{family.name}_count", f"{family.name}_sum"):
+                continue
+            stage = totals.setdefault(sample.labels["stage"], {"count": 0.0, "sum": 0.0})
+            stage["count" if sample.name.endswith("_count") else "sum"] += sample.value
+    return {name: {"count": int(stage["count"]), "mean_seconds": round(stage["sum"] / stage["count"], 4)}
+            for name, stage in sorted(totals.items()) if stage["count"]}
+
+
+def upstream_calls(openai_stats: Dict[str, int], search_stats: Dict[str, int]) -> Dict[str, Any]:
+    return {
+        "chat": openai_stats.get("chat_requests", 0),
+        "chat_by_stage": {key.split(".", 1)[1]: value for key, value in sorted(openai_stats.items())
+                          if key.startswith("chat.")},
+        "embedding": openai_stats.get("embedding_requests", 0),
+        "embedded_texts": openai_stats.get("embedded_texts", 0),
+        "search": search_stats.get("search_requests", 0),
+        "prompt_tokens": openai_stats.get("prompt_tokens", 0),
+        "completion_tokens": openai_stats.get("completion_tokens", 0),
+    }
+
+
+def lookup(report: Dict[str, Any], path: str) -> Optional[float]:
+    value: Any = report.get("results", {})
+    for part in path.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold_pct: float) -> Dict[str, Any]:
+    """
+    Relative change of the key metrics against a baseline report; "regression" flags changes for the worse
+    by more than threshold_pct.
+    """
+    mode, baseline_mode = current["config"].get("mode"), baseline.get("config", {}).get("mode", "warm")
+    if mode != baseline_mode:
+        # cached and uncached runs differ by far more than any regression threshold
+        raise ValueError(f"Cannot compare a {mode} run with a {baseline_mode} baseline.")
+    comparison = {}
+    for path, higher_is_better in COMPARED_METRICS.items():
+        before, after = lookup(baseline, path), lookup(current, path)
+        if before is None or after is None:
+            continue
+        change = (after - before) / before * 100 if before else 0.0
+        comparison[path] = {"baseline": before, "current": after, "change_pct": round(change, 2),
+                            "regression": -change > threshold_pct if higher_is_better else change > threshold_pct}
+    return comparison
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(args: argparse.Namespace) -> dict:
+    questions = QUESTIONS if args.warm else distinct_questions(args.requests)
+    if args.questions:
+        questions = [line.strip() for line in Path(args.questions).read_text(encoding="utf-8").splitlines() if line.strip()]
+
+    with tempfile.TemporaryDirectory(prefix="george-benchmark-") as directory:
+        workdir = Path(directory)
+        (workdir / "prometheus").mkdir()
+        openai_port, search_port, app_port = free_port(), free_port(), free_port()
+        openai_url, search_url = f"http://127.0.0.1:{openai_port}", f"http://127.0.0.1:{search_port}"
+        app_url = f"http://127.0.0.1:{app_port}"
+        fake_env = dict(os.environ)
+        processes: List[subprocess.Popen] = []
+        try:
+            openai_log, search_log, app_log = workdir / "openai.log", workdir / "search.log", workdir / "app.log"
+            processes.append(start_process([
+                "-m", "benchmarks.fake_openai_server", "--port", str(openai_port),
+                "--ttft-ms", str(args.ttft_ms), "--tokens-per-second", str(args.tokens_per_second),
+                "--answer-tokens", str(args.answer_tokens), "--embedding-latency-ms", str(args.embedding_latency_ms),
+                "--embedding-per-item-ms", str(args.embedding_per_item_ms), "--dimensions", str(args.dimensions),
+                "--jitter-ms", str(args.jitter_ms)], fake_env, openai_log))
+            processes.append(start_process([
+                "-m", "benchmarks.fake_search_server", "--port", str(search_port),
+                "--latency-ms", str(args.search_latency_ms), "--jitter-ms", str(args.jitter_ms)], fake_env, search_log))
+            processes.append(start_process([
+                "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(app_port),
+                "--workers", str(args.workers), "--log-level", "warning"],
+                app_environment(args, workdir, openai_url, search_url), app_log))
+
+            timeout = httpx.Timeout(args.request_timeout)
+            limits = httpx.Limits(max_connections=args.concurrency + 4)
+            async with httpx.AsyncClient(timeout=timeout) as control, \
+                    httpx.AsyncClient(base_url=app_url, timeout=timeout, limits=limits) as client:
+                await wait_until_ready(control, f"{openai_url}/stats", processes[0], openai_log)
+                await wait_until_ready(control, f"{search_url}/stats", processes[1], search_log)
+                await wait_until_ready(control, f"{app_url}/metrics", processes[2], app_log)
+
+                ingestion = await ingest_transcripts(client)
+                for _ in range(args.warmup):
+                    await ask(client, WARMUP_QUESTION)
+                await control.post(f"{openai_url}/stats/reset")
+                await control.post(f"{search_url}/stats/reset")
+
+                results = await run_load(client, questions, args.requests, args.concurrency)
+                calls = upstream_calls((await control.get(f"{openai_url}/stats")).json(),
+                                       (await control.get(f"{search_url}/stats")).json())
+                metrics_text = (await client.get("/metrics")).text
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+    requests = max(results["requests"], 1)
+    results["upstream_calls"] = calls
+    results["upstream_calls_per_request"] = {key: round(calls[key] / requests, 3) for key in ("chat", "embedding", "search")}
+    # includes the warm-up and ingestion
+    results["stages"] = stage_timings(metrics_text)
+    report = {
+        "config": {"mode": "warm" if args.warm else "cold",
+                   **{key: value for key, value in vars(args).items() if key not in ("output", "baseline", "warm")}},
+        "environment": {"git_commit": git_commit(), "python": platform.python_version(), "platform": platform.platform()},
+        "ingestion": ingestion,
+        "results": results,
+    }
+    if args.baseline:
+        report["comparison"] = compare(report, json.loads(Path(args.baseline).read_text(encoding="utf-8")),
+                                       args.regression_threshold)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=6)
+    parser.add_argument("--warmup", type=int, default=1, help="questions asked before measuring")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers of the app")
+    parser.add_argument("--warm", action="store_true",
+                        help="keep the answer cache, web search cache and single-flight on and repeat a few questions")
+    parser.add_argument("--questions", help="file with one question per line, asked in turn; defaults to built-in questions")
+    parser.add_argument("--ttft-ms", type=float, default=400.0, help="model time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=60.0, help="model completion token rate")
+    parser.add_argument("--answer-tokens", type=int, default=120, help="length of the QA answer")
+    parser.add_argument("--embedding-latency-ms", type=float, default=80.0)
+    parser.add_argument("--embedding-per-item-ms", type=float, default=1.0)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--search-latency-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--request-timeout", type=float, default=120.0)
+    parser.add_argument("--app-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment of the app, e.g. QA_SINGLE_FLIGHT=false (repeatable)")
+    parser.add_argument("--baseline", help="earlier JSON report to compare with")
+    parser.add_argument("--regression-threshold", type=float, default=5.0,
+                        help="percentage by which a metric may get worse before it is flagged")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    arguments = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    result = asyncio.run(main(arguments))
+    print(json.dumps(result, indent=2))
+    if arguments.output:
+        with open(arguments.output, "w", encoding="utf-8") as output:
+            json.dump(result, output, indent=2)
@@ -0,0 +1,195 @@
+"""
+OpenAI-compatible stand-in for Azure OpenAI, serving chat completions (streamed or not) and embeddings.
+
+Answers are canned per prompt (plan, break down, regenerate, check history, QA, summary) so the whole
+pipeline runs, with a configurable time to first token, token rate and embedding latency. Call counts
+are served on /stats.
+
+Usage:
+    python -m benchmarks.fake_openai_server --port 8101 --ttft-ms 400 --tokens-per-second 60
+"""
+import re
+import json
+import time
+import base64
+import asyncio
+import argparse
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, List
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.utils.token_counter import count_tokens
+
+from .fakes import LatencyProfile, embed_text
+
+ANSWER_WORDS = ("According to the episode, the hosts explain how AI changed the way people work, learn and "
+                "stay healthy, and why they expect the next wave of assistants to be even more useful.").split()
+
+# Identifies the prompt of each pipeline stage by a phrase of its template.
+PROMPT_MARKERS = (
+    ("plan", '"recomposed_queries": the query broken down'),
+    ("breakdown", "break it down into smaller, specific sub-queries"),
+    ("regenerate", "regenerating user queries for web search"),
+    ("check_history", 'respond with "NO ANSWER"'),
+    ("qa", "Knowledge Base Result"),
+)
+
+
+def classify_prompt(prompt: str) -> str:
+    """
+    Name the pipeline stage a prompt belongs to.
+    """
+    for stage, marker in PROMPT_MARKERS:
+        if marker in prompt:
+            return stage
+    return "other"
+
+
+def extract_query(prompt: str) -> str:
+    """
+    Return the user query rendered at the end of a prompt.
+    """
+    queries = re.findall(r"(?:^query:[ \t]*|^## User Query:\s*\n)(.+)$", prompt, re.MULTILINE)
+    return queries[-1].strip() if queries else "artificial intelligence"
+
+
+def completion_text(stage: str, prompt: str, answer_tokens: int) -> str:
+    """
+    The canned completion of a pipeline stage.
+    """
+    query = extract_query(prompt)
+    if stage == "plan":
+        return json.dumps({"recomposed_queries": [query], "web_query": query})
+    if stage == "breakdown":
+        return json.dumps({"recomposed_queries": [query]})
+    if stage == "regenerate":
+        return query
+    if stage == "check_history":
+        return "NO ANSWER"
+    if stage == "qa":
+        return " ".join(ANSWER_WORDS[i % len(ANSWER_WORDS)] for i in range(answer_tokens))
+    return "The user and George talked about artificial intelligence."
+
+
+def split_tokens(text: str) -> List[str]:
+    """
+    Split a completion into the pieces it is streamed in, one word (with its leading space) each.
+    """
+    return re.findall(r"\s*\S+", text) or [text]
+
+
+def create_app(args: argparse.Namespace) -> FastAPI:
+    """
+    Create the fake OpenAI server.
+    """
+    app = FastAPI(title="Fake OpenAI")
+    first_token = LatencyProfile(args.ttft_ms, 0.0, args.jitter_ms)
+    embedding_latency = LatencyProfile(args.embedding_latency_ms, args.embedding_per_item_ms, args.jitter_ms)
+    token_interval = 1.0 / args.tokens_per_second if args.tokens_per_second > 0 else 0.0
+    stats: Counter = Counter()
+
+    def usage(prompt_tokens: int, completion_tokens: int = 0) -> Dict[str, int]:
+        stats["prompt_tokens"] += prompt_tokens
+        stats["completion_tokens"] += completion_tokens
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens}
+
+    async def chat_completions(request: Request, deployment: str = "gpt") -> Any:
+        body = await request.json()
+        prompt = "\n".join(str(message.get("content") or "") for message in body.get("messages", []))
+        stage = classify_prompt(prompt)
+        stats[f"chat.{stage}"] += 1
+        text = completion_text(stage, prompt, args.answer_tokens)
+        tokens = split_tokens(text)
+        created = int(time.time())
+        completion_id = f"chatcmpl-{stats['chat_requests']}"
+        stats["chat_requests"] += 1
+
+        if not body.get("stream"):
+            await first_token.wait()
+            await asyncio.sleep(token_interval * len(tokens))
+            return {
+                "id": completion_id, "object": "chat.completion", "created": created, "model": deployment,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": usage(count_tokens(prompt), len(tokens)),
+            }
+
+        include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+        async def events() -> AsyncIterator[str]:
+            def chunk(choices: List[Dict[str, Any]], **extra: Any) -> str:
+                payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                           "model": deployment, "choices": choices, **extra}
+                return f"data: {json.dumps(payload)}\n\n"
+
+            await first_token.wait()
+            for index, token in enumerate(tokens):
+                if index:
+                    await asyncio.sleep(token_interval)
+                delta = {"role": "assistant", "content": token} if index == 0 else {"content": token}
+                yield chunk([{"index": 0, "delta": delta, "finish_reason": None}])
+            yield chunk([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+            if include_usage:
+                yield chunk([], usage=usage(count_tokens(prompt), len(tokens)))
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    async def embeddings(request: Request, deployment: str = "embedding") -> Any:
+        body = await request.json()
+        texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        stats["embedding_requests"] += 1
+        stats["embedded_texts"] += len(texts)
+        await embedding_latency.wait(len(texts))
+
+        data = []
+        for index, text in enumerate(texts):
+            vector = embed_text(str(text), args.dimensions)
+            if body.get("encoding_format") == "base64":
+                # what the openai client asks for by default
+                embedding: Any = base64.b64encode(vector.astype(np.float32).tobytes()).decode("ascii")
+            else:
+                embedding = vector.tolist()
+            data.append({"object": "embedding", "index": index, "embedding": embedding})
+        return {"object": "list", "data": data, "model": deployment,
+                "usage": usage(sum(count_tokens(str(text)) for text in texts))}
+
+    # Azure OpenAI routes, then the plain OpenAI ones
+    app.add_api_route("/openai/deployments/{deployment}/chat/completions", chat_completions, methods=["POST"])
+    app.add_api_route("/openai/deployments/{deployment}/embeddings", embeddings, methods=["POST"])
+    app.add_api_route("/v1/chat/completions", chat_completions, methods=["POST"])
+    app.add_api_route("/v1/embeddings", embeddings, methods=["POST"])
+
+    @app.get("/stats")
+    async def get_stats() -> JSONResponse:
+        return JSONResponse(dict(stats))
+
+    @app.post("/stats/reset")
+    async def reset_stats() -> JSONResponse:
+        stats.clear()
+        return JSONResponse({})
+
+    return app
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--ttft-ms", type=float, default=400.0, help="time to the first token of a completion")
+    parser.add_argument("--tokens-per-second", type=float, default=60.0, help="completion token rate")
+    parser.add_argument("--answer-tokens", type=int, default=120, help="length of the QA answer")
+    parser.add_argument("--embedding-latency-ms", type=float, default=80.0)
+    parser.add_argument("--embedding-per-item-ms", type=float, default=1.0)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8101)
+    add_arguments(parser)
+    arguments = parser.parse_args()
+    uvicorn.run(create_app(arguments), host=arguments.host, port=arguments.port, log_level="warning")
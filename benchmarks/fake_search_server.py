@@ -0,0 +1,66 @@
+"""
+SerpApi-compatible stand-in for the Bing web search, with configurable latency. Call counts are served on /stats.
+
+Usage:
+    python -m benchmarks.fake_search_server --port 8102 --latency-ms 300
+"""
+import argparse
+from collections import Counter
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from .fakes import LatencyProfile
+
+
+def create_app(args: argparse.Namespace) -> FastAPI:
+    """
+    Create the fake search server.
+    """
+    app = FastAPI(title="Fake SerpApi")
+    latency = LatencyProfile(args.latency_ms, 0.0, args.jitter_ms)
+    stats: Counter = Counter()
+
+    @app.get("/search.json")
+    async def search(q: str, engine: str = "bing") -> JSONResponse:
+        stats["search_requests"] += 1
+        await latency.wait()
+        return JSONResponse({
+            "search_parameters": {"engine": engine, "q": q},
+            "organic_results": [
+                {
+                    "position": position,
+                    "title": f"{q} - result {position}",
+                    "link": f"https://example.com/{position}",
+                    "snippet": f"An article about {q}, covering the latest developments and what they mean.",
+                }
+                for position in range(1, args.results + 1)
+            ],
+        })
+
+    @app.get("/stats")
+    async def get_stats() -> JSONResponse:
+        return JSONResponse(dict(stats))
+
+    @app.post("/stats/reset")
+    async def reset_stats() -> JSONResponse:
+        stats.clear()
+        return JSONResponse({})
+
+    return app
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--results", type=int, default=5, help="organic results per search")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8102)
+    add_arguments(parser)
+    arguments = parser.parse_args()
+    uvicorn.run(create_app(arguments), host=arguments.host, port=arguments.port, log_level="warning")
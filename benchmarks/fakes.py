@@ -0,0 +1,88 @@
+"""
+Local stand-ins for the upstream services, used by the benchmarks.
+
+They keep the interfaces of the real services but run in-process with configurable latency, so the
+benchmarks measure our own pipeline instead of the network.
+"""
+import asyncio
+import hashlib
+import random
+from typing import Any, List
+
+import numpy as np
+from semantic_kernel.connectors.ai.embedding_generator_base import EmbeddingGeneratorBase
+from semantic_kernel.memory import VolatileMemoryStore
+from semantic_kernel.memory.memory_record import MemoryRecord
+
+
+class LatencyProfile:
+    """
+    Latency of one simulated upstream request: a fixed base, a per-item cost and uniform jitter, in milliseconds.
+    """
+
+    def __init__(self, base_ms: float = 0.0, per_item_ms: float = 0.0, jitter_ms: float = 0.0) -> None:
+        self.base_ms = base_ms
+        self.per_item_ms = per_item_ms
+        self.jitter_ms = jitter_ms
+
+    async def wait(self, items: int = 1) -> None:
+        delay_ms = self.base_ms + self.per_item_ms * items + random.uniform(0, self.jitter_ms)
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+
+
+class FakeEmbeddingService(EmbeddingGeneratorBase):
+    """
+    Deterministic embedding generator: texts sharing words get similar vectors.
+    """
+
+    dimensions: int = 1536
+    latency: Any = None
+    requests: int = 0
+    texts: int = 0
+
+    async def generate_embeddings(self, texts: List[str], settings: Any = None, **kwargs: Any) -> np.ndarray:
+        self.requests += 1
+        self.texts += len(texts)
+        if self.latency:
+            await self.latency.wait(len(texts))
+        return np.stack([embed_text(text, self.dimensions) for text in texts])
+
+
+def embed_text(text: str, dimensions: int = 1536) -> np.ndarray:
+    """
+    Hash each word of the text into a bucket and return the normalized bag-of-words vector.
+    """
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for word in text.lower().split():
+        vector[int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % dimensions] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class FakeMemoryStore(VolatileMemoryStore):
+    """
+    In-memory vector store that simulates the latency of a remote index.
+    """
+
+    def __init__(self, upsert_latency: LatencyProfile | None = None, search_latency: LatencyProfile | None = None) -> None:
+        super().__init__()
+        self.upsert_latency = upsert_latency
+        self.search_latency = search_latency
+        self.upsert_requests = 0
+        self.search_requests = 0
+
+    async def upsert_batch(self, collection_name: str, records: List[MemoryRecord]) -> List[str]:
+        self.upsert_requests += 1
+        if self.upsert_latency:
+            await self.upsert_latency.wait(len(records))
+        if not await self.does_collection_exist(collection_name):
+            await self.create_collection(collection_name)
+        return await super().upsert_batch(collection_name, records)
+
+    async def get_nearest_matches(self, collection_name: str, embedding: np.ndarray, limit: int,
+                                  min_relevance_score: float = 0.0, with_embeddings: bool = False):
+        self.search_requests += 1
+        if self.search_latency:
+            await self.search_latency.wait()
+        return await super().get_nearest_matches(collection_name, embedding, limit, min_relevance_score, with_embeddings)
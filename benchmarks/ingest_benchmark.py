@@ -0,0 +1,84 @@
+"""
+Benchmark full-catalog ingestion against local stand-in embedding and store backends.
+
+Usage:
+    python -m benchmarks.ingest_benchmark --episodes 1000 --segments 12 --embed-latency-ms 80
+"""
+import argparse
+import asyncio
+import json
+import logging
+
+from app.models.knowledge_base_model import PodCastKnowledgeBaseModel
+from app.repository.knowledge_base_repository import KnowledgeBaseRepository
+from app.services.ingestion_pipeline_service import IngestionPipeline
+from app.utils.transcripts import TRANSCRIPTS
+
+from .fakes import FakeEmbeddingService, FakeMemoryStore, LatencyProfile
+
+
+def synthetic_catalog(episodes: int, segments: int):
+    """
+    Yield segments of a synthetic catalog built by cycling through the sample transcripts.
+    """
+    contents = [segment["content"] for transcript in TRANSCRIPTS for segment in transcript["transcripts"]]
+    for episode in range(episodes):
+        for i in range(segments):
+            yield PodCastKnowledgeBaseModel(
+                id=f"episode-{episode}-{i + 1}",
+                podcast_title=f"Episode {episode}",
+                content=f"{contents[(episode * segments + i) % len(contents)]} (episode {episode})",
+                time_stamp=f"{i:02d}:00 - {i + 1:02d}:00",
+            )
+
+
+async def main(args: argparse.Namespace) -> dict:
+    embedding_service = FakeEmbeddingService(
+        ai_model_id="fake-embedding",
+        dimensions=args.dimensions,
+        latency=LatencyProfile(args.embed_latency_ms, args.embed_per_item_ms, args.jitter_ms),
+    )
+    store = FakeMemoryStore(upsert_latency=LatencyProfile(args.upsert_latency_ms, args.upsert_per_item_ms, args.jitter_ms))
+    repository = KnowledgeBaseRepository(storage=store, embedding_service=embedding_service)
+    pipeline = IngestionPipeline(
+        repository,
+        embed_batch_size=args.embed_batch_size,
+        embed_concurrency=args.embed_concurrency,
+        upsert_batch_size=args.upsert_batch_size,
+        upsert_concurrency=args.upsert_concurrency,
+    )
+
+    report = await pipeline.run_async(synthetic_catalog(args.episodes, args.segments))
+    return {
+        "config": vars(args),
+        "report": report.model_dump(),
+        "upstream_calls": {
+            "embedding_requests": embedding_service.requests,
+            "upsert_requests": store.upsert_requests,
+        },
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--episodes", type=int, default=200)
+    parser.add_argument("--segments", type=int, default=12, help="segments per episode")
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--embed-batch-size", type=int, default=None)
+    parser.add_argument("--embed-concurrency", type=int, default=None)
+    parser.add_argument("--upsert-batch-size", type=int, default=None)
+    parser.add_argument("--upsert-concurrency", type=int, default=None)
+    parser.add_argument("--embed-latency-ms", type=float, default=80.0)
+    parser.add_argument("--embed-per-item-ms", type=float, default=1.0)
+    parser.add_argument("--upsert-latency-ms", type=float, default=60.0)
+    parser.add_argument("--upsert-per-item-ms", type=float, default=0.2)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    arguments = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    result = asyncio.run(main(arguments))
+    print(json.dumps(result, indent=2))
+    if arguments.output:
+        with open(arguments.output, "w", encoding="utf-8") as output:
+            json.dump(result, output, indent=2)
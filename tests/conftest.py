@@ -0,0 +1,18 @@
+import asyncio
+from typing import AsyncIterator, Iterable
+
+
+def unwrap_singleton(factory):
+    """
+    The class behind a @singleton factory, so a test can build isolated instances of it.
+    """
+    return next(cell.cell_contents for cell in factory.__closure__ if isinstance(cell.cell_contents, type))
+
+
+async def iterate(items: Iterable, delay: float = 0.0) -> AsyncIterator:
+    """
+    Yield items asynchronously, sleeping before each one.
+    """
+    for item in items:
+        await asyncio.sleep(delay)
+        yield item
@@ -0,0 +1,86 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.models.cached_answer_model import CachedAnswer
+from app.services import answer_cache_service, knowledge_base_service
+from app.services.answer_cache_service import AnswerCacheService
+
+from conftest import unwrap_singleton
+
+
+class FakeEmbeddings:
+    """
+    Embeds questions about hospitals and clinics close together, everything else apart.
+    """
+    async def generate_embeddings(self, texts):
+        return np.array([[1.0, 0.1, 0.0] if "hospital" in text or "clinic" in text else [0.0, 0.0, 1.0]
+                         for text in texts])
+
+
+@pytest.fixture(autouse=True)
+def index_generation(tmp_path, monkeypatch):
+    monkeypatch.setattr(knowledge_base_service, "INDEX_GENERATION_PATH", str(tmp_path / "index_generation"))
+
+
+def cache() -> AnswerCacheService:
+    return unwrap_singleton(AnswerCacheService)(FakeEmbeddings())
+
+
+def lookup(answers: AnswerCacheService, query: str):
+    return answers.get(asyncio.run(answers.get_key_async(query)))
+
+
+def store(answers: AnswerCacheService, query: str, message: str) -> None:
+    answers.put(asyncio.run(answers.get_key_async(query)), CachedAnswer(message=message))
+
+
+def test_the_same_question_is_answered_from_the_cache():
+    answers = cache()
+    store(answers, "How is AI used in hospitals?", "In diagnostics.")
+
+    assert lookup(answers, "  how is AI used in HOSPITALS ").message == "In diagnostics."
+    assert lookup(answers, "What about music?") is None
+
+
+def test_a_similar_question_shares_the_answer():
+    answers = cache()
+    store(answers, "How is AI used in hospitals?", "In diagnostics.")
+
+    assert lookup(answers, "Do clinics use AI?").message == "In diagnostics."
+
+
+def test_answers_expire_after_the_ttl(monkeypatch):
+    answers = cache()
+    now = [1000.0]
+    monkeypatch.setattr(answer_cache_service.time, "monotonic", lambda: now[0])
+    store(answers, "How is AI used in hospitals?", "In diagnostics.")
+
+    now[0] += answer_cache_service.ANSWER_CACHE_TTL_SECONDS + 1
+
+    assert lookup(answers, "How is AI used in hospitals?") is None
+
+
+def test_the_least_recently_used_answer_is_evicted(monkeypatch):
+    monkeypatch.setattr(answer_cache_service, "ANSWER_CACHE_SIZE", 2)
+    monkeypatch.setattr(answer_cache_service, "ANSWER_CACHE_SIMILARITY", 0.0)
+    answers = cache()
+    store(answers, "first question", "1")
+    store(answers, "second question", "2")
+    lookup(answers, "first question")
+
+    store(answers, "third question", "3")
+
+    assert lookup(answers, "second question") is None
+    assert lookup(answers, "first question").message == "1"
+
+
+def test_ingestion_by_any_worker_clears_the_cache():
+    answers = cache()
+    store(answers, "How is AI used in hospitals?", "In diagnostics.")
+
+    # what an ingestion in another process leaves behind
+    knowledge_base_service._bump_index_generation()
+
+    assert lookup(answers, "How is AI used in hospitals?") is None
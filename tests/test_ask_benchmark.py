@@ -0,0 +1,54 @@
+import pytest
+
+from benchmarks.ask_benchmark import compare, distinct_questions, percentiles, stage_timings
+
+
+def report(mode: str, ttft_p50: float, requests_per_second: float) -> dict:
+    return {"config": {"mode": mode},
+            "results": {"ttft_seconds": {"p50": ttft_p50}, "requests_per_second": requests_per_second}}
+
+
+def test_cold_run_questions_never_repeat():
+    questions = distinct_questions(200)
+
+    assert len(set(questions)) == 200
+    assert questions[0] == "How is AI changing healthcare?"
+
+
+def test_percentiles_use_the_nearest_rank():
+    result = percentiles([float(value) for value in range(1, 11)])
+
+    assert result == {"mean": 5.5, "p50": 5.0, "p90": 9.0, "p99": 10.0, "max": 10.0}
+    assert percentiles([]) == {"mean": None, "p50": None, "p90": None, "p99": None, "max": None}
+
+
+def test_changes_for_the_worse_beyond_the_threshold_are_regressions():
+    comparison = compare(report("cold", 1.2, 9.0), report("cold", 1.0, 10.0), threshold_pct=15)
+
+    assert comparison["ttft_seconds.p50"] == {"baseline": 1.0, "current": 1.2, "change_pct": 20.0, "regression": True}
+    # fewer requests per second is worse, but within the threshold
+    assert comparison["requests_per_second"]["change_pct"] == -10.0
+    assert not comparison["requests_per_second"]["regression"]
+
+
+def test_runs_of_different_modes_are_not_compared():
+    with pytest.raises(ValueError, match="cold run with a warm baseline"):
+        compare(report("cold", 1.0, 10.0), report("warm", 0.1, 50.0), threshold_pct=10)
+    # reports written before runs had a mode were warm runs
+    with pytest.raises(ValueError):
+        compare(report("cold", 1.0, 10.0), {"results": {}}, threshold_pct=10)
+
+
+def test_stage_timings_are_read_from_the_metrics():
+    metrics = "\n".join([
+        "# TYPE george_stage_duration_seconds histogram",
+        'george_stage_duration_seconds_count{stage="plan",outcome="ok"} 4.0',
+        'george_stage_duration_seconds_sum{stage="plan",outcome="ok"} 2.0',
+        'george_stage_duration_seconds_count{stage="plan",outcome="error"} 1.0',
+        'george_stage_duration_seconds_sum{stage="plan",outcome="error"} 30.0',
+        'george_stage_duration_seconds_count{stage="web_search",outcome="cancelled"} 2.0',
+        'george_stage_duration_seconds_sum{stage="web_search",outcome="cancelled"} 0.5',
+        "",
+    ])
+
+    assert stage_timings(metrics) == {"plan": {"count": 4, "mean_seconds": 0.5}}
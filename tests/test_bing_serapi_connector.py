@@ -0,0 +1,85 @@
+import asyncio
+
+import httpx
+import pytest
+from semantic_kernel.exceptions import ServiceInvalidRequestError, ServiceResponseException
+
+from app.connectors.search_engine.bing_serapi_connector import BingSerApiConnector
+
+
+API_KEY = "secret-serpapi-key"
+
+
+def stub_server(handler):
+    """
+    A connector whose HTTP calls are answered by the handler instead of SerpApi.
+    """
+    requests = []
+
+    def record(request):
+        requests.append(request)
+        return handler(request)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(record))
+    return BingSerApiConnector(api_key=API_KEY, base_url="https://serpapi.test", client=client), requests
+
+
+def organic_results(request):
+    query = request.url.params["q"]
+    return httpx.Response(200, json={"organic_results": [
+        {"title": f"{query} {position}", "link": f"https://example.com/{position}", "snippet": f"Snippet {position} [3]."}
+        for position in range(1, 4)
+    ]})
+
+
+def test_results_are_parsed_into_an_answer_with_references():
+    connector, requests = stub_server(organic_results)
+
+    result = asyncio.run(connector.search_async("ai podcasts", num_results=2))
+
+    assert requests[0].url.path == "/search.json"
+    assert requests[0].url.params["engine"] == "bing" and requests[0].url.params["q"] == "ai podcasts"
+    assert result["organic_result"]["answer"] == "Snippet 1[1] Snippet 2[2]"
+    assert [reference["link"] for reference in result["organic_result"]["references"]] == \
+        ["https://example.com/1", "https://example.com/2"]
+
+
+def test_no_results_give_the_default_answer():
+    connector, _ = stub_server(lambda request: httpx.Response(200, json={}))
+
+    result = asyncio.run(connector.search_async("nothing"))
+
+    assert result == {"organic_result": {"answer": "No answer found.", "references": []}}
+
+
+@pytest.mark.parametrize("handler, message", [
+    (lambda request: httpx.Response(401, json={"error": "Invalid API key."}), "HTTP 401"),
+    (lambda request: httpx.Response(200, json={"error": "Out of searches."}), "Out of searches."),
+])
+def test_errors_never_reveal_the_api_key(handler, message):
+    connector, _ = stub_server(handler)
+
+    with pytest.raises(ServiceResponseException) as error:
+        asyncio.run(connector.search_async("ai podcasts"))
+
+    assert message in str(error.value)
+    assert API_KEY not in str(error.value) and error.value.__cause__ is None
+
+
+def test_timeouts_are_reported_as_service_errors():
+    def timing_out(request):
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    connector, _ = stub_server(timing_out)
+
+    with pytest.raises(ServiceResponseException, match="timed out after 0.5 seconds"):
+        asyncio.run(connector.search_async("ai podcasts", timeout=0.5))
+
+
+@pytest.mark.parametrize("query, num_results", [("", 2), ("ai", 0), ("ai", 50)])
+def test_invalid_requests_are_rejected_before_any_call(query, num_results):
+    connector, requests = stub_server(organic_results)
+
+    with pytest.raises(ServiceInvalidRequestError):
+        asyncio.run(connector.search_async(query, num_results=num_results))
+    assert requests == []
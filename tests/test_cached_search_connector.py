@@ -0,0 +1,165 @@
+import asyncio
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.connectors.search_engine import cached_search_connector
+from app.connectors.search_engine.cached_search_connector import CachedSearchConnector
+
+
+class FakeSearch:
+    """
+    Answers each query with a numbered result; can hold searches back until released.
+    """
+    def __init__(self):
+        self.queries = []
+        self.cancelled = 0
+        self.release = None
+        self.fail = False
+
+    async def search_async(self, query, num_results=1, **kwargs):
+        self.queries.append(query)
+        try:
+            if self.release is not None:
+                await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            raise RuntimeError("search failed")
+        return {"organic_result": {"answer": f"{query} #{len(self.queries)}"}}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cached_search_connector.time, "monotonic", lambda: now[0])
+    return now
+
+
+def answer(result) -> str:
+    return result["organic_result"]["answer"]
+
+
+def metric(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, dict(labels, cache="web_search")) or 0.0
+
+
+def test_fresh_results_come_from_the_cache(clock):
+    inner = FakeSearch()
+    cache = CachedSearchConnector(inner, ttl_seconds=10, stale_seconds=0)
+
+    async def run():
+        first = await cache.search_async("AI news")
+        clock[0] += 5
+        return first, await cache.search_async("  ai NEWS ")
+
+    first, second = asyncio.run(run())
+    assert answer(first) == answer(second) == "AI news #1"
+    assert inner.queries == ["AI news"]
+
+
+def test_expired_results_are_searched_again(clock):
+    inner = FakeSearch()
+    cache = CachedSearchConnector(inner, ttl_seconds=10, stale_seconds=0)
+
+    async def run():
+        await cache.search_async("AI news")
+        clock[0] += 11
+        return await cache.search_async("AI news")
+
+    assert answer(asyncio.run(run())) == "AI news #2"
+
+
+def test_stale_results_are_served_while_one_refresh_runs(clock):
+    inner = FakeSearch()
+    cache = CachedSearchConnector(inner, ttl_seconds=10, stale_seconds=100)
+
+    async def run():
+        await cache.search_async("AI news")
+        clock[0] += 20
+        stale = [await cache.search_async("AI news") for _ in range(3)]
+        await asyncio.sleep(0)
+        return stale, await cache.search_async("AI news")
+
+    stale, refreshed = asyncio.run(run())
+    assert [answer(result) for result in stale] == ["AI news #1"] * 3
+    assert answer(refreshed) == "AI news #2"
+    assert len(inner.queries) == 2
+
+
+def test_the_least_recently_used_query_is_evicted(clock):
+    inner = FakeSearch()
+    cache = CachedSearchConnector(inner, max_entries=2, ttl_seconds=10, stale_seconds=0)
+
+    async def run():
+        for query in ("first", "second", "first", "third", "second"):
+            await cache.search_async(query)
+
+    asyncio.run(run())
+    assert inner.queries == ["first", "second", "third", "second"]
+
+
+def test_concurrent_misses_share_one_search():
+    inner = FakeSearch()
+    cache = CachedSearchConnector(inner)
+
+    async def run():
+        return await asyncio.gather(*(cache.search_async("AI news") for _ in range(3)))
+
+    assert [answer(result) for result in asyncio.run(run())] == ["AI news #1"] * 3
+    assert inner.queries == ["AI news"]
+
+
+def test_a_sole_caller_giving_up_cancels_the_search():
+    inner = FakeSearch()
+    cache = CachedSearchConnector(inner)
+
+    async def run():
+        inner.release = asyncio.Event()
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(cache.search_async("AI news"), timeout=0.01)
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert inner.cancelled == 1
+
+
+def test_a_caller_giving_up_leaves_the_search_to_the_others():
+    inner = FakeSearch()
+    cache = CachedSearchConnector(inner)
+
+    async def run():
+        inner.release = asyncio.Event()
+        waiting = asyncio.ensure_future(cache.search_async("AI news"))
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(cache.search_async("AI news"), timeout=0.01)
+        inner.release.set()
+        return await waiting
+
+    assert answer(asyncio.run(run())) == "AI news #1"
+    assert inner.cancelled == 0
+
+
+def test_lookups_refreshes_and_errors_are_exported(clock):
+    inner = FakeSearch()
+    cache = CachedSearchConnector(inner, ttl_seconds=10, stale_seconds=100)
+    names = {"hits": ("george_cache_lookups_total", {"result": "hits"}),
+             "stale_hits": ("george_cache_lookups_total", {"result": "stale_hits"}),
+             "misses": ("george_cache_lookups_total", {"result": "misses"}),
+             "refreshes": ("george_cache_refreshes_total", {}),
+             "errors": ("george_cache_errors_total", {})}
+    before = {key: metric(name, **labels) for key, (name, labels) in names.items()}
+
+    async def run():
+        await cache.search_async("AI news")
+        await cache.search_async("AI news")
+        clock[0] += 20
+        inner.fail = True
+        await cache.search_async("AI news")
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert {key: metric(name, **labels) - before[key] for key, (name, labels) in names.items()} == \
+        {"hits": 1, "stale_hits": 1, "misses": 1, "refreshes": 1, "errors": 1}
+    assert metric("george_cache_entries") == 1
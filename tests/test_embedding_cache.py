@@ -0,0 +1,58 @@
+import asyncio
+
+import numpy as np
+from prometheus_client import REGISTRY
+
+from app.services.embedding_cache_service import CachedEmbeddingService
+
+
+class FakeEmbeddingService:
+    """
+    Embeds a text as its length, recording every text it is sent.
+    """
+    ai_model_id = "fake-embedding"
+    service_id = "fake"
+
+    def __init__(self):
+        self.embedded = []
+
+    async def generate_embeddings(self, texts, settings=None, **kwargs):
+        self.embedded.extend(texts)
+        return np.array([[float(len(text)), 1.0] for text in texts])
+
+
+def lookups(result: str) -> float:
+    return REGISTRY.get_sample_value("george_cache_lookups_total", {"cache": "embedding", "result": result}) or 0.0
+
+
+def test_only_uncached_texts_are_embedded(tmp_path):
+    inner = FakeEmbeddingService()
+    cache = CachedEmbeddingService(inner, cache_dir=str(tmp_path))
+
+    first = asyncio.run(cache.generate_embeddings(["a", "bb"]))
+    second = asyncio.run(cache.generate_embeddings(["bb", "ccc", "bb"]))
+
+    assert inner.embedded == ["a", "bb", "ccc"]
+    np.testing.assert_array_equal(second[0], first[1])
+    assert cache.stats == {"memory_hits": 1, "disk_hits": 0, "misses": 3}
+
+
+def test_a_new_process_is_served_from_disk(tmp_path):
+    asyncio.run(CachedEmbeddingService(FakeEmbeddingService(), cache_dir=str(tmp_path)).generate_embeddings(["a"]))
+    inner = FakeEmbeddingService()
+
+    asyncio.run(CachedEmbeddingService(inner, cache_dir=str(tmp_path)).generate_embeddings(["a"]))
+
+    assert inner.embedded == []
+
+
+def test_lookups_are_exported_as_metrics():
+    cache = CachedEmbeddingService(FakeEmbeddingService(), cache_dir="")
+    before = {result: lookups(result) for result in ("memory_hits", "misses")}
+
+    asyncio.run(cache.generate_embeddings(["a", "a-new"]))
+    asyncio.run(cache.generate_embeddings(["a"]))
+
+    assert lookups("misses") - before["misses"] == 2
+    assert lookups("memory_hits") - before["memory_hits"] == 1
+    assert REGISTRY.get_sample_value("george_cache_entries", {"cache": "embedding"}) == 2
@@ -0,0 +1,141 @@
+import json
+import asyncio
+
+import pytest
+from semantic_kernel.contents import ChatHistory
+
+from app.models.query_plan_model import QueryPlan
+from app.repository.memory_session_repository import MemorySessionRepository
+from app.services import george_qa_service, history_compaction_service
+from app.services.chat_history_service import ChatHistoryService
+from app.services.george_qa_service import GeorgeQAService
+from app.services.history_compaction_service import HistoryCompactionService, SUMMARY_PREFIX
+
+from conftest import iterate, unwrap_singleton
+
+
+KB_HIT = {"id": "Episode-1", "podcast_title": "Episode", "time_stamp": "01:00", "content": "AI in hospitals", "score": 0.9}
+
+
+class FakeKernel:
+    """
+    Plans every query as itself and answers from fixed CheckHistory and QA outputs.
+    """
+    def __init__(self, history_answer=("NO ANSWER",)):
+        self.history_answer = history_answer
+        self.planned = asyncio.Event()
+        self.events = []
+
+    async def plan_query_async(self, query, chat_history):
+        self.planned.set()
+        return QueryPlan(recomposed_queries=[query], web_query=f"web: {query}")
+
+    async def check_history_stream_async(self, query, chat_history):
+        # only answers once planning started, so the test hangs if the stages do not overlap
+        await self.planned.wait()
+        for chunk in self.history_answer:
+            yield chunk
+
+    async def ask_async(self, query, kb_results, web_results, stream=False, history=""):
+        self.events.append(("qa", history))
+        return iterate([["The hosts"], [" said so."]])
+
+    async def summarize_conversation_async(self, transcript):
+        self.events.append(("summarize", transcript))
+        return "earlier turns"
+
+
+class FakeKnowledgeBase:
+    def __init__(self, results, release=None):
+        self.results = results
+        self.release = release
+        self.searched = []
+
+    async def search_kb_batch_async(self, queries):
+        self.searched.extend(queries)
+        if self.release is not None:
+            await self.release.wait()
+        return self.results
+
+
+class FakeSearch:
+    def __init__(self):
+        self.queries = []
+
+    async def search_async(self, query, num_results=1, **kwargs):
+        self.queries.append(query)
+        return {"organic_result": {"answer": "From the web.", "references": []}}
+
+
+@pytest.fixture(autouse=True)
+def no_single_flight(monkeypatch):
+    monkeypatch.setattr(george_qa_service, "QA_SINGLE_FLIGHT", False)
+
+
+def ask(service, query, chat_history=None):
+    async def run():
+        frames = [frame async for frame in service.ask_streaming_async(query, chat_history or ChatHistory())]
+        message, final = frames[-1].split("<|END_OF_RESPONSE|>\n")
+        return "".join(frames[:-1]) + message.rstrip("\n"), json.loads(final)
+    return asyncio.run(asyncio.wait_for(run(), timeout=5))
+
+
+def test_web_search_runs_for_questions_with_kb_hits():
+    search = FakeSearch()
+    service = GeorgeQAService(FakeKernel(), FakeKnowledgeBase([KB_HIT]), search)
+
+    answer, final = ask(service, "How is AI used in hospitals?")
+
+    assert answer == "The hosts said so."
+    assert search.queries == ["web: How is AI used in hospitals?"]
+    assert final["web_search_results"]["organic_result"]["answer"] == "From the web."
+
+
+def test_questions_without_kb_hits_never_pay_for_a_web_search():
+    search = FakeSearch()
+    service = GeorgeQAService(FakeKernel(), FakeKnowledgeBase([]), search)
+
+    answer, final = ask(service, "How is AI used in hospitals?")
+
+    assert answer.startswith("I am sorry")
+    assert search.queries == []
+
+
+def test_history_answer_drops_retrieval_and_the_web_search():
+    search = FakeSearch()
+    kb = FakeKnowledgeBase([KB_HIT], release=asyncio.Event())
+    kernel = FakeKernel(history_answer=["They", " said so earlier."])
+    service = GeorgeQAService(kernel, kb, search)
+    history = ChatHistory()
+    history.add_user_message("What did they say about hospitals?")
+    history.add_assistant_message("They said so earlier.")
+
+    answer, _ = ask(service, "Can you repeat that?", history)
+
+    assert answer == "They said so earlier."
+    # the KB search started alongside CheckHistory and was dropped when the history answered
+    assert kb.searched == ["Can you repeat that?"]
+    assert search.queries == []
+
+
+def test_client_held_history_is_summarized_after_the_answer(monkeypatch):
+    monkeypatch.setattr(history_compaction_service, "HISTORY_COMPACT_THRESHOLD_TOKENS", 50)
+    monkeypatch.setattr(history_compaction_service, "HISTORY_KEEP_TURNS", 1)
+    kernel = FakeKernel()
+    compaction = unwrap_singleton(HistoryCompactionService)(
+        kernel, ChatHistoryService(unwrap_singleton(MemorySessionRepository)()))
+    service = GeorgeQAService(kernel, FakeKnowledgeBase([KB_HIT]), FakeSearch(), history_compaction=compaction)
+    history = ChatHistory()
+    for turn in range(3):
+        history.add_user_message(f"question {turn} " + "word " * 20)
+        history.add_assistant_message(f"answer {turn} " + "word " * 20)
+
+    answer, final = ask(service, "How is AI used in hospitals?", history)
+
+    assert answer == "The hosts said so."
+    (qa, prompt_history), (summarize, transcript) = kernel.events
+    # the prompt saw the window of the history; the summary was only made once the answer was complete
+    assert qa == "qa" and "question 0" not in prompt_history and "question 2" in prompt_history
+    assert summarize == "summarize" and "question 0" in transcript
+    assert SUMMARY_PREFIX + "earlier turns" in final["chat_history"]
+    assert "question 0" not in final["chat_history"] and "How is AI used in hospitals?" in final["chat_history"]
@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+from semantic_kernel.contents import ChatHistory, ChatMessageContent, AuthorRole
+
+from app.repository.memory_session_repository import MemorySessionRepository
+from app.services import history_compaction_service
+from app.services.chat_history_service import ChatHistoryService
+from app.services.history_compaction_service import HistoryCompactionService, SUMMARY_PREFIX
+
+from conftest import unwrap_singleton
+
+
+class FakeKernel:
+    """
+    Summarizes a transcript by counting its messages; can hold a summary back until released.
+    """
+    def __init__(self):
+        self.transcripts = []
+        self.release = None
+
+    async def summarize_conversation_async(self, transcript: str) -> str:
+        self.transcripts.append(transcript)
+        if self.release is not None:
+            await self.release.wait()
+        return f"{transcript.count(chr(10)) + 1} messages"
+
+
+@pytest.fixture(autouse=True)
+def small_threshold(monkeypatch):
+    monkeypatch.setattr(history_compaction_service, "HISTORY_COMPACT_THRESHOLD_TOKENS", 50)
+    monkeypatch.setattr(history_compaction_service, "HISTORY_KEEP_TURNS", 2)
+
+
+def conversation(turns: int) -> ChatHistory:
+    history = ChatHistory()
+    for turn in range(turns):
+        history.add_user_message(f"question {turn} " + "word " * 20)
+        history.add_assistant_message(f"answer {turn} " + "word " * 20)
+    return history
+
+
+def service(kernel=None, store=None) -> HistoryCompactionService:
+    store = store or unwrap_singleton(MemorySessionRepository)()
+    return unwrap_singleton(HistoryCompactionService)(kernel or FakeKernel(), ChatHistoryService(store))
+
+
+def test_short_history_is_left_alone():
+    history = conversation(1)
+
+    assert not service().needs_compaction(history)
+    assert asyncio.run(service().compact_history_async(history)) is history
+
+
+def test_window_keeps_the_summary_and_the_last_turns():
+    history = conversation(5)
+    history.messages.insert(0, ChatMessageContent(role=AuthorRole.SYSTEM, content=SUMMARY_PREFIX + "earlier"))
+
+    windowed = service().window(history)
+
+    assert windowed.messages[0].content == SUMMARY_PREFIX + "earlier"
+    assert [message.content.split()[1] for message in windowed.messages[1:]] == ["3", "3", "4", "4"]
+
+
+def test_client_held_history_is_summarized_not_truncated():
+    kernel = FakeKernel()
+    history = conversation(5)
+
+    compacted = asyncio.run(service(kernel).compact_history_async(history))
+
+    assert compacted.messages[0].role == AuthorRole.SYSTEM
+    assert compacted.messages[0].content == SUMMARY_PREFIX + "6 messages"
+    assert len(compacted.messages) == 5
+    # every dropped turn went into the summary
+    assert all(f"question {turn}" in kernel.transcripts[0] for turn in range(3))
+
+
+def test_rolling_summary_folds_in_the_previous_one():
+    kernel = FakeKernel()
+    compaction = service(kernel)
+    history = asyncio.run(compaction.compact_history_async(conversation(5)))
+    for turn in range(5, 8):
+        history.add_user_message(f"question {turn} " + "word " * 20)
+        history.add_assistant_message(f"answer {turn} " + "word " * 20)
+
+    asyncio.run(compaction.compact_history_async(history))
+
+    assert kernel.transcripts[1].startswith("System: " + SUMMARY_PREFIX)
+
+
+def test_session_is_compacted_in_the_background():
+    store = unwrap_singleton(MemorySessionRepository)()
+    compaction = service(store=store)
+
+    async def run():
+        await store.append_async("s", list(conversation(5).messages))
+        compaction.schedule("s")
+        await asyncio.sleep(0.05)
+        return await store.load_async("s")
+
+    history = asyncio.run(run())
+    assert history.messages[0].content == SUMMARY_PREFIX + "6 messages"
+    assert len(history.messages) == 5
+
+
+def test_session_changed_while_summarizing_is_not_overwritten():
+    store = unwrap_singleton(MemorySessionRepository)()
+    kernel = FakeKernel()
+    compaction = service(kernel, store)
+
+    async def run():
+        kernel.release = asyncio.Event()
+        await store.append_async("s", list(conversation(5).messages))
+        compaction.schedule("s")
+        await asyncio.sleep(0.01)
+        # another compaction of the session lands first
+        await store.replace_head_async("s", 4, list(conversation(1).messages[:1]))
+        kernel.release.set()
+        await asyncio.sleep(0.01)
+        return await store.load_async("s")
+
+    history = asyncio.run(run())
+    assert len(history.messages) == 7
+    assert not any((message.content or "").startswith(SUMMARY_PREFIX) for message in history.messages)
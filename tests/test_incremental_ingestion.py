@@ -0,0 +1,101 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.models.knowledge_base_model import PodCastKnowledgeBaseModel
+from app.repository.ingest_manifest_repository import IngestManifestRepository
+from app.repository.lexical_index_repository import LexicalIndexRepository
+from app.services import ingestion_pipeline_service, knowledge_base_service
+from app.services.knowledge_base_service import KnowledgeBaseService
+
+from conftest import unwrap_singleton
+
+
+class FakeKnowledgeBase:
+    """
+    Index that records the segments written to and deleted from it; can fail after some upserts.
+    """
+    def __init__(self):
+        self.saved = []
+        self.deleted = []
+        self.fail_after = None
+
+    async def embed_texts_async(self, texts):
+        return np.ones((len(texts), 2))
+
+    async def save_memory_batch_async(self, metadata, embeddings):
+        if self.fail_after is not None and len(self.saved) >= self.fail_after:
+            raise RuntimeError("index unavailable")
+        self.saved.extend(segment.id for segment in metadata)
+
+    async def delete_memory_batch_async(self, ids):
+        self.deleted.extend(ids)
+
+
+def segment(number: int, content: str = "") -> PodCastKnowledgeBaseModel:
+    return PodCastKnowledgeBaseModel(id=f"Episode-{number}", podcast_title="Episode",
+                                     time_stamp=f"0{number}:00", content=content or f"segment {number}")
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(knowledge_base_service, "INDEX_GENERATION_PATH", str(tmp_path / "index_generation"))
+    # one segment per upsert so an interrupted run has saved an exact number of segments
+    for name in ("INGEST_EMBED_BATCH_SIZE", "INGEST_EMBED_CONCURRENCY", "INGEST_UPSERT_BATCH_SIZE", "INGEST_UPSERT_CONCURRENCY"):
+        monkeypatch.setattr(ingestion_pipeline_service, name, 1)
+    kb = FakeKnowledgeBase()
+    return kb, lambda: KnowledgeBaseService(kb, IngestManifestRepository(tmp_path / "manifest.jsonl"),
+                                            unwrap_singleton(LexicalIndexRepository)(tmp_path / "lexical.jsonl"))
+
+
+def ingest(make_service, segments, **kwargs):
+    return asyncio.run(make_service().ingest_segments_async(segments, **kwargs))
+
+
+def test_unchanged_segments_are_skipped(service):
+    kb, make_service = service
+    ingest(make_service, [segment(1), segment(2)])
+    kb.saved.clear()
+
+    report = ingest(make_service, [segment(1), segment(2, "edited"), segment(3)])
+
+    assert sorted(kb.saved) == ["Episode-2", "Episode-3"]
+    assert (report.added, report.updated, report.skipped) == (1, 1, 1)
+
+
+def test_a_full_ingestion_writes_every_segment(service):
+    kb, make_service = service
+    ingest(make_service, [segment(1), segment(2)])
+    kb.saved.clear()
+
+    report = ingest(make_service, [segment(1), segment(2)], full=True)
+
+    assert sorted(kb.saved) == ["Episode-1", "Episode-2"]
+    assert report.updated == 2
+
+
+def test_segments_gone_from_a_transcript_are_pruned(service, tmp_path):
+    kb, make_service = service
+    ingest(make_service, [segment(1), segment(2)])
+
+    report = ingest(make_service, [segment(1)], prune=True)
+
+    assert kb.deleted == ["Episode-2"] and report.deleted == 1
+    assert set(IngestManifestRepository(tmp_path / "manifest.jsonl").load()) == {"Episode-1"}
+
+
+def test_an_interrupted_run_resumes_after_the_saved_segments(service):
+    kb, make_service = service
+    kb.fail_after = 2
+    with pytest.raises(RuntimeError):
+        ingest(make_service, [segment(number) for number in range(1, 6)])
+    saved_before = list(kb.saved)
+    kb.fail_after = None
+    kb.saved.clear()
+
+    report = ingest(make_service, [segment(number) for number in range(1, 6)])
+
+    assert len(saved_before) == 2
+    assert sorted(saved_before + kb.saved) == [f"Episode-{number}" for number in range(1, 6)]
+    assert report.skipped == 2
@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+
+from app.models.ingestion_job_model import IngestionJobStatus
+from app.models.knowledge_base_model import PodCastKnowledgeBaseModel
+from app.services.ingestion_job_service import IngestionJobService
+
+from conftest import unwrap_singleton
+
+
+class FakeKnowledgeBaseService:
+    """
+    Ingests four segments of one transcript, reporting the first two and then waiting until released.
+    """
+    def __init__(self, fail: bool = False):
+        self.release = asyncio.Event()
+        self.started = asyncio.Event()
+        self.runs = 0
+        self.fail = fail
+
+    def count_transcript_segments(self):
+        return {"Episode": 4}
+
+    async def ingest_transcripts_async(self, full=False, report=None, on_progress=None):
+        self.runs += 1
+        on_progress([PodCastKnowledgeBaseModel(id=f"Episode-{i}", podcast_title="Episode", content="") for i in range(2)])
+        self.started.set()
+        await self.release.wait()
+        if self.fail:
+            raise RuntimeError("index unavailable")
+        on_progress([PodCastKnowledgeBaseModel(id=f"Episode-{i}", podcast_title="Episode", content="") for i in range(2, 4)])
+        report.segments = 4
+        return report
+
+
+def run(scenario):
+    async def main():
+        service = unwrap_singleton(IngestionJobService)(workers=1)
+        try:
+            return await asyncio.wait_for(scenario(service), timeout=5)
+        finally:
+            await service.shutdown()
+    return asyncio.run(main())
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_a_job_reports_progress_and_completes():
+    async def scenario(service):
+        kb = FakeKnowledgeBaseService()
+        job = service.submit(kb)
+        await kb.started.wait()
+        running = service.get(job.id)
+        kb.release.set()
+        await settle()
+        return running, service.get(job.id)
+
+    running, finished = run(scenario)
+    assert running.status == IngestionJobStatus.RUNNING
+    assert (running.processed_segments, running.total_segments, running.transcripts["Episode"].done) == (2, 4, 2)
+    assert finished.status == IngestionJobStatus.COMPLETED
+    assert (finished.processed_segments, finished.report.segments, finished.eta_seconds) == (4, 4, 0.0)
+
+
+def test_a_cancelled_job_can_be_resumed():
+    async def scenario(service):
+        kb = FakeKnowledgeBaseService()
+        job = service.submit(kb)
+        await kb.started.wait()
+        service.cancel(job.id)
+        await settle()
+        cancelled = service.get(job.id)
+        kb.started.clear()
+        kb.release.set()
+        service.resume(job.id)
+        await settle()
+        return cancelled, service.get(job.id), kb
+
+    cancelled, resumed, kb = run(scenario)
+    assert cancelled.status == IngestionJobStatus.CANCELLED
+    assert resumed.status == IngestionJobStatus.COMPLETED
+    assert (resumed.attempts, kb.runs) == (2, 2)
+
+
+def test_queued_jobs_wait_for_a_worker_and_can_be_cancelled_before_they_start():
+    async def scenario(service):
+        first, second = FakeKnowledgeBaseService(), FakeKnowledgeBaseService()
+        running = service.submit(first)
+        queued = service.submit(second)
+        await first.started.wait()
+        service.cancel(queued.id)
+        first.release.set()
+        await settle()
+        return service.get(running.id), service.get(queued.id), second
+
+    running, queued, second = run(scenario)
+    assert running.status == IngestionJobStatus.COMPLETED
+    assert queued.status == IngestionJobStatus.CANCELLED and second.runs == 0
+
+
+def test_a_failed_job_keeps_its_error():
+    async def scenario(service):
+        kb = FakeKnowledgeBaseService(fail=True)
+        kb.release.set()
+        job = service.submit(kb)
+        await settle()
+        with pytest.raises(ValueError):
+            service.cancel(job.id)
+        return service.get(job.id)
+
+    failed = run(scenario)
+    assert failed.status == IngestionJobStatus.FAILED
+    assert (failed.error_count, failed.errors) == (1, ["index unavailable"])
+
+
+def test_only_cancelled_or_failed_jobs_can_be_resumed():
+    async def scenario(service):
+        kb = FakeKnowledgeBaseService()
+        job = service.submit(kb)
+        await kb.started.wait()
+        with pytest.raises(ValueError):
+            service.resume(job.id)
+        with pytest.raises(KeyError):
+            service.resume("unknown")
+        kb.release.set()
+
+    run(scenario)
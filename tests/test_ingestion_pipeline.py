@@ -0,0 +1,77 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.models.knowledge_base_model import PodCastKnowledgeBaseModel
+from app.services.ingestion_pipeline_service import IngestionPipeline
+
+
+class FakeKnowledgeBase:
+    """
+    Embeds a text as its length and records every embedding request and upsert it receives.
+    """
+    def __init__(self, fail_on_upsert: int = 0):
+        self.embed_requests = []
+        self.upserts = []
+        self.fail_on_upsert = fail_on_upsert
+
+    async def embed_texts_async(self, texts):
+        self.embed_requests.append(list(texts))
+        await asyncio.sleep(0)
+        return np.array([[float(len(text)), 1.0] for text in texts])
+
+    async def save_memory_batch_async(self, metadata, embeddings):
+        if len(self.upserts) + 1 == self.fail_on_upsert:
+            raise RuntimeError("index unavailable")
+        self.upserts.append(([segment.id for segment in metadata], embeddings))
+
+
+def segments(count: int):
+    return [PodCastKnowledgeBaseModel(id=f"Episode-{i}", podcast_title="Episode", content="x" * (i + 1))
+            for i in range(count)]
+
+
+def test_segments_are_embedded_and_upserted_in_batches():
+    kb = FakeKnowledgeBase()
+    saved = []
+
+    report = asyncio.run(IngestionPipeline(kb, embed_batch_size=3, embed_concurrency=2,
+                                           upsert_batch_size=4, upsert_concurrency=1)
+                         .run_async(segments(10), on_batch_saved=saved.append))
+
+    assert sorted(len(request) for request in kb.embed_requests) == [1, 3, 3, 3]
+    assert sorted(len(ids) for ids, _ in kb.upserts) == [2, 4, 4]
+    assert sorted(segment.id for batch in saved for segment in batch) == sorted(f"Episode-{i}" for i in range(10))
+    # every embedding stays with its segment across the regrouping
+    for ids, embeddings in kb.upserts:
+        assert [row[0] for row in embeddings] == [int(segment_id.split("-")[1]) + 1 for segment_id in ids]
+    assert (report.segments, report.embedding_batches, report.upsert_batches) == (10, 4, 3)
+
+
+def test_an_async_source_and_callback_are_awaited():
+    kb = FakeKnowledgeBase()
+    saved = []
+
+    async def source():
+        for segment in segments(5):
+            yield segment
+
+    async def on_batch_saved(batch):
+        saved.extend(batch)
+
+    asyncio.run(IngestionPipeline(kb, embed_batch_size=2, upsert_batch_size=2).run_async(source(), on_batch_saved))
+
+    assert len(saved) == 5
+
+
+def test_a_failing_stage_stops_the_run():
+    kb = FakeKnowledgeBase(fail_on_upsert=2)
+
+    async def run():
+        await asyncio.wait_for(IngestionPipeline(kb, embed_batch_size=1, upsert_batch_size=1, upsert_concurrency=1)
+                               .run_async(segments(20)), timeout=5)
+
+    with pytest.raises(RuntimeError, match="index unavailable"):
+        asyncio.run(run())
+    assert len(kb.upserts) == 1
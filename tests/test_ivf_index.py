@@ -0,0 +1,66 @@
+import numpy as np
+
+from app.utils.ivf_index import IVFIndex
+from app.utils.local_vector_store import LocalVectorStore
+
+
+def clustered_vectors(count: int, dim: int = 32, clusters: int = 20, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    return centers[rng.integers(clusters, size=count)] + 0.3 * rng.normal(size=(count, dim))
+
+
+def store_with(tmp_path, vectors: np.ndarray, **ann_options) -> LocalVectorStore:
+    store = LocalVectorStore(tmp_path, IVFIndex(tmp_path / "ivf.npz", **ann_options))
+    store.upsert([{"id": str(i)} for i in range(len(vectors))], vectors)
+    return store
+
+
+def rows(results) -> list:
+    return [[row for row, _ in matches] for matches in results]
+
+
+def recall(store: LocalVectorStore, queries: np.ndarray, limit: int = 10) -> float:
+    found = exact = 0
+    for approximate, expected in zip(store.search(queries, limit), store.search(queries, limit, exact=True)):
+        found += len({row for row, _ in approximate} & {row for row, _ in expected})
+        exact += len(expected)
+    return found / exact
+
+
+def test_ivf_search_recalls_the_exact_neighbours(tmp_path):
+    vectors = clustered_vectors(2000)
+    store = store_with(tmp_path, vectors, nlist=40, nprobe=8, min_rows=500)
+    queries = clustered_vectors(50, seed=1)
+
+    assert recall(store, queries) >= 0.9
+
+
+def test_probing_every_cluster_is_exact(tmp_path):
+    vectors = clustered_vectors(600)
+    store = store_with(tmp_path, vectors, nlist=10, nprobe=10, min_rows=100)
+    queries = clustered_vectors(20, seed=1)
+
+    assert rows(store.search(queries, 5)) == rows(store.search(queries, 5, exact=True))
+
+
+def test_small_collections_are_searched_exactly(tmp_path):
+    index = IVFIndex(tmp_path / "ivf.npz", min_rows=1000)
+    store = LocalVectorStore(tmp_path, index)
+    store.upsert([{"id": str(i)} for i in range(100)], clustered_vectors(100))
+
+    assert not index.ready
+
+
+def test_rows_added_after_training_are_found_and_workers_load_the_saved_index(tmp_path):
+    vectors = clustered_vectors(600)
+    store = store_with(tmp_path, vectors, nlist=10, nprobe=2, min_rows=100)
+    store.upsert([{"id": "new"}], vectors[:1] * 1.01)
+
+    (results,) = store.search(vectors[:1], limit=2)
+    assert {store.record(row)["id"] for row, _ in results} == {"0", "new"}
+
+    reader_index = IVFIndex(tmp_path / "ivf.npz", nlist=10, nprobe=2, min_rows=100)
+    reader = LocalVectorStore(tmp_path, reader_index)
+    assert reader_index.ready
+    assert rows(reader.search(vectors[:5], limit=3)) == rows(store.search(vectors[:5], limit=3))
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from app.models.knowledge_base_model import PodCastKnowledgeBaseModel
+from app.repository.lexical_index_repository import LexicalIndexRepository
+from app.services.knowledge_base_service import KnowledgeBaseService
+
+from conftest import unwrap_singleton
+
+
+class FakeKnowledgeBase:
+    """
+    Vector retriever returning fixed results, recording what it is asked.
+    """
+    def __init__(self, results):
+        self.results = results
+        self.vector_queries = []
+        self.embedded = []
+
+    async def search_memory_top_k_batch_async(self, queries, limit):
+        self.vector_queries.extend(queries)
+        return [[dict(result) for result in self.results] for _ in queries]
+
+    async def embed_texts_async(self, texts):
+        self.embedded.extend(texts)
+        return [[0.5, 0.5] for _ in texts]
+
+
+def segment(number: int, content: str) -> PodCastKnowledgeBaseModel:
+    return PodCastKnowledgeBaseModel(id=f"Episode-{number}", podcast_title="Episode",
+                                     time_stamp=f"0{number}:00", content=content)
+
+
+def vector_hit(number: int, score: float, embedding):
+    return {"id": f"Episode-{number}", "podcast_title": "Episode", "time_stamp": f"0{number}:00",
+            "content": f"segment {number}", "score": score, "embedding": embedding}
+
+
+@pytest.fixture
+def lexical(tmp_path):
+    index = unwrap_singleton(LexicalIndexRepository)(tmp_path / "lexical.jsonl")
+    index.add([
+        segment(1, "quantum computing breakthroughs announced by google researchers"),
+        segment(2, "healthy sleep habits and morning routines"),
+        segment(3, "a review of the quantum of solace movie"),
+        segment(4, "small talk about the weather"),
+    ])
+    return index
+
+
+def test_lexical_candidates_below_the_coverage_floor_are_dropped(lexical):
+    results = lexical.search("quantum computing google", 5, min_coverage=0.5)
+
+    assert [result["id"] for result in results] == ["Episode-1"]
+    assert [result["id"] for result in lexical.search("quantum computing google", 5)] == ["Episode-1", "Episode-3"]
+
+
+def test_fused_results_keep_the_retriever_score_and_are_ordered_by_rrf(lexical):
+    kb = FakeKnowledgeBase([vector_hit(2, 0.71, [0.0, 1.0]), vector_hit(1, 0.83, [1.0, 0.0])])
+    service = KnowledgeBaseService(kb, lexical_index=lexical)
+
+    results = asyncio.run(service.search_kb_batch_async(["quantum sleep"]))
+
+    scores = {result["id"]: (result["retriever"], result["score"]) for result in results}
+    # found by both retrievers: the cosine similarity wins over the BM25 score
+    assert scores["Episode-1"] == ("vector", pytest.approx(0.83))
+    assert scores["Episode-2"] == ("vector", pytest.approx(0.71))
+    assert all("rrf_score" not in result and "embedding" not in result for result in results)
+
+
+def test_confident_lexical_match_skips_the_vector_search(lexical):
+    kb = FakeKnowledgeBase([vector_hit(2, 0.9, [0.0, 1.0])])
+    service = KnowledgeBaseService(kb, lexical_index=lexical)
+
+    results = asyncio.run(service.search_kb_batch_async(["google quantum computing breakthroughs"]))
+
+    assert [(result["id"], result["retriever"]) for result in results] == [("Episode-1", "lexical")]
+    assert kb.vector_queries == [] and kb.embedded == []
+
+
+def test_sub_queries_over_the_limit_are_dropped_with_a_warning(lexical, caplog):
+    kb = FakeKnowledgeBase([])
+    service = KnowledgeBaseService(kb, lexical_index=lexical)
+
+    asyncio.run(service.search_kb_batch_async(["weather talk", "sleep habits", "movie review", "morning routines"]))
+
+    assert "dropped 1: ['morning routines']" in caplog.text
+    assert "morning routines" not in kb.vector_queries
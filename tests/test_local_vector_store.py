@@ -0,0 +1,68 @@
+import numpy as np
+
+from app.utils import local_vector_store
+from app.utils.local_vector_store import LocalVectorStore
+
+
+def record(segment_id: str, content: str = "") -> dict:
+    return {"id": segment_id, "podcast_title": "Episode", "content": content or segment_id}
+
+
+def ids(store: LocalVectorStore, results) -> list:
+    return [store.record(row)["id"] for row, _ in results]
+
+
+def test_searches_rank_by_cosine_similarity(tmp_path):
+    store = LocalVectorStore(tmp_path)
+    store.upsert([record("a"), record("b"), record("c")], np.array([[1, 0], [0, 3], [1, 1]]))
+
+    (results,) = store.search(np.array([[2, 0.1]]), limit=2)
+
+    assert ids(store, results) == ["a", "c"]
+    assert results[0][1] > 0.99 and store.dim == 2
+
+
+def test_a_replaced_segment_keeps_only_its_new_vector_and_metadata(tmp_path):
+    store = LocalVectorStore(tmp_path)
+    store.upsert([record("a", "old"), record("b")], np.array([[1, 0], [0, 1]]))
+
+    store.upsert([record("a", "new")], np.array([[0, 1]]))
+
+    (results,) = store.search(np.array([[1, 0]]), limit=5, min_relevance_score=0.5)
+    assert results == []
+    (results,) = store.search(np.array([[0, 1]]), limit=5)
+    assert sorted(ids(store, results)) == ["a", "b"] and len(store) == 2
+    assert {store.record(row)["id"]: store.record(row)["content"] for row, _ in results}["a"] == "new"
+
+
+def test_deleted_segments_are_not_found(tmp_path):
+    store = LocalVectorStore(tmp_path)
+    store.upsert([record("a"), record("b")], np.array([[1, 0], [0.9, 0.1]]))
+
+    assert store.delete(["a", "missing"]) == 1
+
+    (results,) = store.search(np.array([[1, 0]]), limit=5)
+    assert ids(store, results) == ["b"] and len(store) == 1
+
+
+def test_compaction_drops_dead_rows_and_other_instances_reload(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_vector_store, "MIN_DEAD_ROWS_TO_COMPACT", 2)
+    store, reader = LocalVectorStore(tmp_path), LocalVectorStore(tmp_path)
+    store.upsert([record(name) for name in "abcd"], np.eye(4))
+    store.upsert([record("d")], np.array([[0, 0, 1, 1]]))
+
+    store.delete(["a", "b"])
+
+    # three dead rows against two live ones: the files were rewritten with just the live rows
+    assert (tmp_path / "vectors.f32").stat().st_size == 2 * 4 * 4
+    (results,) = reader.search(np.array([[0, 0, 0, 1]]), limit=5)
+    assert ids(reader, results) == ["d", "c"] and len(reader) == 2
+
+
+def test_a_new_instance_sees_rows_written_by_another(tmp_path):
+    reader = LocalVectorStore(tmp_path)
+    LocalVectorStore(tmp_path).upsert([record("a")], np.array([[1.0, 0.0]]))
+
+    (results,) = reader.search(np.array([[1.0, 0.0]]))
+
+    assert ids(reader, results) == ["a"]
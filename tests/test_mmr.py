@@ -0,0 +1,27 @@
+import numpy as np
+
+from app.utils.mmr import mmr_select
+
+
+def test_pure_relevance_keeps_the_relevance_order():
+    embeddings = np.eye(4, dtype=np.float32)
+
+    assert mmr_select(np.array([0.2, 0.9, 0.5, 0.7]), embeddings, 3, lambda_mult=1.0) == [1, 3, 2]
+
+
+def test_near_duplicates_give_way_to_diverse_candidates():
+    embeddings = np.array([[1.0, 0.0], [0.99, 0.01], [0.0, 1.0]], dtype=np.float32)
+
+    picked = mmr_select(np.array([1.0, 0.95, 0.6]), embeddings, 2, lambda_mult=0.5)
+
+    assert picked == [0, 2]
+
+
+def test_k_larger_than_the_candidates_picks_each_once():
+    picked = mmr_select(np.array([0.3, 0.2]), np.eye(2, dtype=np.float32), 5)
+
+    assert sorted(picked) == [0, 1]
+
+
+def test_no_candidates():
+    assert mmr_select(np.array([]), np.empty((0, 3)), 3) == []
@@ -0,0 +1,59 @@
+import numpy as np
+
+from app.utils.persistent_embedding_store import PersistentEmbeddingStore
+
+
+def vector(value: float) -> np.ndarray:
+    return np.full(4, value, dtype=np.float32)
+
+
+def test_vectors_survive_a_restart(tmp_path):
+    PersistentEmbeddingStore(tmp_path).put_many([("a", vector(1)), ("b", vector(2))])
+
+    reopened = PersistentEmbeddingStore(tmp_path)
+
+    assert len(reopened) == 2
+    np.testing.assert_array_equal(reopened.get_many(["b"])["b"], vector(2))
+
+
+def test_stored_keys_are_not_appended_again(tmp_path):
+    store = PersistentEmbeddingStore(tmp_path)
+    store.put_many([("a", vector(1))])
+
+    store.put_many([("a", vector(9)), ("b", vector(2))])
+
+    assert len(store) == 2
+    np.testing.assert_array_equal(store.get_many(["a"])["a"], vector(1))
+
+
+def test_a_worker_sees_vectors_written_by_another(tmp_path):
+    first, second = PersistentEmbeddingStore(tmp_path), PersistentEmbeddingStore(tmp_path)
+    first.put_many([("a", vector(1))])
+
+    assert set(second.get_many(["a", "missing"])) == {"a"}
+
+
+def test_a_full_store_keeps_its_newest_half(tmp_path):
+    store = PersistentEmbeddingStore(tmp_path, max_rows=4)
+    store.put_many([(key, vector(i)) for i, key in enumerate("abcd")])
+
+    store.put_many([("e", vector(4))])
+
+    assert len(store) == 3
+    assert set(store.get_many("abcde")) == {"c", "d", "e"}
+    np.testing.assert_array_equal(store.get_many(["e"])["e"], vector(4))
+    # the previous generation's files are gone
+    assert sorted(path.name for path in tmp_path.glob("vectors*")) == ["vectors.1.f32"]
+
+
+def test_other_workers_follow_an_eviction(tmp_path):
+    first, second = PersistentEmbeddingStore(tmp_path, max_rows=4), PersistentEmbeddingStore(tmp_path, max_rows=4)
+    first.put_many([(key, vector(i)) for i, key in enumerate("abcd")])
+    assert len(second.get_many("abcd")) == 4
+
+    first.put_many([("e", vector(4))])
+    second.put_many([("f", vector(5))])
+
+    assert set(second.get_many("abcdef")) == {"c", "d", "e", "f"}
+    np.testing.assert_array_equal(second.get_many(["c"])["c"], vector(2))
+    assert set(first.get_many("abcdef")) == {"c", "d", "e", "f"}
@@ -0,0 +1,46 @@
+import asyncio
+
+from app.utils.prefix_detector import detect_marker_prefix_async
+
+from conftest import iterate
+
+
+def detect(chunks, marker="NO ANSWER"):
+    async def run():
+        stream = iterate(chunks)
+        result = await detect_marker_prefix_async(stream, marker)
+        rest = [chunk async for chunk in stream]
+        return result, rest
+    return asyncio.run(run())
+
+
+def test_marker_split_across_chunks_is_detected():
+    (matched, consumed), rest = detect(["NO", " ANS", "WER", " trailing"])
+
+    assert matched and consumed == "NO ANSWER"
+    assert rest == [" trailing"]
+
+
+def test_quotes_case_and_spacing_are_ignored():
+    (matched, _), _ = detect(['"no', '  answer"'])
+
+    assert matched
+
+
+def test_answer_is_recognised_from_its_first_diverging_chunk():
+    (matched, consumed), rest = detect(["The", " hosts", " said"])
+
+    assert not matched and consumed == "The"
+    assert rest == [" hosts", " said"]
+
+
+def test_stream_ending_on_a_marker_prefix_counts_as_the_marker():
+    (matched, consumed), _ = detect(["NO"])
+
+    assert matched and consumed == "NO"
+
+
+def test_words_sharing_the_marker_start_are_answers():
+    (matched, consumed), _ = detect(["NO", "TE: the hosts"])
+
+    assert not matched and consumed == "NOTE: the hosts"
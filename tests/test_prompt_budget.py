@@ -0,0 +1,79 @@
+from semantic_kernel.contents import AuthorRole, ChatHistory, ChatMessageContent
+
+from app.services import prompt_budget_service
+from app.services.prompt_budget_service import PromptBudgetService
+from app.utils.token_counter import count_tokens
+
+
+def history(*turns: tuple) -> ChatHistory:
+    chat_history = ChatHistory()
+    for question, answer in turns:
+        chat_history.add_user_message(question)
+        chat_history.add_assistant_message(answer)
+    return chat_history
+
+
+def turn_tokens(question: str, answer: str) -> int:
+    # one more token for the line break that joins the turns
+    return count_tokens(f"User: {question}\nAssistant: {answer}") + 1
+
+
+TURNS = [(f"question {number} " + "about podcasts " * 10, f"answer {number} " + "from the hosts " * 10)
+         for number in range(3)]
+
+
+def test_the_oldest_turns_are_dropped_whole():
+    budget = turn_tokens(*TURNS[1]) + turn_tokens(*TURNS[2]) + 5
+    service = PromptBudgetService(kb_tokens=0, web_tokens=0, history_tokens=budget)
+
+    sections, report = service.assemble(None, None, history(*TURNS))
+
+    assert "question 0" not in sections.history and "answer 0" not in sections.history
+    assert sections.history.startswith("User: question 1") and sections.history.endswith(TURNS[2][1])
+    assert (report.sections["history"].items, report.sections["history"].dropped) == (2, 1)
+    assert report.sections["history"].truncated == 0
+
+
+def test_a_turn_that_does_not_fit_is_not_truncated():
+    service = PromptBudgetService(kb_tokens=0, web_tokens=0, history_tokens=turn_tokens(*TURNS[2]) - 1)
+
+    sections, report = service.assemble(None, None, history(*TURNS))
+
+    # a newer turn was dropped, so no older turn is kept in its place
+    assert sections.history == ""
+    assert report.sections["history"].dropped == 3
+
+
+def test_a_summary_outranks_the_turns():
+    chat_history = history(*TURNS)
+    chat_history.messages.insert(0, ChatMessageContent(role=AuthorRole.SYSTEM, content="Summary of earlier turns."))
+    budget = count_tokens("System: Summary of earlier turns.") + 1 + turn_tokens(*TURNS[2])
+    service = PromptBudgetService(kb_tokens=0, web_tokens=0, history_tokens=budget)
+
+    sections, _ = service.assemble(None, None, chat_history)
+
+    assert sections.history.startswith("System: Summary of earlier turns.\nUser: question 2")
+
+
+def test_lower_ranked_kb_results_are_dropped_or_truncated(monkeypatch):
+    monkeypatch.setattr(prompt_budget_service, "PROMPT_MIN_ITEM_TOKENS", 5)
+    results = [{"podcast_title": "Episode", "time_stamp": f"0{number}:00", "content": f"segment {number} " + "words " * 30}
+               for number in range(3)]
+    first = count_tokens(f"[Episode @ 00:00] {results[0]['content']}") + 1
+    service = PromptBudgetService(kb_tokens=first + 10, web_tokens=0, history_tokens=0)
+
+    sections, report = service.assemble(results, None)
+
+    lines = sections.knowledge_base.split("\n")
+    assert lines[0].startswith("[Episode @ 00:00] segment 0") and lines[1].endswith(prompt_budget_service.TRUNCATION_MARK)
+    assert (report.sections["knowledge_base"].truncated, report.sections["knowledge_base"].dropped) == (1, 1)
+    assert report.sections["knowledge_base"].used <= report.sections["knowledge_base"].budget
+
+
+def test_unused_web_and_history_budget_goes_to_the_knowledge_base():
+    service = PromptBudgetService(kb_tokens=100, web_tokens=40, history_tokens=60)
+
+    _, report = service.assemble([], None, ChatHistory())
+
+    assert report.sections["knowledge_base"].budget == 200
+    assert report.budget == 200 and report.used == 0
@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+from semantic_kernel.contents import ChatHistory
+
+from app.models.query_plan_model import QueryPlan
+from app.repository.kernel_repository import KernelRepository
+from app.services import george_qa_service
+from app.services.george_qa_service import GeorgeQAService
+
+from conftest import unwrap_singleton
+
+
+@pytest.fixture
+def kernel_repository(monkeypatch):
+    """
+    A kernel repository whose PlanQuery call returns the output set on it, without any model.
+    """
+    for name, value in {"AZURE_OPENAI_ENDPOINT": "https://openai.test", "AZURE_OPENAI_API_VERSION": "2024-02-01",
+                        "AZURE_OPENAI_API_KEY": "test", "AZURE_OPENAI_CHAT_DEPLOYMENT_NAME": "chat",
+                        "AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME": "embedding"}.items():
+        monkeypatch.setenv(name, value)
+    repository = unwrap_singleton(KernelRepository)()
+    repository.plan_output = ""
+
+    async def plan(args):
+        return repository.plan_output
+
+    repository._KernelRepository__plan_query_async = plan
+    return repository
+
+
+def plan(repository, output: str) -> QueryPlan:
+    repository.plan_output = output
+    return asyncio.run(repository.plan_query_async("Who founded OpenAI?", ChatHistory()))
+
+
+def test_plan_is_parsed_from_the_json_object(kernel_repository):
+    result = plan(kernel_repository, '{"recomposed_queries": [" Founders of OpenAI. ", ""], "web_query": "Who founded OpenAI?"}')
+
+    assert result == QueryPlan(recomposed_queries=["Founders of OpenAI."], web_query="Who founded OpenAI?")
+
+
+def test_a_markdown_code_fence_is_tolerated(kernel_repository):
+    result = plan(kernel_repository, '```json\n{"recomposed_queries": ["a"], "web_query": "b"}\n```')
+
+    assert result.recomposed_queries == ["a"] and result.web_query == "b"
+
+
+@pytest.mark.parametrize("output", [
+    "Founders of OpenAI.",
+    '{"recomposed_queries": [], "web_query": "Who founded OpenAI?"}',
+    '{"recomposed_queries": ["Founders of OpenAI."], "web_query": " "}',
+    '{"recomposed_queries": ["Founders of OpenAI."]}',
+])
+def test_invalid_plans_raise_value_error(kernel_repository, output):
+    with pytest.raises(ValueError):
+        plan(kernel_repository, output)
+
+
+class FakeKernel:
+    """
+    Records the planning calls; PlanQuery returns an invalid plan unless told otherwise.
+    """
+    def __init__(self, plan_is_valid=False):
+        self.plan_is_valid = plan_is_valid
+        self.calls = []
+
+    async def plan_query_async(self, query, chat_history):
+        self.calls.append("plan")
+        if not self.plan_is_valid:
+            raise ValueError("recomposed_queries must contain at least one sub-query")
+        return QueryPlan(recomposed_queries=[query], web_query=query)
+
+    async def breakdown_query_async(self, query, chat_history):
+        self.calls.append("breakdown")
+        return '{"recomposed_queries": ["Founders of OpenAI.", "Mission of OpenAI."]}'
+
+    async def regenerate_query_async(self, query, chat_history):
+        self.calls.append("regenerate")
+        return "Who founded OpenAI and what is its mission?"
+
+
+def plan_with(kernel) -> QueryPlan:
+    service = GeorgeQAService(kernel, memory_service=None, search_connector=None)
+    return asyncio.run(service.plan_query_async("Who founded OpenAI and what is its mission?", ChatHistory()))
+
+
+def test_one_call_plans_both_searches():
+    kernel = FakeKernel(plan_is_valid=True)
+
+    plan_with(kernel)
+
+    assert kernel.calls == ["plan"]
+
+
+def test_an_invalid_plan_falls_back_to_the_separate_calls():
+    kernel = FakeKernel()
+
+    result = plan_with(kernel)
+
+    assert sorted(kernel.calls) == ["breakdown", "plan", "regenerate"]
+    assert result == QueryPlan(recomposed_queries=["Founders of OpenAI.", "Mission of OpenAI."],
+                               web_query="Who founded OpenAI and what is its mission?")
+
+
+def test_the_separate_planner_skips_plan_query(monkeypatch):
+    monkeypatch.setattr(george_qa_service, "QUERY_PLANNER", "separate")
+    kernel = FakeKernel(plan_is_valid=True)
+
+    plan_with(kernel)
+
+    assert sorted(kernel.calls) == ["breakdown", "regenerate"]
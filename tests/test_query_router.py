@@ -0,0 +1,68 @@
+import pytest
+from semantic_kernel.contents import ChatHistory
+
+from app.models.routing_decision_model import Route
+from app.services.query_router_service import (CAPABILITIES_ANSWER, FAREWELL_ANSWER, GREETING_ANSWER,
+                                               QueryRouterService)
+
+
+def history_with_one_turn() -> ChatHistory:
+    chat_history = ChatHistory()
+    chat_history.add_user_message("Who founded OpenAI?")
+    chat_history.add_assistant_message("Sam Altman and others.")
+    return chat_history
+
+
+@pytest.mark.parametrize("query, route, answer", [
+    ("Hi!", Route.GREETING, GREETING_ANSWER),
+    ("good morning, George", Route.GREETING, GREETING_ANSWER),
+    ("Thank you so much!", Route.GREETING, FAREWELL_ANSWER),
+    ("What can you do?", Route.CAPABILITIES, CAPABILITIES_ANSWER),
+    ("who are you george", Route.CAPABILITIES, CAPABILITIES_ANSWER),
+    ("What's your name?", Route.CAPABILITIES, CAPABILITIES_ANSWER),
+])
+def test_rules_answer_from_templates(query, route, answer):
+    decision = QueryRouterService().route(query, history_with_one_turn())
+
+    assert (decision.route, decision.reason, decision.answer) == (route, f"rule:{route.value}", answer)
+    assert not decision.check_history
+
+
+@pytest.mark.parametrize("query", ["What time is it?", "what's the date today", "today's date"])
+def test_date_and_time_questions_are_answered_locally(query):
+    decision = QueryRouterService().route(query, ChatHistory())
+
+    assert decision.route == Route.DATETIME and decision.answer.startswith("It is ")
+
+
+@pytest.mark.parametrize("query", ["Hi, what did the hosts say about quantum computing?",
+                                   "What time is it in the episode about Tokyo?"])
+def test_questions_that_only_start_like_a_rule_go_to_retrieval(query):
+    decision = QueryRouterService().route(query, ChatHistory())
+
+    assert decision.route == Route.RETRIEVAL and decision.answer is None
+
+
+def test_history_is_only_checked_when_there_is_one():
+    router = QueryRouterService()
+
+    first = router.route("What did they say about AI?", ChatHistory())
+    follow_up = router.route("Can you say more about that?", history_with_one_turn())
+
+    assert (first.route, first.reason, first.check_history) == (Route.RETRIEVAL, "empty_history", False)
+    assert (follow_up.route, follow_up.reason, follow_up.check_history) == (Route.HISTORY_AND_RETRIEVAL, "has_history", True)
+
+
+def test_the_classifier_catches_paraphrases_the_rules_miss():
+    query = "what kind of questions can i ask you"
+
+    assert QueryRouterService(classifier="none").route(query, ChatHistory()).route == Route.RETRIEVAL
+    decision = QueryRouterService(classifier="ngram").route(query, ChatHistory())
+    assert (decision.route, decision.reason, decision.answer) == (Route.CAPABILITIES, "classifier", CAPABILITIES_ANSWER)
+    assert decision.score >= 0.75
+
+
+def test_the_classifier_leaves_real_questions_to_retrieval():
+    decision = QueryRouterService(classifier="ngram").route("How do transformers handle long documents?", ChatHistory())
+
+    assert decision.route == Route.RETRIEVAL
@@ -0,0 +1,111 @@
+import asyncio
+import sqlite3
+
+import pytest
+from semantic_kernel.contents import ChatMessageContent, AuthorRole
+
+from app.repository.memory_session_repository import MemorySessionRepository
+from app.repository.sqlite_session_repository import SqliteSessionRepository
+
+from conftest import unwrap_singleton
+
+
+def user(content: str) -> ChatMessageContent:
+    return ChatMessageContent(role=AuthorRole.USER, content=content)
+
+
+def contents(history) -> list:
+    return [message.content for message in history.messages] if history is not None else None
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """
+    Two workers' session stores sharing one SQLite database.
+    """
+    path = tmp_path / "sessions.sqlite3"
+    return tuple(unwrap_singleton(MemorySessionRepository)(backend=unwrap_singleton(SqliteSessionRepository)(path))
+                 for _ in range(2))
+
+
+def test_memory_store_appends_and_replaces_the_head():
+    store = unwrap_singleton(MemorySessionRepository)()
+
+    async def run():
+        assert await store.append_async("s", [user("1"), user("2")]) == 1
+        assert await store.append_async("s", [user("3")]) == 2
+        assert await store.replace_head_async("s", 2, [user("summary")], expected_version=2)
+        return await store.load_async("s"), await store.get_version_async("s")
+
+    history, version = asyncio.run(run())
+    assert contents(history) == ["summary", "3"]
+    assert version == 3
+
+
+def test_memory_store_forgets_idle_sessions():
+    store = unwrap_singleton(MemorySessionRepository)(ttl_seconds=0.01)
+
+    async def run():
+        await store.append_async("s", [user("1")])
+        await asyncio.sleep(0.05)
+        return await store.load_async("s")
+
+    assert asyncio.run(run()) is None
+
+
+def test_a_worker_sees_what_another_worker_appended(workers):
+    first, second = workers
+
+    async def run():
+        await first.append_async("s", [user("1")])
+        assert contents(await second.load_async("s")) == ["1"]
+        await first.append_async("s", [user("2")])
+        return await second.load_async("s")
+
+    assert contents(asyncio.run(run())) == ["1", "2"]
+
+
+def test_a_stale_head_is_not_replaced(workers):
+    first, second = workers
+
+    async def run():
+        await first.append_async("s", [user("1"), user("2"), user("3")])
+        version = await second.get_version_async("s")
+        # the first worker compacts the session meanwhile
+        assert await first.replace_head_async("s", 2, [user("summary")], version)
+        replaced = await second.replace_head_async("s", 2, [user("other summary")], version)
+        return replaced, await second.load_async("s"), await first.load_async("s")
+
+    replaced, seen_by_second, seen_by_first = asyncio.run(run())
+    assert not replaced
+    assert contents(seen_by_second) == contents(seen_by_first) == ["summary", "3"]
+
+
+def test_a_session_deleted_by_another_worker_is_gone(workers):
+    first, second = workers
+
+    async def run():
+        await first.append_async("s", [user("1")])
+        await first.load_async("s")
+        await second.delete_async("s")
+        return await first.load_async("s")
+
+    assert asyncio.run(run()) is None
+
+
+def test_databases_without_versions_are_migrated(tmp_path):
+    path = tmp_path / "sessions.sqlite3"
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE sessions (session_id TEXT PRIMARY KEY, updated_at REAL NOT NULL)")
+    connection.execute("INSERT INTO sessions VALUES ('s', 1e12)")
+    connection.commit()
+    connection.close()
+
+    store = unwrap_singleton(SqliteSessionRepository)(path)
+
+    async def run():
+        before = await store.get_version_async("s")
+        after = await store.append_async("s", [user("1")])
+        return before, after
+
+    assert asyncio.run(run()) == (0, 1)
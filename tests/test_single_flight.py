@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from app.utils.single_flight import StreamSingleFlight
+
+from conftest import iterate
+
+
+def test_concurrent_callers_share_one_run():
+    flights = StreamSingleFlight()
+    runs = []
+
+    def factory():
+        runs.append(1)
+        return iterate(["a", "b", "c"], delay=0.01)
+
+    async def collect():
+        return [item async for item in flights.stream("key", factory)]
+
+    async def run():
+        return await asyncio.gather(collect(), collect(), collect())
+
+    assert asyncio.run(run()) == [["a", "b", "c"]] * 3
+    assert len(runs) == 1
+    assert len(flights) == 0
+
+
+def test_late_subscriber_replays_from_the_start():
+    flights = StreamSingleFlight()
+
+    async def run():
+        first = flights.stream("key", lambda: iterate(["a", "b", "c"], delay=0.02))
+        head = await first.__anext__()
+        late = [item async for item in flights.stream("key", lambda: iterate(["unused"]))]
+        rest = [item async for item in first]
+        return [head] + rest, late
+
+    assert asyncio.run(run()) == (["a", "b", "c"], ["a", "b", "c"])
+
+
+def test_errors_reach_every_subscriber():
+    flights = StreamSingleFlight()
+
+    async def failing():
+        yield "a"
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream failed")
+
+    async def collect():
+        return [item async for item in flights.stream("key", failing)]
+
+    async def run():
+        return await asyncio.gather(collect(), collect(), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_run_is_cancelled_when_the_last_subscriber_leaves():
+    flights = StreamSingleFlight()
+    cancelled = asyncio.Event()
+
+    async def endless():
+        try:
+            while True:
+                yield "item"
+                await asyncio.sleep(0.01)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def run():
+        stream = flights.stream("key", endless)
+        await stream.__anext__()
+        await stream.aclose()
+        await asyncio.sleep(0.01)
+        return len(flights)
+
+    assert asyncio.run(run()) == 0
+    assert cancelled.is_set()
+
+
+def test_different_keys_run_separately():
+    flights = StreamSingleFlight()
+
+    async def run():
+        return await asyncio.gather(
+            *(_collect(flights.stream(key, lambda key=key: iterate([key], delay=0.01))) for key in ("x", "y")))
+
+    assert asyncio.run(run()) == [["x"], ["y"]]
+
+
+async def _collect(stream):
+    return [item async for item in stream]
+
+
+@pytest.mark.parametrize("subscribers", [1, 4])
+def test_items_are_delivered_in_order(subscribers):
+    flights = StreamSingleFlight()
+    items = list(range(50))
+
+    async def run():
+        return await asyncio.gather(
+            *(_collect(flights.stream("key", lambda: iterate(items))) for _ in range(subscribers)))
+
+    assert asyncio.run(run()) == [items] * subscribers
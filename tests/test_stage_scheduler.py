@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from app.utils.stage_scheduler import StageScheduler
+
+
+async def value_after(value, delay=0.01):
+    await asyncio.sleep(delay)
+    return value
+
+
+def test_stages_run_concurrently_and_return_their_results():
+    async def run():
+        async with StageScheduler() as stages:
+            stages.start("kb", value_after("kb", 0.05))
+            stages.start("web", value_after("web", 0.05))
+            return await stages.result("kb"), await stages.result("web")
+
+    # both take 50ms, so they only finish within 90ms together
+    assert asyncio.run(asyncio.wait_for(run(), timeout=0.09)) == ("kb", "web")
+
+
+def test_a_failed_stage_raises_from_result():
+    async def failing():
+        raise RuntimeError("search failed")
+
+    async def run():
+        async with StageScheduler() as stages:
+            stages.start("web", failing())
+            await stages.result("web")
+
+    with pytest.raises(RuntimeError, match="search failed"):
+        asyncio.run(run())
+
+
+def test_cancelled_stages_and_stages_left_running_are_stopped():
+    async def run():
+        async with StageScheduler() as stages:
+            cancelled = stages.start("web", value_after("web", 1))
+            left_running = stages.start("plan", value_after("plan", 1))
+            stages.cancel("web")
+            await asyncio.sleep(0)
+            assert cancelled.cancelled()
+        await asyncio.sleep(0)
+        return left_running.cancelled()
+
+    assert asyncio.run(run())
+
+
+def test_a_cancelled_consumer_does_not_cancel_the_stage():
+    async def run():
+        async with StageScheduler() as stages:
+            task = stages.start("plan", value_after("plan", 0.02))
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(stages.result("plan"), timeout=0.001)
+            return await stages.result("plan"), task.cancelled()
+
+    assert asyncio.run(run()) == ("plan", False)
+
+
+def test_stage_names_are_unique_and_must_be_started():
+    async def run():
+        async with StageScheduler() as stages:
+            stages.start("kb", value_after("kb"))
+            duplicate = value_after("kb")
+            with pytest.raises(ValueError):
+                stages.start("kb", duplicate)
+            duplicate.close()
+            with pytest.raises(KeyError):
+                await stages.result("web")
+
+    asyncio.run(run())
@@ -0,0 +1,53 @@
+import asyncio
+
+from app.utils.stream_coalescer import StreamCoalescer
+
+from conftest import iterate
+
+
+def coalesce(chunks, delay=0.0, **policy):
+    async def run():
+        return [frame async for frame in StreamCoalescer(**policy).coalesce(iterate(chunks, delay))]
+    return asyncio.run(run())
+
+
+def test_first_chunk_is_flushed_alone_and_the_rest_by_size():
+    frames = coalesce(["a", "bb", "cc", "dd", "e"], flush_bytes=4, flush_ms=0)
+
+    assert frames == ["a", "bbcc", "dde"]
+    assert "".join(frames) == "abbccdde"
+
+
+def test_disabled_thresholds_forward_every_chunk():
+    assert coalesce(["a", "b", "c"], flush_bytes=0, flush_ms=0) == ["a", "b", "c"]
+
+
+def test_age_threshold_flushes_a_slow_stream():
+    frames = coalesce(["a", "b", "c"], delay=0.05, flush_bytes=1000, flush_ms=10)
+
+    assert frames == ["a", "b", "c"]
+
+
+def test_empty_chunks_are_skipped():
+    assert coalesce(["", "a", "", "b"], flush_bytes=1000, flush_ms=0) == ["a", "b"]
+
+
+def test_closing_early_closes_the_upstream():
+    closed = asyncio.Event()
+
+    async def upstream():
+        try:
+            while True:
+                yield "chunk"
+                await asyncio.sleep(0.01)
+        finally:
+            closed.set()
+
+    async def run():
+        frames = StreamCoalescer(flush_bytes=0, flush_ms=0).coalesce(upstream())
+        first = await frames.__anext__()
+        await frames.aclose()
+        return first
+
+    assert asyncio.run(run()) == "chunk"
+    assert closed.is_set()
@@ -0,0 +1,72 @@
+import time
+import asyncio
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.utils.telemetry import observe_response_body, record_stage, render_metrics, stage_span
+
+from conftest import iterate
+
+
+def count(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(f"{name}_count", labels) or 0.0
+
+
+def stage_count(stage: str, outcome: str) -> float:
+    return count("george_stage_duration_seconds", stage=stage, outcome=outcome)
+
+
+def test_stage_outcomes_are_recorded():
+    before = {outcome: stage_count("test_stage", outcome) for outcome in ("ok", "error", "cancelled")}
+
+    with stage_span("test_stage"):
+        pass
+    with pytest.raises(RuntimeError), stage_span("test_stage"):
+        raise RuntimeError("model unavailable")
+
+    async def cancelled():
+        with stage_span("test_stage"):
+            await asyncio.sleep(10)
+
+    async def run():
+        task = asyncio.ensure_future(cancelled())
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(run())
+    assert {outcome: stage_count("test_stage", outcome) - before[outcome] for outcome in before} == \
+        {"ok": 1, "error": 1, "cancelled": 1}
+
+
+def test_a_stage_can_be_recorded_after_the_fact():
+    before = REGISTRY.get_sample_value("george_stage_duration_seconds_sum", {"stage": "test_first_token", "outcome": "ok"}) or 0.0
+
+    elapsed = record_stage("test_first_token", time.perf_counter() - 0.5)
+
+    after = REGISTRY.get_sample_value("george_stage_duration_seconds_sum", {"stage": "test_first_token", "outcome": "ok"})
+    assert elapsed >= 0.5 and after - before == pytest.approx(elapsed)
+
+
+def test_the_response_body_records_its_first_and_last_byte():
+    labels = {"method": "POST", "route": "/test", "status": "200"}
+    before = (count("george_request_first_byte_seconds", **labels), count("george_request_duration_seconds", **labels))
+
+    async def run():
+        return [chunk async for chunk in observe_response_body(iterate(["a", "b", "c"]), time.perf_counter(),
+                                                               "POST", "/test", 200)]
+
+    assert asyncio.run(run()) == ["a", "b", "c"]
+    assert count("george_request_first_byte_seconds", **labels) - before[0] == 1
+    assert count("george_request_duration_seconds", **labels) - before[1] == 1
+
+
+def test_metrics_are_rendered_in_the_prometheus_format():
+    with stage_span("test_render"):
+        pass
+
+    body, content_type = render_metrics()
+
+    assert content_type.startswith("text/plain")
+    assert b'george_stage_duration_seconds_count{outcome="ok",stage="test_render"} 1.0' in body
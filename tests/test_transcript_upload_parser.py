@@ -0,0 +1,73 @@
+import json
+import asyncio
+
+import pytest
+
+from app.utils.transcript_upload_parser import iter_uploaded_segments
+
+from conftest import iterate
+
+
+def parse(body: bytes, content_type: str = "application/x-ndjson", chunk_size: int = 7):
+    async def collect():
+        chunks = iterate([body[i:i + chunk_size] for i in range(0, len(body), chunk_size)])
+        return [segment async for segment in iter_uploaded_segments(chunks, content_type)]
+    return asyncio.run(collect())
+
+
+def ndjson(*entries) -> bytes:
+    return "\n".join(json.dumps(entry) for entry in entries).encode("utf-8")
+
+
+def test_segment_without_id_is_identified_by_title_and_time_stamp():
+    segments = parse(ndjson({"title": "Episode", "time_stamp": "00:00 - 01:15", "content": "intro"},
+                            {"title": "Episode", "time_stamp": "01:15 - 03:30", "content": "main"}))
+
+    assert [segment.id for segment in segments] == ["Episode-00:00 - 01:15", "Episode-01:15 - 03:30"]
+
+
+def test_separate_uploads_of_one_episode_do_not_reuse_ids():
+    first = parse(ndjson({"title": "Episode", "time_stamp": "00:00", "content": "intro"}))
+    second = parse(ndjson({"title": "Episode", "time_stamp": "05:00", "content": "later"}))
+    again = parse(ndjson({"title": "Episode", "time_stamp": "00:00", "content": "intro, edited"}))
+
+    assert first[0].id != second[0].id
+    assert again[0].id == first[0].id
+
+
+def test_explicit_segment_id_is_kept():
+    segments = parse(ndjson({"id": "custom", "title": "Episode", "time_stamp": "00:00", "content": "intro"}))
+
+    assert segments[0].id == "custom"
+
+
+def test_transcript_line_is_numbered_like_the_bundled_catalog():
+    segments = parse(ndjson({"title": "Episode", "transcripts": [{"time_stamp": "00:00", "content": "a"},
+                                                                  {"time_stamp": "01:00", "content": "b"}]}))
+
+    assert [(segment.id, segment.content) for segment in segments] == [("Episode-1", "a"), ("Episode-2", "b")]
+
+
+def test_invalid_line_reports_its_number():
+    with pytest.raises(ValueError, match="line 2"):
+        parse(ndjson({"title": "Episode", "time_stamp": "00:00", "content": "a"}, {"title": "Episode"}))
+
+
+@pytest.mark.parametrize("line", [b"[1, 2]", b'"a transcript"', b"42", b"null"])
+def test_line_that_is_not_an_object_reports_its_number(line):
+    with pytest.raises(ValueError, match="line 2.*JSON object"):
+        parse(ndjson({"title": "Episode", "time_stamp": "00:00", "content": "a"}) + b"\n" + line)
+
+
+def test_multipart_file_parts_are_parsed():
+    boundary = "XyZ"
+    body = (f"--{boundary}\r\n"
+            'Content-Disposition: form-data; name="note"\r\n\r\n'
+            "ignored\r\n"
+            f"--{boundary}\r\n"
+            'Content-Disposition: form-data; name="file"; filename="a.ndjson"\r\n\r\n').encode("utf-8") + \
+        ndjson({"title": "Episode", "time_stamp": "00:00", "content": "a"}) + f"\r\n--{boundary}--\r\n".encode("utf-8")
+
+    segments = parse(body, f"multipart/form-data; boundary={boundary}", chunk_size=5)
+
+    assert [segment.id for segment in segments] == ["Episode-00:00"]
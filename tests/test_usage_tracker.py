@@ -0,0 +1,78 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.utils import usage_tracker
+from app.utils.token_counter import count_tokens
+from app.utils.usage_tracker import (ANONYMOUS, UsageTracker, api_key_label, record_reported_usage, record_usage,
+                                     track_usage)
+
+
+@pytest.fixture(autouse=True)
+def api_keys(monkeypatch):
+    monkeypatch.setattr(usage_tracker, "API_KEYS", ["key-one", ""])
+
+
+def model_tokens(stage: str, kind: str, api_key: str) -> float:
+    return REGISTRY.get_sample_value("george_model_tokens_total", {"stage": stage, "kind": kind, "api_key": api_key}) or 0.0
+
+
+def test_only_configured_keys_get_their_own_label():
+    label = api_key_label("key-one")
+
+    assert len(label) == 12 and "key-one" not in label
+    assert [api_key_label(key) for key in (None, "", "unknown")] == [ANONYMOUS] * 3
+
+
+def test_usage_is_summed_per_stage_and_in_total():
+    tracker = UsageTracker("key-one")
+
+    tracker.record("plan", 100, 20)
+    tracker.record("qa", 300, 50)
+    tracker.record("qa", 200, 40, estimated=True)
+
+    report = tracker.report()
+    assert (report.prompt_tokens, report.completion_tokens, report.total_tokens) == (600, 110, 710)
+    assert report.stages["qa"].model_dump() == {"calls": 2, "prompt_tokens": 500, "completion_tokens": 90,
+                                                "estimated_calls": 1}
+
+
+def test_calls_from_the_request_tasks_are_attributed_to_its_tracker():
+    tracker = UsageTracker("key-one")
+    before = model_tokens("test_stage", "prompt", tracker.api_key)
+
+    async def stage(prompt_tokens):
+        await asyncio.sleep(0)
+        record_usage("test_stage", prompt_tokens, 1)
+
+    async def request():
+        track_usage(tracker)
+        # pipeline stages run in tasks that inherit the request context
+        await asyncio.gather(asyncio.ensure_future(stage(10)), asyncio.ensure_future(stage(5)))
+
+    async def other_request():
+        await stage(1000)
+
+    async def run():
+        await asyncio.gather(request(), other_request())
+
+    asyncio.run(run())
+    assert tracker.report().stages["test_stage"].prompt_tokens == 15
+    assert model_tokens("test_stage", "prompt", tracker.api_key) - before == 15
+
+
+def test_reported_usage_wins_over_the_local_count():
+    tracker = UsageTracker()
+    usage = SimpleNamespace(prompt_tokens=42, completion_tokens=7)
+
+    async def run():
+        track_usage(tracker)
+        record_reported_usage("reported", [{}, {"usage": usage}], "a prompt", "an answer")
+        record_reported_usage("estimated", [{}], "a prompt", "an answer")
+
+    asyncio.run(run())
+    stages = tracker.report().stages
+    assert (stages["reported"].prompt_tokens, stages["reported"].completion_tokens, stages["reported"].estimated_calls) == (42, 7, 0)
+    assert (stages["estimated"].prompt_tokens, stages["estimated"].estimated_calls) == (count_tokens("a prompt"), 1)